@@ -102,30 +102,6 @@ class BehavioralInterviewer(BaseInterviewer):
     
     async def generate_questions(self, resume_text: str, job_description: str, difficulty: str = "medium", num_questions: int = 5) -> List[str]:
         """Generate behavioral interview questions"""
-        prompt = f"""
-        You are an experienced Behavioral interviewer with a {self.personality} approach.
-        Your focus areas are: {', '.join(self.focus_areas)}
-        
-        Based on the following resume and job description, generate {num_questions} behavioral interview questions.
-        
-        RESUME:
-        {resume_text}
-        
-        JOB DESCRIPTION:
-        {job_description}
-        
-        Generate STAR method questions that assess:
-        - Past leadership experiences and team management
-        - How they've handled difficult situations or conflicts
-        - Examples of innovation or process improvement
-        - Times they've had to learn quickly or adapt
-        - Specific achievements and how they accomplished them
-        
-        Use "Tell me about a time when..." or "Give me an example of..." format.
-        Make questions relevant to their experience level and the role requirements.
-        
-        Return exactly {num_questions} questions as a JSON array.        """
-        
         return await self.gemini_service.generate_questions(
             resume_text, job_description, "behavioral", difficulty, num_questions
         )
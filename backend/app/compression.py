@@ -0,0 +1,201 @@
+"""
+Streaming response compression.
+
+``CompressionMiddleware`` negotiates brotli (when the ``brotli`` package is
+installed) or gzip from ``Accept-Encoding`` and compresses the body chunk by
+chunk as the application sends it, so nothing is buffered. Streamed bodies
+(``more_body``) are flushed after every chunk so NDJSON results still reach the
+client as they are produced.
+
+Only textual content types are compressed. Responses are passed through
+unchanged when they are below COMPRESSION_MIN_BYTES, partial (206), already
+encoded, or served by a path in COMPRESSION_EXCLUDED_PATHS (the recording
+audio stream by default). Compressed and skipped counts and bytes saved are
+reported under /api/debug/metrics.
+"""
+from typing import Any, Dict, List, Optional
+from fnmatch import fnmatch
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from decouple import config
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip is offered without it
+    brotli = None
+
+COMPRESSION_ENABLED = config("COMPRESSION_ENABLED", default=True, cast=bool)
+COMPRESSION_MIN_BYTES = int(config("COMPRESSION_MIN_BYTES", default="1024"))
+COMPRESSION_GZIP_LEVEL = int(config("COMPRESSION_GZIP_LEVEL", default="6"))
+COMPRESSION_BROTLI_QUALITY = int(config("COMPRESSION_BROTLI_QUALITY", default="5"))
+COMPRESSION_EXCLUDED_PATHS = [path.strip() for path in config(
+    "COMPRESSION_EXCLUDED_PATHS", default="/api/interview/recording/*/audio"
+).split(",") if path.strip()]
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "application/problem+json", "image/svg+xml"
+)
+
+# Server preference when the client accepts several encodings equally
+SUPPORTED_ENCODINGS = (["br"] if brotli is not None else []) + ["gzip"]
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred supported encoding the client accepts, or None for identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class _Compressor:
+    """Incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing it so the client can decode it right away"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionStats:
+    """Counters for compressed and skipped responses"""
+
+    def __init__(self):
+        self.compressed: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": COMPRESSION_ENABLED,
+            "encodings": SUPPORTED_ENCODINGS,
+            "min_bytes": COMPRESSION_MIN_BYTES,
+            "compressed": dict(self.compressed),
+            "skipped": dict(self.skipped),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+        }
+
+compression_stats = CompressionStats()
+
+class _CompressingSend:
+    """Wraps ``send`` for one response, deciding on the first body chunk whether to compress"""
+
+    def __init__(self, send: Send, encoding: str, middleware: "CompressionMiddleware"):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _skip_reason(self, headers: Headers, body: bytes, more_body: bool) -> Optional[str]:
+        status = self.start["status"]
+        if status < 200 or status in (204, 206, 304) or "content-range" in headers:
+            return "status"
+        if "content-encoding" in headers:
+            return "encoded"
+        if not headers.get("content-type", "").lower().startswith(COMPRESSIBLE_TYPES):
+            return "content_type"
+        content_length = headers.get("content-length")
+        if not more_body:
+            size = len(body)
+        elif content_length and content_length.isdigit():
+            size = int(content_length)
+        else:
+            return None  # Streamed without a declared length
+        if size < self.middleware.minimum_size:
+            return "small"
+        return None
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            reason = self._skip_reason(headers, body, more_body)
+            if reason is not None:
+                compression_stats.skip(reason)
+                self.passthrough = True
+                if reason != "content_type":
+                    headers.add_vary_header("Accept-Encoding")
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            compression_stats.compressed[self.encoding] = compression_stats.compressed.get(self.encoding, 0) + 1
+            del headers["content-length"]
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            await self.send(self.start)
+
+        compressed = self.compressor.compress(body, final=not more_body)
+        compression_stats.bytes_in += len(body)
+        compression_stats.bytes_out += len(compressed)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing eligible responses as they stream"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 excluded_paths: List[str] = COMPRESSION_EXCLUDED_PATHS,
+                 gzip_level: int = COMPRESSION_GZIP_LEVEL, brotli_quality: int = COMPRESSION_BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = excluded_paths
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            compression_stats.skip("not_accepted")
+            await self.app(scope, receive, send)
+            return
+        if any(fnmatch(scope["path"], pattern) for pattern in self.excluded_paths):
+            compression_stats.skip("excluded_path")
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
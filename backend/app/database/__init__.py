@@ -5,8 +5,10 @@ from decouple import config
 is_render = os.getenv('RENDER') or config('PORT', default='8000') == '10000'
 
 if is_render:
+    print("DEBUG: Using Render-optimized MongoDB connection...")
     from .mongodb_render import MongoDB, connect_to_mongo, close_mongo_connection, get_database, is_connected
 else:
+    print("DEBUG: Using standard MongoDB connection...")
     from .mongodb import MongoDB, connect_to_mongo, close_mongo_connection, get_database, is_connected
 
 __all__ = ["MongoDB", "connect_to_mongo", "close_mongo_connection", "get_database", "is_connected"]
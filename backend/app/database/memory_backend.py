@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from .memory_db import memory_db
+from .storage import StorageBackend, DuplicateKeyError
+
+class MemoryStorageBackend(StorageBackend):
+    """Async adapter over the in-memory database"""
+
+    name = "memory"
+
+    def __init__(self, db=memory_db):
+        self.db = db
+
+    async def close(self) -> None:
+        self.db.close()
+
+    def is_available(self) -> bool:
+        return True
+
+    # User operations
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.db.create_user(user_data)
+
+    async def create_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        inserted, errors = [], []
+        for index, user_data in enumerate(users_data):
+            try:
+                inserted.append(self.db.create_user(user_data))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "field": e.field, "error": str(e)})
+        return {"inserted": inserted, "errors": errors}
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_user_by_email(email)
+
+    async def find_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_user_by_username(username)
+
+    async def find_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_user_by_id(user_id)
+
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        return self.db.update_user(user_id, update_data)
+
+    # Session operations
+    async def create_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.db.create_session(session_data)
+
+    async def find_session(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_session(session_id, user_id)
+
+    async def find_sessions_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        return self.db.find_sessions_by_user(user_id)
+
+    async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict[str, Any]) -> bool:
+        return self.db.add_answer(session_id, user_id, answer, feedback)
+
+    async def update_session(self, session_id: str, user_id: str, update_data: Dict[str, Any]) -> bool:
+        return self.db.update_session(session_id, user_id, update_data)
+
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        return self.db.delete_session(session_id, user_id)
+
+    async def find_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        session = self.db.find_session(session_id, user_id)
+        return session.get("updated_at") if session else None
+
+    async def find_sessions_version(self, user_id: str) -> Dict[str, Any]:
+        return self.db.sessions_version(user_id)
+
+    async def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return self.db.find_sessions_updated_since(user_id, since)
+
+    async def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return self.db.find_session_tombstones(user_id, since)
+
+    # Recording operations
+    async def create_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.db.create_recording(recording_data)
+
+    async def find_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        recording = self.db.find_recording(recording_id)
+        if recording:
+            return {**recording, "_id": recording_id}
+        return None
+
+    async def find_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        recordings = []
+        for recording in self.db.find_recordings_by_session(session_id):
+            # Don't include large audio_data in list response
+            recording_copy = {k: v for k, v in recording.items() if k != "audio_data"}
+            recording_copy["_id"] = recording_copy["recording_id"]
+            recordings.append(recording_copy)
+        return recordings
+
+    async def count_recordings_by_session(self, session_id: str) -> int:
+        return self.db.count_recordings_by_session(session_id)
+
+    async def delete_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        return self.db.delete_recordings_by_session(session_id)
+
+    # Refresh token operations
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.db.create_refresh_token(token_data)
+
+    async def find_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_refresh_token(token_hash)
+
+    async def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        return self.db.revoke_refresh_token(token_hash, replaced_by)
+
+    async def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        return self.db.revoke_refresh_tokens_by_user(user_id)
+
+    # Parsed resume operations
+    async def save_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.db.save_parsed_resume(resume_data)
+
+    async def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        return self.db.find_parsed_resume(user_id, digest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), **self.db.stats()}
@@ -1,19 +1,333 @@
 """
-In-memory database implementation for testing
-This simulates MongoDB operations using Python dictionaries
+In-memory database implementation for testing and MongoDB outages
+This simulates MongoDB operations using Python dictionaries, with secondary
+hash indexes for the lookups the services perform, an LRU memory budget for
+recordings and optional snapshot + append-only log persistence. Compaction
+rotates the log to a numbered segment and writes the snapshot on a background
+thread, so writes keep appending to a fresh log meanwhile.
 """
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from decouple import config
+from bson import ObjectId
+from .storage import DuplicateKeyError, tombstone_horizon
+import copy
+import logging
+import pickle
 import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+# In-memory database configuration
+MEMORY_DB_PATH = config("MEMORY_DB_PATH", default="")  # Empty disables persistence
+MEMORY_DB_MAX_RECORDING_BYTES = int(config("MEMORY_DB_MAX_RECORDING_BYTES", default=str(256 * 1024 * 1024)))
+MEMORY_DB_COMPACT_EVERY = int(config("MEMORY_DB_COMPACT_EVERY", default="1000"))
+MEMORY_DB_FSYNC = config("MEMORY_DB_FSYNC", default=False, cast=bool)
+
+# Rough per-record overhead so metadata-only recordings still count towards the budget
+RECORDING_OVERHEAD_BYTES = 512
 
 class InMemoryDB:
-    def __init__(self):
+    def __init__(self, path: str = "", max_recording_bytes: int = MEMORY_DB_MAX_RECORDING_BYTES):
         self.users: Dict[str, Dict] = {}
         self.sessions: Dict[str, Dict] = {}
-        
+        self.recordings: "OrderedDict[str, Dict]" = OrderedDict()  # LRU order, oldest first
+        self.refresh_tokens: Dict[str, Dict] = {}  # token_hash -> token document
+        self.parsed_resumes: Dict[str, Dict] = {}  # "user_id:digest" -> parsed resume document
+        self.session_tombstones: Dict[str, Dict[str, Dict]] = {}  # user_id -> session_id -> tombstone
+
+        # Secondary indexes
+        self._users_by_email: Dict[str, str] = {}
+        self._users_by_username: Dict[str, str] = {}
+        self._sessions_by_user: Dict[str, Dict[str, None]] = {}  # user_id -> ordered set of session ids
+        self._recordings_by_session: Dict[str, Dict[str, None]] = {}  # session_id -> ordered set of recording ids
+        self._refresh_tokens_by_user: Dict[str, Dict[str, None]] = {}  # user_id -> set of token hashes
+
+        self.max_recording_bytes = max_recording_bytes
+        self.recording_bytes = 0
+        self.evicted_recordings = 0
+        self._eviction_listeners: List[Callable[[Dict], None]] = []
+
+        self.path = path
+        self._log_file = None
+        self._log_records = 0
+        self._segment = 0
+        self._compaction: Optional[Future] = None
+        self._compactor: Optional[ThreadPoolExecutor] = None
+        if path:
+            self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-db-snapshot")
+            self._load()
+
+    # Persistence
+    def _snapshot_path(self) -> str:
+        return f"{self.path}.snapshot"
+
+    def _log_path(self) -> str:
+        return f"{self.path}.aof"
+
+    def _segment_paths(self) -> List[Tuple[int, str]]:
+        """Log segments rotated out for snapshots that have not completed, oldest first"""
+        directory = os.path.dirname(self._log_path()) or "."
+        prefix = f"{os.path.basename(self._log_path())}."
+        segments = []
+        for name in os.listdir(directory):
+            suffix = name[len(prefix):]
+            if name.startswith(prefix) and suffix.isdigit():
+                segments.append((int(suffix), os.path.join(directory, name)))
+        return sorted(segments)
+
+    def _load(self):
+        """Restore state from the last snapshot plus the append-only log"""
+        started = datetime.utcnow()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self._snapshot_path()):
+            with open(self._snapshot_path(), "rb") as f:
+                snapshot = pickle.load(f)
+            for user in snapshot.get("users", []):
+                self._put_user(user)
+            for session in snapshot.get("sessions", []):
+                self._put_session(session)
+            for recording in snapshot.get("recordings", []):
+                self._put_recording(recording)
+            for token in snapshot.get("refresh_tokens", []):
+                self._put_refresh_token(token)
+            for resume in snapshot.get("parsed_resumes", []):
+                self.parsed_resumes[resume["_id"]] = resume
+            for tombstone in snapshot.get("session_tombstones", []):
+                self._put_tombstone(tombstone)
+
+        replayed = 0
+        # Segments left by an interrupted snapshot come before the current log
+        segments = self._segment_paths()
+        for _, segment_path in segments:
+            replayed += self._replay_log(segment_path)
+        if segments:
+            self._segment = segments[-1][0]
+        if os.path.exists(self._log_path()):
+            replayed += self._replay_log(self._log_path())
+
+        self._log_records = replayed
+        self._log_file = open(self._log_path(), "ab")
+        elapsed_ms = (datetime.utcnow() - started).total_seconds() * 1000
+        logger.info(
+            f"Loaded memory DB from {self.path}: {len(self.users)} users, {len(self.sessions)} sessions, "
+            f"{len(self.recordings)} recordings, {replayed} log records in {elapsed_ms:.1f} ms"
+        )
+
+    def _replay_log(self, path: str) -> int:
+        replayed = 0
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    op, payload = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception as e:
+                    # A torn final record from a crash mid-write; everything before it is valid
+                    logger.warning(f"Stopping memory DB log replay at corrupt record: {str(e)}")
+                    break
+                self._apply(op, payload)
+                replayed += 1
+        return replayed
+
+    def _apply(self, op: str, payload: Any):
+        if op == "put_user":
+            self._put_user(payload)
+        elif op == "put_session":
+            self._put_session(payload)
+        elif op == "delete_session":
+            self._delete_session(payload)
+        elif op == "put_recording":
+            self._put_recording(payload)
+        elif op == "delete_recording":
+            self._delete_recording(payload)
+        elif op == "put_refresh_token":
+            self._put_refresh_token(payload)
+        elif op == "put_parsed_resume":
+            self.parsed_resumes[payload["_id"]] = payload
+        elif op == "put_tombstone":
+            self._put_tombstone(payload)
+
+    def _log(self, op: str, payload: Any):
+        if self._log_file is None:
+            return
+        pickle.dump((op, payload), self._log_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._log_file.flush()
+        if MEMORY_DB_FSYNC:
+            os.fsync(self._log_file.fileno())
+        self._log_records += 1
+        if self._log_records >= MEMORY_DB_COMPACT_EVERY:
+            self.compact()
+
+    def _compacting(self) -> bool:
+        return self._compaction is not None and not self._compaction.done()
+
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """Copy the state, so the snapshot thread never sees documents mutated in place"""
+        now = datetime.utcnow()
+        horizon = tombstone_horizon()
+        return {
+            "users": [dict(user) for user in self.users.values()],
+            # Answers and feedback are appended to sessions in place
+            "sessions": copy.deepcopy(list(self.sessions.values())),
+            "recordings": [dict(recording) for recording in self.recordings.values()],
+            "refresh_tokens": [dict(token) for token in self.refresh_tokens.values() if token["expires_at"] > now],
+            "parsed_resumes": list(self.parsed_resumes.values()),
+            "session_tombstones": [
+                tombstone for tombstones in self.session_tombstones.values()
+                for tombstone in tombstones.values() if tombstone["deleted_at"] > horizon
+            ]
+        }
+
+    def _rotate(self) -> Tuple[Dict[str, Any], int]:
+        """Move the log to a numbered segment, start a fresh one and copy the state it adds up to"""
+        self._segment += 1
+        self._log_file.close()
+        os.replace(self._log_path(), f"{self._log_path()}.{self._segment}")
+        self._log_file = open(self._log_path(), "ab")
+        self._log_records = 0
+        return self._snapshot_data(), self._segment
+
+    def _write_snapshot(self, snapshot: Dict[str, Any], segment: int):
+        """Write a snapshot and drop the log segments it covers"""
+        started = datetime.utcnow()
+        tmp_path = f"{self._snapshot_path()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path())
+        for number, segment_path in self._segment_paths():
+            if number <= segment:
+                os.remove(segment_path)
+        elapsed_ms = (datetime.utcnow() - started).total_seconds() * 1000
+        logger.info(f"Wrote memory DB snapshot in {elapsed_ms:.1f} ms")
+
+    def _compaction_done(self, future: Future):
+        if future.exception() is not None:
+            # The rotated segments stay on disk, so the next snapshot or a restart still covers them
+            logger.error(f"Memory DB snapshot failed: {str(future.exception())}")
+
+    def compact(self):
+        """Snapshot on the background thread while writes continue in a new log segment"""
+        if self._log_file is None or self._compacting():
+            return
+        snapshot, segment = self._rotate()
+        self._compaction = self._compactor.submit(self._write_snapshot, snapshot, segment)
+        self._compaction.add_done_callback(self._compaction_done)
+
+    def snapshot(self):
+        """Write a full snapshot and truncate the append-only log, waiting until it is on disk"""
+        if self._log_file is None:
+            return
+        if self._compacting():
+            self._compaction.exception()  # Wait; a failure was already logged
+        snapshot, segment = self._rotate()
+        self._write_snapshot(snapshot, segment)
+
+    def close(self):
+        """Compact and close persistence files"""
+        if self._log_file is not None:
+            self.snapshot()
+            self._log_file.close()
+            self._log_file = None
+        if self._compactor is not None:
+            self._compactor.shutdown(wait=True)
+            self._compactor = None
+
+    # Index maintenance
+    def _put_user(self, user: Dict):
+        user_id = user["_id"]
+        previous = self.users.get(user_id)
+        if previous:
+            self._users_by_email.pop(previous.get("email"), None)
+            self._users_by_username.pop(previous.get("username"), None)
+        self.users[user_id] = user
+        if user.get("email") is not None:
+            self._users_by_email[user["email"]] = user_id
+        if user.get("username") is not None:
+            self._users_by_username[user["username"]] = user_id
+
+    def _put_session(self, session: Dict):
+        session_id = session["_id"]
+        self.sessions[session_id] = session
+        self._sessions_by_user.setdefault(session.get("user_id"), {})[session_id] = None
+
+    def _delete_session(self, session_id: str) -> Optional[Dict]:
+        session = self.sessions.pop(session_id, None)
+        if session:
+            user_sessions = self._sessions_by_user.get(session.get("user_id"), {})
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                self._sessions_by_user.pop(session.get("user_id"), None)
+        return session
+
+    def _put_tombstone(self, tombstone: Dict):
+        tombstones = self.session_tombstones.setdefault(tombstone["user_id"], {})
+        tombstones[tombstone["session_id"]] = tombstone
+        horizon = tombstone_horizon()
+        for session_id in [key for key, value in tombstones.items() if value["deleted_at"] < horizon]:
+            del tombstones[session_id]
+
+    @staticmethod
+    def _recording_size(recording: Dict) -> int:
+        return len(recording.get("audio_data") or "") + RECORDING_OVERHEAD_BYTES
+
+    def _put_recording(self, recording: Dict):
+        recording_id = recording["recording_id"]
+        if recording_id in self.recordings:
+            self._delete_recording(recording_id)
+        self.recordings[recording_id] = recording
+        self.recording_bytes += self._recording_size(recording)
+        self._recordings_by_session.setdefault(recording.get("session_id"), {})[recording_id] = None
+        self._evict_recordings()
+
+    def _delete_recording(self, recording_id: str) -> Optional[Dict]:
+        recording = self.recordings.pop(recording_id, None)
+        if recording:
+            self.recording_bytes -= self._recording_size(recording)
+            session_recordings = self._recordings_by_session.get(recording.get("session_id"), {})
+            session_recordings.pop(recording_id, None)
+            if not session_recordings:
+                self._recordings_by_session.pop(recording.get("session_id"), None)
+        return recording
+
+    def _put_refresh_token(self, token: Dict):
+        self.refresh_tokens[token["token_hash"]] = token
+        self._refresh_tokens_by_user.setdefault(token.get("user_id"), {})[token["token_hash"]] = None
+
+    def _evict_recordings(self):
+        """Drop least recently used recordings until under the memory budget"""
+        while self.recording_bytes > self.max_recording_bytes and len(self.recordings) > 1:
+            oldest_id = next(iter(self.recordings))
+            recording = self._delete_recording(oldest_id)
+            self.evicted_recordings += 1
+            logger.warning(f"Evicted recording {oldest_id} from memory database (budget {self.max_recording_bytes} bytes)")
+            for listener in self._eviction_listeners:
+                try:
+                    listener(recording)
+                except Exception as e:
+                    logger.error(f"Recording eviction listener failed: {str(e)}")
+
+    def add_eviction_listener(self, listener: Callable[[Dict], None]):
+        """Register a callback invoked with each recording evicted by the LRU budget"""
+        self._eviction_listeners.append(listener)
+
     # User operations
     def create_user(self, user_data: Dict) -> Dict:
-        user_id = str(uuid.uuid4())
+        # Same unique keys as the MongoDB users collection
+        if user_data.get("email") in self._users_by_email:
+            raise DuplicateKeyError("email")
+        if user_data.get("username") in self._users_by_username:
+            raise DuplicateKeyError("username")
+        # ObjectId-shaped ids so the User model validates memory users like Mongo ones
+        user_id = str(ObjectId())
         user = {
             "_id": user_id,
             "id": user_id,
@@ -21,31 +335,29 @@ class InMemoryDB:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
-        self.users[user_id] = user
+        self._put_user(user)
+        self._log("put_user", user)
         return user
-    
+
     def find_user_by_email(self, email: str) -> Optional[Dict]:
-        for user in self.users.values():
-            if user.get("email") == email:
-                return user
-        return None
-    
+        user_id = self._users_by_email.get(email)
+        return self.users.get(user_id) if user_id else None
+
     def find_user_by_username(self, username: str) -> Optional[Dict]:
-        for user in self.users.values():
-            if user.get("username") == username:
-                return user
-        return None
-    
+        user_id = self._users_by_username.get(username)
+        return self.users.get(user_id) if user_id else None
+
     def find_user_by_id(self, user_id: str) -> Optional[Dict]:
         return self.users.get(user_id)
-    
+
     def update_user(self, user_id: str, update_data: Dict) -> bool:
         if user_id in self.users:
-            self.users[user_id].update(update_data)
-            self.users[user_id]["updated_at"] = datetime.utcnow()
+            user = {**self.users[user_id], **update_data, "updated_at": datetime.utcnow()}
+            self._put_user(user)
+            self._log("put_user", user)
             return True
         return False
-    
+
     # Session operations
     def create_session(self, session_data: Dict) -> Dict:
         session_id = session_data.get("session_id", str(uuid.uuid4()))
@@ -55,33 +367,138 @@ class InMemoryDB:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
-        self.sessions[session_id] = session
+        self._put_session(session)
+        self._log("put_session", session)
         return session
-    
+
     def find_session(self, session_id: str, user_id: str) -> Optional[Dict]:
         session = self.sessions.get(session_id)
         if session and session.get("user_id") == user_id:
             return session
         return None
-    
+
     def find_sessions_by_user(self, user_id: str) -> List[Dict]:
-        return [session for session in self.sessions.values() 
-                if session.get("user_id") == user_id]
-    
+        return [self.sessions[session_id] for session_id in self._sessions_by_user.get(user_id, {})]
+
     def update_session(self, session_id: str, user_id: str, update_data: Dict) -> bool:
         session = self.sessions.get(session_id)
         if session and session.get("user_id") == user_id:
             session.update(update_data)
             session["updated_at"] = datetime.utcnow()
+            self._log("put_session", session)
             return True
         return False
-    
+
+    def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict) -> bool:
+        session = self.sessions.get(session_id)
+        if session and session.get("user_id") == user_id:
+            session.setdefault("answers", []).append(answer)
+            session.setdefault("feedback", []).append(feedback)
+            session["updated_at"] = datetime.utcnow()
+            self._log("put_session", session)
+            return True
+        return False
+
+    def sessions_version(self, user_id: str) -> Dict:
+        updated = [self.sessions[session_id].get("updated_at") for session_id in self._sessions_by_user.get(user_id, {})]
+        return {"count": len(updated), "updated_at": max(filter(None, updated), default=None)}
+
+    def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict]:
+        sessions = [self.sessions[session_id] for session_id in self._sessions_by_user.get(user_id, {})]
+        changed = [session for session in sessions if session.get("updated_at") and session["updated_at"] > since]
+        return sorted(changed, key=lambda session: session["updated_at"])
+
+    def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict]:
+        tombstones = self.session_tombstones.get(user_id, {}).values()
+        return sorted((t for t in tombstones if t["deleted_at"] > since), key=lambda t: t["deleted_at"])
+
     def delete_session(self, session_id: str, user_id: str) -> bool:
         session = self.sessions.get(session_id)
         if session and session.get("user_id") == user_id:
-            del self.sessions[session_id]
+            self._delete_session(session_id)
+            self._log("delete_session", session_id)
+            tombstone = {"_id": session_id, "session_id": session_id, "user_id": user_id, "deleted_at": datetime.utcnow()}
+            self._put_tombstone(tombstone)
+            self._log("put_tombstone", tombstone)
             return True
         return False
 
+    # Recording operations
+    def create_recording(self, recording_data: Dict) -> Dict:
+        self._put_recording(recording_data)
+        self._log("put_recording", recording_data)
+        return recording_data
+
+    def find_recording(self, recording_id: str) -> Optional[Dict]:
+        recording = self.recordings.get(recording_id)
+        if recording:
+            self.recordings.move_to_end(recording_id)
+        return recording
+
+    def find_recordings_by_session(self, session_id: str) -> List[Dict]:
+        recordings = [self.recordings[rid] for rid in self._recordings_by_session.get(session_id, {})]
+        return sorted(recordings, key=lambda x: x.get('question_index', 0))
+
+    def count_recordings_by_session(self, session_id: str) -> int:
+        return len(self._recordings_by_session.get(session_id, {}))
+
+    def delete_recordings_by_session(self, session_id: str) -> List[Dict]:
+        deleted = []
+        for recording_id in list(self._recordings_by_session.get(session_id, {})):
+            deleted.append(self._delete_recording(recording_id))
+            self._log("delete_recording", recording_id)
+        return deleted
+
+    # Refresh token operations
+    def create_refresh_token(self, token_data: Dict) -> Dict:
+        token = {"_id": token_data["token_hash"], **token_data}
+        self._put_refresh_token(token)
+        self._log("put_refresh_token", token)
+        return token
+
+    def find_refresh_token(self, token_hash: str) -> Optional[Dict]:
+        return self.refresh_tokens.get(token_hash)
+
+    def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        token = self.refresh_tokens.get(token_hash)
+        if not token or token.get("revoked_at") is not None:
+            return False
+        token.update({"revoked_at": datetime.utcnow(), "replaced_by": replaced_by})
+        self._log("put_refresh_token", token)
+        return True
+
+    def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        revoked = 0
+        for token_hash in list(self._refresh_tokens_by_user.get(user_id, {})):
+            if self.revoke_refresh_token(token_hash):
+                revoked += 1
+        return revoked
+
+    # Parsed resume operations
+    def save_parsed_resume(self, resume_data: Dict) -> Dict:
+        resume = {"_id": f"{resume_data['user_id']}:{resume_data['digest']}", **resume_data}
+        self.parsed_resumes[resume["_id"]] = resume
+        self._log("put_parsed_resume", resume)
+        return resume
+
+    def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict]:
+        return self.parsed_resumes.get(f"{user_id}:{digest}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes and memory budget usage"""
+        return {
+            "users": len(self.users),
+            "sessions": len(self.sessions),
+            "recordings": len(self.recordings),
+            "refresh_tokens": len(self.refresh_tokens),
+            "parsed_resumes": len(self.parsed_resumes),
+            "session_tombstones": sum(len(tombstones) for tombstones in self.session_tombstones.values()),
+            "recording_bytes": self.recording_bytes,
+            "max_recording_bytes": self.max_recording_bytes,
+            "evicted_recordings": self.evicted_recordings,
+            "persistent": bool(self.path),
+            "log_records": self._log_records
+        }
+
 # Global in-memory database instance
-memory_db = InMemoryDB()
+memory_db = InMemoryDB(path=MEMORY_DB_PATH)
@@ -0,0 +1,305 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError as MongoDuplicateKeyError
+from . import connect_to_mongo, close_mongo_connection, get_database, is_connected
+from .storage import StorageBackend, DuplicateKeyError, SESSION_TOMBSTONE_RETENTION_DAYS
+from .mongo_supervisor import supervisor
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MongoNotConnectedError(ConnectionFailure):
+    """Raised when a query runs while no MongoDB connection is established"""
+
+def _database():
+    """The connected database, or MongoNotConnectedError after a disconnect"""
+    database = get_database()
+    if database is None:
+        raise MongoNotConnectedError("MongoDB is not connected")
+    return database
+
+def _duplicate_key_error(error: MongoDuplicateKeyError) -> DuplicateKeyError:
+    """Translate a driver duplicate key error into the backend-neutral one"""
+    key_value = (error.details or {}).get("keyValue") or {}
+    return DuplicateKeyError(next(iter(key_value), "_id"))
+
+class MongoStorageBackend(StorageBackend):
+    """MongoDB (Motor) implementation of the storage backend"""
+
+    name = "mongo"
+
+    async def connect(self) -> None:
+        # Indexes are (re)ensured every time the supervisor (re)connects
+        supervisor.add_connected_listener(self.ensure_indexes)
+        await connect_to_mongo()
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the queries rely on (no-op when they already exist)"""
+        try:
+            database = _database()
+            await database.users.create_index([("email", ASCENDING)], unique=True)
+            await database.users.create_index([("username", ASCENDING)], unique=True)
+            await database.refresh_tokens.create_index([("token_hash", ASCENDING)], unique=True)
+            await database.refresh_tokens.create_index([("user_id", ASCENDING), ("revoked_at", ASCENDING)])
+            # MongoDB's TTL monitor removes expired refresh tokens
+            await database.refresh_tokens.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+            await database.parsed_resumes.create_index([("user_id", ASCENDING), ("digest", ASCENDING)], unique=True)
+            await database.interview_sessions.create_index([("session_id", ASCENDING), ("user_id", ASCENDING)])
+            # Session version lookups (ETags) and delta sync read this index
+            await database.interview_sessions.create_index([("user_id", ASCENDING), ("updated_at", ASCENDING)])
+            await database.session_tombstones.create_index([("user_id", ASCENDING), ("deleted_at", ASCENDING)])
+            await database.session_tombstones.create_index(
+                [("deleted_at", ASCENDING)], expireAfterSeconds=int(SESSION_TOMBSTONE_RETENTION_DAYS * 86400)
+            )
+            logger.info("MongoDB indexes ensured")
+        except Exception as e:
+            logger.error(f"Failed to ensure MongoDB indexes: {str(e)}")
+
+    async def close(self) -> None:
+        await close_mongo_connection()
+
+    def is_available(self) -> bool:
+        return is_connected()
+
+    def is_outage_error(self, error: Exception) -> bool:
+        return isinstance(error, (MongoNotConnectedError, ConnectionFailure, asyncio.TimeoutError, OSError))
+
+    def add_availability_listener(self, listener: Callable[[], Any]) -> None:
+        supervisor.add_connected_listener(listener)
+
+    async def warm_up(self, connections: int) -> None:
+        # Concurrent pings make the driver open (and TLS-handshake) that many pooled sockets
+        await supervisor.wait_connected()
+        database = _database()
+        await asyncio.gather(*(database.command("ping") for _ in range(max(1, connections))))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "connection": supervisor.stats()}
+
+    @staticmethod
+    def _user_query(user_id: str) -> Dict[str, Any]:
+        # Mongo users have ObjectId keys, users created during an outage have string ids
+        return {"_id": ObjectId(user_id)} if ObjectId.is_valid(user_id) else {"_id": user_id}
+
+    # User operations
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        user = dict(user_data)
+        user.pop("id", None)
+        if isinstance(user.get("_id"), str) and ObjectId.is_valid(user["_id"]):
+            # Users created during an outage keep their id when replayed
+            user["_id"] = ObjectId(user["_id"])
+        try:
+            result = await _database().users.insert_one(user)
+        except MongoDuplicateKeyError as e:
+            raise _duplicate_key_error(e)
+        user["_id"] = result.inserted_id
+        return user
+
+    async def create_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        documents = []
+        for user_data in users_data:
+            user = dict(user_data)
+            user.pop("id", None)
+            documents.append(user)
+
+        errors = []
+        try:
+            # Unordered, so one duplicate does not stop the rest of the batch
+            await _database().users.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                key_value = write_error.get("keyValue") or {}
+                errors.append({
+                    "index": write_error["index"],
+                    "field": next(iter(key_value), "_id") if write_error.get("code") == 11000 else None,
+                    "error": write_error.get("errmsg")
+                })
+        failed = {error["index"] for error in errors}
+        # insert_many sets _id on each document
+        inserted = [user for index, user in enumerate(documents) if index not in failed]
+        return {"inserted": inserted, "errors": errors}
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await _database().users.find_one({"email": email})
+
+    async def find_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await _database().users.find_one({"username": username})
+
+    async def find_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await _database().users.find_one(self._user_query(user_id))
+
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        result = await _database().users.update_one(
+            self._user_query(user_id),
+            {"$set": {**update_data, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+    # Session operations
+    async def create_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            await _database().interview_sessions.insert_one(session_data)
+        except MongoDuplicateKeyError as e:
+            raise _duplicate_key_error(e)
+        logger.info(f"Session {session_data.get('session_id')} successfully saved to MongoDB")
+        return session_data
+
+    async def find_session(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await _database().interview_sessions.find_one({
+            "session_id": session_id,
+            "user_id": user_id
+        })
+
+    async def find_sessions_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        cursor = _database().interview_sessions.find({"user_id": user_id})
+        return [session async for session in cursor]
+
+    async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict[str, Any]) -> bool:
+        result = await _database().interview_sessions.update_one(
+            {"session_id": session_id, "user_id": user_id},
+            {
+                "$push": {
+                    "answers": answer,
+                    "feedback": feedback
+                },
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        )
+        return result.modified_count > 0
+
+    async def update_session(self, session_id: str, user_id: str, update_data: Dict[str, Any]) -> bool:
+        result = await _database().interview_sessions.update_one(
+            {"session_id": session_id, "user_id": user_id},
+            {"$set": {**update_data, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        database = _database()
+        result = await database.interview_sessions.delete_one({
+            "session_id": session_id,
+            "user_id": user_id
+        })
+        if result.deleted_count == 0:
+            return False
+        # Keyed by session id so a replayed delete rewrites the same tombstone
+        await database.session_tombstones.replace_one(
+            {"_id": session_id},
+            {"session_id": session_id, "user_id": user_id, "deleted_at": datetime.utcnow()},
+            upsert=True
+        )
+        return True
+
+    async def find_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        session = await _database().interview_sessions.find_one(
+            {"session_id": session_id, "user_id": user_id},
+            {"_id": 0, "updated_at": 1}
+        )
+        return session.get("updated_at") if session else None
+
+    async def find_sessions_version(self, user_id: str) -> Dict[str, Any]:
+        cursor = _database().interview_sessions.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "updated_at": {"$max": "$updated_at"}}}
+        ])
+        result = [group async for group in cursor]
+        if not result:
+            return {"count": 0, "updated_at": None}
+        return {"count": result[0]["count"], "updated_at": result[0]["updated_at"]}
+
+    async def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        cursor = _database().interview_sessions.find(
+            {"user_id": user_id, "updated_at": {"$gt": since}}
+        ).sort("updated_at", ASCENDING)
+        return [session async for session in cursor]
+
+    async def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        cursor = _database().session_tombstones.find(
+            {"user_id": user_id, "deleted_at": {"$gt": since}}
+        ).sort("deleted_at", ASCENDING)
+        return [tombstone async for tombstone in cursor]
+
+    # Recording operations
+    async def create_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        document = dict(recording_data)
+        document["_id"] = document.pop("recording_id", document.get("_id"))
+        try:
+            await _database().interview_recordings.insert_one(document)
+        except MongoDuplicateKeyError as e:
+            raise _duplicate_key_error(e)
+        logger.info(f"Recording saved to MongoDB for session: {document.get('session_id')}")
+        return recording_data
+
+    async def find_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        # recording_id is stored as _id
+        recording = await _database().interview_recordings.find_one({"_id": recording_id})
+        if recording:
+            recording["recording_id"] = str(recording["_id"])
+            recording["user_id"] = str(recording["user_id"])
+        return recording
+
+    async def find_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        # Don't include large audio_data in list response
+        cursor = _database().interview_recordings.find(
+            {"session_id": session_id},
+            {"audio_data": 0}
+        ).sort("question_index", 1)
+        recordings = []
+        async for recording in cursor:
+            recording["recording_id"] = recording["_id"]
+            recording["user_id"] = str(recording["user_id"])
+            recordings.append(recording)
+        return recordings
+
+    async def count_recordings_by_session(self, session_id: str) -> int:
+        return await _database().interview_recordings.count_documents({"session_id": session_id})
+
+    async def delete_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        recordings_collection = _database().interview_recordings
+        deleted = [
+            {**recording, "recording_id": recording["_id"]}
+            async for recording in recordings_collection.find(
+                {"session_id": session_id},
+                {"_id": 1, "storage": 1, "session_id": 1}
+            )
+        ]
+        await recordings_collection.delete_many({"session_id": session_id})
+        return deleted
+
+    # Refresh token operations
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        token = {"_id": token_data["token_hash"], **token_data}
+        try:
+            await _database().refresh_tokens.insert_one(token)
+        except MongoDuplicateKeyError as e:
+            raise _duplicate_key_error(e)
+        return token
+
+    async def find_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return await _database().refresh_tokens.find_one({"token_hash": token_hash})
+
+    async def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        result = await _database().refresh_tokens.update_one(
+            {"token_hash": token_hash, "revoked_at": None},
+            {"$set": {"revoked_at": datetime.utcnow(), "replaced_by": replaced_by}}
+        )
+        return result.modified_count > 0
+
+    async def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        result = await _database().refresh_tokens.update_many(
+            {"user_id": str(user_id), "revoked_at": None},
+            {"$set": {"revoked_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    # Parsed resume operations
+    async def save_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        resume = {"_id": f"{resume_data['user_id']}:{resume_data['digest']}", **resume_data}
+        await _database().parsed_resumes.replace_one({"_id": resume["_id"]}, resume, upsert=True)
+        return resume
+
+    async def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        return await _database().parsed_resumes.find_one({"user_id": str(user_id), "digest": digest})
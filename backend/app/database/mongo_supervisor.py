@@ -0,0 +1,292 @@
+"""
+Background supervisor for the MongoDB connection.
+
+Connecting no longer blocks application startup: the supervisor task tries
+the connection strategies of the active MongoDB module with exponential
+backoff, keeps pinging the server once connected, and flips the connection
+state (``MongoDB.database``) on failures and recoveries so the repository
+can route around an outage and replay its journal afterwards.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from collections import deque
+from decouple import config
+from pymongo import monitoring
+import motor.motor_asyncio
+import asyncio
+import threading
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Supervisor configuration
+MONGO_PING_TIMEOUT = float(config("MONGO_PING_TIMEOUT", default="10"))
+MONGO_HEALTH_INTERVAL = float(config("MONGO_HEALTH_INTERVAL", default="15"))
+MONGO_BACKOFF_INITIAL = float(config("MONGO_BACKOFF_INITIAL", default="1"))
+MONGO_BACKOFF_MAX = float(config("MONGO_BACKOFF_MAX", default="60"))
+MONGO_FAILURES_BEFORE_DISCONNECT = int(config("MONGO_FAILURES_BEFORE_DISCONNECT", default="2"))
+MONGO_FAILURES_BEFORE_NEW_CLIENT = int(config("MONGO_FAILURES_BEFORE_NEW_CLIENT", default="5"))
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Connection pool counters and checkout latency from driver events"""
+
+    def __init__(self, latency_window: int = 500):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.in_use = 0
+        self.waiters = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pools_cleared = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    # Checkout start and completion fire on the same driver thread
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiters += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        with self._lock:
+            self.waiters = max(0, self.waiters - 1)
+            self.in_use += 1
+            self.checkouts += 1
+            if started is not None:
+                self._latencies.append((time.perf_counter() - started) * 1000)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiters = max(0, self.waiters - 1)
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+        return {
+            "open_connections": self.open_connections,
+            "in_use": self.in_use,
+            "waiters": self.waiters,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "pools_cleared": self.pools_cleared,
+            "checkout_latency_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 3) if latencies else None
+            }
+        }
+
+class MongoSupervisor:
+    """Owns the connect / health-check / reconnect loop for one MongoDB holder class"""
+
+    def __init__(self):
+        self.holder = None
+        self.url = ""
+        self.database_name = ""
+        self.strategies: List[Tuple[str, Dict[str, Any]]] = []
+        self.pool_stats = PoolStatsListener()
+        self.state = "idle"  # idle, connecting, connected, degraded, closed
+        self.strategy_name: Optional[str] = None
+        self.connect_attempts = 0
+        self.consecutive_failures = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self.last_ping_ms: Optional[float] = None
+        self.connected_at: Optional[datetime] = None
+        self.started_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], Optional[Awaitable[None]]]] = []
+        self._connected_event = asyncio.Event()
+
+    def add_connected_listener(self, listener: Callable[[], Optional[Awaitable[None]]]):
+        """Register a callback run every time the connection becomes usable"""
+        self._listeners.append(listener)
+
+    def start(self, holder, url: str, database_name: str, strategies: List[Tuple[str, Dict[str, Any]]]):
+        """Start supervising in the background and return immediately"""
+        self.holder = holder
+        self.url = url
+        self.database_name = database_name
+        self.strategies = strategies
+        self.started_at = datetime.utcnow()
+        if self._task is None or self._task.done():
+            self.state = "connecting"
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """Wait until connected, returning False on timeout"""
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.holder is not None and self.holder.client:
+            self.holder.client.close()
+            logger.info("Disconnected from MongoDB")
+        self.state = "closed"
+        self._set_database(None)
+
+    def is_ready(self) -> bool:
+        return self.state == "connected"
+
+    def _set_database(self, database):
+        if self.holder is not None:
+            self.holder.database = database
+        if database is None:
+            self._connected_event.clear()
+        else:
+            self._connected_event.set()
+
+    async def _ping(self, client) -> None:
+        started = time.perf_counter()
+        await asyncio.wait_for(client.admin.command("ping"), timeout=MONGO_PING_TIMEOUT)
+        self.last_ping_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    async def _open_client(self) -> bool:
+        """Try each connection strategy once"""
+        for name, options in self.strategies:
+            self.connect_attempts += 1
+            client = None
+            try:
+                print(f"DEBUG: Trying MongoDB connection strategy: {name}...")
+                client = motor.motor_asyncio.AsyncIOMotorClient(
+                    self.url,
+                    event_listeners=[self.pool_stats],
+                    **options
+                )
+                await self._ping(client)
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                print(f"DEBUG: MongoDB strategy '{name}' failed: {e}")
+                if client is not None:
+                    client.close()
+                continue
+
+            if self.holder.client is not None and self.holder.client is not client:
+                self.holder.client.close()
+            self.holder.client = client
+            self.strategy_name = name
+            return True
+        return False
+
+    async def _on_connected(self):
+        self._set_database(self.holder.client[self.database_name])
+        if self.connected_at is not None:
+            self.reconnects += 1
+        self.state = "connected"
+        self.connected_at = datetime.utcnow()
+        self.consecutive_failures = 0
+        logger.info(f"Successfully connected to MongoDB ({self.strategy_name})")
+        print(f"DEBUG: Successfully connected to MongoDB ({self.strategy_name})!")
+        for listener in self._listeners:
+            try:
+                result = listener()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"MongoDB connected listener failed: {str(e)}")
+
+    def _backoff(self) -> float:
+        delay = min(MONGO_BACKOFF_MAX, MONGO_BACKOFF_INITIAL * (2 ** min(self.consecutive_failures, 16)))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _run(self):
+        while True:
+            if self.state == "connected":
+                await asyncio.sleep(MONGO_HEALTH_INTERVAL)
+                try:
+                    await self._ping(self.holder.client)
+                    self.consecutive_failures = 0
+                except Exception as e:
+                    self.consecutive_failures += 1
+                    self.last_error = str(e) or type(e).__name__
+                    logger.warning(f"MongoDB health ping failed ({self.consecutive_failures}): {str(e)}")
+                    if self.consecutive_failures >= MONGO_FAILURES_BEFORE_DISCONNECT:
+                        # Requests now go straight to the fallback store
+                        self.state = "degraded"
+                        self._set_database(None)
+                        logger.error("MongoDB marked unavailable, reconnecting in the background")
+                continue
+
+            # Not connected: retry the existing client first, then rebuild it
+            try:
+                if self.holder.client is not None and self.consecutive_failures % MONGO_FAILURES_BEFORE_NEW_CLIENT:
+                    await self._ping(self.holder.client)
+                    connected = True
+                else:
+                    connected = await self._open_client()
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                connected = False
+
+            if connected:
+                await self._on_connected()
+                continue
+
+            self.consecutive_failures += 1
+            delay = self._backoff()
+            logger.warning(f"MongoDB not reachable ({self.last_error}), retrying in {delay:.1f}s")
+            print(f"DEBUG: MongoDB not reachable, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.is_ready(),
+            "strategy": self.strategy_name,
+            "connect_attempts": self.connect_attempts,
+            "consecutive_failures": self.consecutive_failures,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "last_ping_ms": self.last_ping_ms,
+            "started_at": self.started_at,
+            "connected_at": self.connected_at,
+            "pool": self.pool_stats.stats()
+        }
+
+supervisor = MongoSupervisor()
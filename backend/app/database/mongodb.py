@@ -1,8 +1,6 @@
-import motor.motor_asyncio
 from decouple import config
+from .mongo_supervisor import supervisor
 import logging
-import asyncio
-import ssl
 
 logger = logging.getLogger(__name__)
 
@@ -13,87 +11,61 @@ class MongoDB:
 # MongoDB configuration
 MONGODB_URL = config("MONGODB_URL", default="mongodb://localhost:27017/interviewpilot")
 DATABASE_NAME = config("DATABASE_NAME", default="interviewpilot")
+MONGO_MAX_POOL_SIZE = int(config("MONGO_MAX_POOL_SIZE", default="10"))
 
-async def connect_to_mongo():
-    """Create database connection with Render-compatible SSL handling"""
-    try:
-        # Debug: Print the actual URL being used
-        print(f"DEBUG: Attempting to connect to MongoDB with URL: {MONGODB_URL}")
-        logger.info(f"Attempting to connect to MongoDB with URL: {MONGODB_URL}")
-        
-        # Render-compatible MongoDB client configuration
-        connection_options = {
-            'serverSelectionTimeoutMS': 30000,
-            'connectTimeoutMS': 30000,
-            'socketTimeoutMS': 30000,
-            'maxPoolSize': 10,
-            'retryWrites': True,
-            'w': 'majority'
-        }
-        
-        # Special SSL configuration for MongoDB Atlas on Render
-        if 'mongodb+srv://' in MONGODB_URL:
-            # Option 1: Try with minimal TLS settings (most compatible with Render)
-            connection_options.update({
+def _masked_url() -> str:
+    """MONGODB_URL with the password hidden"""
+    masked_url = MONGODB_URL
+    if '@' in MONGODB_URL:
+        parts = MONGODB_URL.split('@')
+        if len(parts) > 1:
+            user_pass = parts[0].split('//')[-1]
+            if ':' in user_pass:
+                user, password = user_pass.split(':', 1)
+                masked_url = MONGODB_URL.replace(password, '***')
+    return masked_url
+
+def _connection_strategies():
+    """Client options to try in order, most specific first"""
+    # Render-compatible MongoDB client configuration
+    connection_options = {
+        'serverSelectionTimeoutMS': 10000,
+        'connectTimeoutMS': 10000,
+        'socketTimeoutMS': 30000,
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'retryWrites': True,
+        'w': 'majority'
+    }
+
+    # Special SSL configuration for MongoDB Atlas on Render
+    if 'mongodb+srv://' in MONGODB_URL:
+        # Minimal TLS settings are the most compatible with Render
+        connection_options.update({
+            'tls': True,
+            'tlsInsecure': True  # This bypasses certificate validation entirely
+        })
+        return [
+            ("render-compatible TLS", connection_options),
+            ("permissive TLS", {
+                'serverSelectionTimeoutMS': 30000,
+                'connectTimeoutMS': 30000,
+                'socketTimeoutMS': 60000,
+                'maxPoolSize': MONGO_MAX_POOL_SIZE,
                 'tls': True,
-                'tlsInsecure': True  # This bypasses certificate validation entirely
+                'tlsInsecure': True
             })
-        print("DEBUG: Attempting connection with Render-compatible SSL settings...")
-        MongoDB.client = motor.motor_asyncio.AsyncIOMotorClient(
-            MONGODB_URL,
-            **connection_options
-        )
-        MongoDB.database = MongoDB.client[DATABASE_NAME]
-        
-        # Test the connection with retries
-        max_retries = 5
-        for attempt in range(max_retries):
-            try:
-                # Use a shorter timeout for ping
-                await asyncio.wait_for(
-                    MongoDB.client.admin.command('ping'), 
-                    timeout=10.0
-                )
-                logger.info(f"Successfully connected to MongoDB at {MONGODB_URL}")
-                print(f"DEBUG: Successfully connected to MongoDB on attempt {attempt + 1}!")
-                return
-            except Exception as retry_error:
-                print(f"DEBUG: Connection attempt {attempt + 1} failed: {retry_error}")
-                if attempt == max_retries - 1:
-                    # Try one more time with even more permissive settings
-                    print("DEBUG: Trying with most permissive SSL settings...")
-                    try:
-                        MongoDB.client = motor.motor_asyncio.AsyncIOMotorClient(
-                            MONGODB_URL,
-                            serverSelectionTimeoutMS=60000,
-                            connectTimeoutMS=60000,
-                            socketTimeoutMS=60000,
-                            tls=True,
-                            tlsInsecure=True
-                        )
-                        MongoDB.database = MongoDB.client[DATABASE_NAME]
-                        await asyncio.wait_for(
-                            MongoDB.client.admin.command('ping'), 
-                            timeout=30.0
-                        )
-                        print("DEBUG: Connected with permissive SSL settings!")
-                        return
-                    except Exception as final_error:
-                        print(f"DEBUG: Final attempt failed: {final_error}")
-                        raise final_error
-                await asyncio.sleep(3)  # Wait 3 seconds before retry
-        
-    except Exception as e:
-        logger.warning(f"Failed to connect to MongoDB: {str(e)}")
-        print(f"DEBUG: Failed to connect to MongoDB: {str(e)}")
-        logger.info("Note: You can use MongoDB Atlas or install MongoDB locally")
-        # Don't raise the exception, let the app continue
+        ]
+    return [("standard", connection_options)]
+
+async def connect_to_mongo():
+    """Start connecting in the background; the app serves requests meanwhile"""
+    print(f"DEBUG: Attempting to connect to MongoDB with URL: {_masked_url()}")
+    logger.info(f"Attempting to connect to MongoDB with URL: {_masked_url()}")
+    supervisor.start(MongoDB, MONGODB_URL, DATABASE_NAME, _connection_strategies())
 
 async def close_mongo_connection():
     """Close database connection"""
-    if MongoDB.client:
-        MongoDB.client.close()
-        logger.info("Disconnected from MongoDB")
+    await supervisor.stop()
 
 def get_database():
     """Get database instance"""
@@ -0,0 +1,447 @@
+"""
+Repository layer in front of the storage backends.
+
+All service persistence goes through ``repository``. It routes each call to
+the configured primary backend while it is healthy, and to the fallback
+(in-memory) backend during an outage without first paying for a doomed
+primary round trip. Writes accepted during an outage are recorded in a
+write-ahead journal and replayed into the primary by a background
+reconciler once it is reachable again. Until the journal is drained, new
+writes replay it first (or join it), so they never overtake the outage
+writes they may depend on. Entries the primary rejects for reasons other
+than an outage are dead-lettered instead of blocking the rest. The journal is
+capped by entries and bytes; once full, further outage writes are rejected.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from decouple import config
+from .storage import StorageBackend, DuplicateKeyError, get_backend, STORAGE_BACKEND
+import asyncio
+import copy
+import pickle
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Repository configuration
+REPOSITORY_RETRY_SECONDS = float(config("REPOSITORY_RETRY_SECONDS", default="15"))
+REPOSITORY_RECONCILE_INTERVAL = float(config("REPOSITORY_RECONCILE_INTERVAL", default="10"))
+REPOSITORY_JOURNAL_PATH = config("REPOSITORY_JOURNAL_PATH", default="")  # Empty keeps the journal in memory
+REPOSITORY_JOURNAL_MAX_ENTRIES = int(config("REPOSITORY_JOURNAL_MAX_ENTRIES", default="10000"))
+REPOSITORY_JOURNAL_MAX_BYTES = int(config("REPOSITORY_JOURNAL_MAX_BYTES", default=str(64 * 1024 * 1024)))
+
+# Replayed writes that legitimately report False when a retried replay already applied them
+IDEMPOTENT_OPERATIONS = {"delete_session", "revoke_refresh_token", "revoke_refresh_tokens_by_user", "delete_recordings_by_session"}
+
+class BackendHealth:
+    """Circuit breaker around the primary backend"""
+
+    def __init__(self, backend: StorageBackend, retry_seconds: float = REPOSITORY_RETRY_SECONDS):
+        self.backend = backend
+        self.retry_seconds = retry_seconds
+        self.open_until = 0.0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[datetime] = None
+
+    def is_routable(self) -> bool:
+        """Whether requests should try the primary backend"""
+        return self.backend.is_available() and time.monotonic() >= self.open_until
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, error: Exception):
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+        self.last_failure_at = datetime.utcnow()
+        self.open_until = time.monotonic() + self.retry_seconds
+
+    def reset(self):
+        """Allow the primary to be tried again immediately, e.g. after a reconnect"""
+        self.open_until = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "available": self.backend.is_available(),
+            "routable": self.is_routable(),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at
+        }
+
+class JournalFullError(Exception):
+    """Raised when an outage write would exceed the journal's entry or byte cap"""
+
+class OutageJournal:
+    """Ordered log of write operations accepted by the fallback backend"""
+
+    def __init__(self, path: str = REPOSITORY_JOURNAL_PATH, max_entries: int = REPOSITORY_JOURNAL_MAX_ENTRIES,
+                 max_bytes: int = REPOSITORY_JOURNAL_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: List[Tuple[str, tuple]] = []
+        self._sizes: List[int] = []
+        self.size_bytes = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.dead_letters: List[Dict[str, Any]] = []
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                while True:
+                    start = f.tell()
+                    try:
+                        self.entries.append(pickle.load(f))
+                    except EOFError:
+                        break
+                    except Exception as e:
+                        logger.warning(f"Stopping journal load at corrupt record: {str(e)}")
+                        break
+                    self._sizes.append(f.tell() - start)
+            self.size_bytes = sum(self._sizes)
+            if self.entries:
+                logger.info(f"Loaded {len(self.entries)} pending operations from outage journal")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def ensure_room(self, operation: str):
+        """Reject an outage write up front once the journal is at its cap"""
+        if len(self.entries) >= self.max_entries or self.size_bytes >= self.max_bytes:
+            self.rejected += 1
+            logger.error(
+                f"Outage journal full ({len(self.entries)} entries, {self.size_bytes} bytes), rejecting {operation}"
+            )
+            raise JournalFullError(f"Storage is unavailable and the outage journal is full, cannot {operation}")
+
+    def append(self, operation: str, args: tuple):
+        data = pickle.dumps((operation, args), protocol=pickle.HIGHEST_PROTOCOL)
+        # Written to disk before the write is acknowledged, so a crash cannot lose it
+        if self.path:
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        # Copied because the fallback keeps mutating the stored documents
+        self.entries.append((operation, copy.deepcopy(args)))
+        self._sizes.append(len(data))
+        self.size_bytes += len(data)
+
+    def dead_letter(self, entry: Tuple[str, tuple], error: str):
+        """Set aside an entry the primary will never accept, so it cannot block the ones after it"""
+        operation, args = entry
+        self.dead_letters.append({"operation": operation, "error": error, "at": datetime.utcnow()})
+        logger.error(f"Dead-lettered journaled {operation}: {error}")
+        if self.path:
+            with open(f"{self.path}.dead", "ab") as f:
+                pickle.dump((operation, args, error), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def pop_replayed(self, count: int, dead_lettered: int = 0):
+        """Drop the first ``count`` entries after they reached the primary or were dead-lettered"""
+        self.entries = self.entries[count:]
+        self._sizes = self._sizes[count:]
+        self.size_bytes = sum(self._sizes)
+        self.replayed += count - dead_lettered
+        if self.path:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                for entry in self.entries:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+
+class Repository:
+    """Health-aware router over a primary and an optional fallback backend"""
+
+    def __init__(self, primary: StorageBackend, fallback: Optional[StorageBackend] = None,
+                 journal: Optional[OutageJournal] = None):
+        self.primary = primary
+        self.fallback = fallback
+        self.health = BackendHealth(primary)
+        self.journal = journal if journal is not None else OutageJournal()
+        self.fallback_reads = 0
+        self.fallback_writes = 0
+        self._reconciler: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._replay_lock = asyncio.Lock()
+
+    def _use_primary(self) -> bool:
+        return self.fallback is None or self.health.is_routable()
+
+    async def _read(self, operation: str, *args):
+        if self._use_primary():
+            try:
+                result = await getattr(self.primary, operation)(*args)
+                self.health.record_success()
+            except Exception as e:
+                if self.fallback is None or not self.primary.is_outage_error(e):
+                    raise
+                self._mark_outage(operation, e)
+            else:
+                if not len(self.journal):
+                    return result
+                # Outage writes are still being replayed, so they may only exist in the fallback
+                fallback_result = await getattr(self.fallback, operation)(*args)
+                return self._merge(result, fallback_result)
+
+        self.fallback_reads += 1
+        return await getattr(self.fallback, operation)(*args)
+
+    @staticmethod
+    def _merge(primary_result, fallback_result):
+        if isinstance(primary_result, list) and isinstance(fallback_result, list):
+            seen = {str(item.get("_id")) for item in primary_result}
+            return primary_result + [item for item in fallback_result if str(item.get("_id")) not in seen]
+        if isinstance(primary_result, int) and isinstance(fallback_result, int):
+            return max(primary_result, fallback_result)
+        return primary_result if primary_result else fallback_result
+
+    async def _primary_writable(self) -> bool:
+        """Whether a write may go to the primary: routable, with no journaled outage write still ahead of it"""
+        if not self._use_primary():
+            return False
+        if self.fallback is None or not len(self.journal):
+            return True
+        # A write may depend on an outage write (e.g. an answer to a session created during the outage)
+        await self.replay_journal()
+        return not len(self.journal) and self._use_primary()
+
+    async def _write(self, operation: str, *args):
+        if await self._primary_writable():
+            try:
+                result = await getattr(self.primary, operation)(*args)
+                self.health.record_success()
+                return result
+            except DuplicateKeyError:
+                raise
+            except Exception as e:
+                if self.fallback is None or not self.primary.is_outage_error(e):
+                    raise
+                self._mark_outage(operation, e)
+
+        self.journal.ensure_room(operation)
+        self.fallback_writes += 1
+        result = await getattr(self.fallback, operation)(*args)
+        if operation.startswith("create_"):
+            # Journal the stored document so replay keeps the id the client already saw
+            self.journal.append(operation, (result,))
+        elif result or operation in IDEMPOTENT_OPERATIONS:
+            # A rejected write was reported as failed, so it must not reach the primary later;
+            # deletes and revocations still replay, as their target may exist only in the primary
+            self.journal.append(operation, args)
+        return result
+
+    def _mark_outage(self, operation: str, error: Exception):
+        self.health.record_failure(error)
+        logger.error(
+            f"{self.primary.name} failed during {operation}: {str(error)} - "
+            f"routing to {self.fallback.name} for {self.health.retry_seconds}s"
+        )
+
+    # Reconciliation
+    async def replay_journal(self) -> int:
+        """Replay journaled outage writes into the primary, oldest first"""
+        async with self._replay_lock:
+            if not len(self.journal) or not self.primary.is_available():
+                return 0
+            processed = dead_lettered = 0
+            for entry in list(self.journal.entries):
+                operation, args = entry
+                try:
+                    try:
+                        result = await getattr(self.primary, operation)(*args)
+                    except DuplicateKeyError:
+                        # Fine when it is this very document (a retried replay after a crash), but not
+                        # when another one holds the unique key, e.g. a user signed up twice
+                        if not await self._already_replayed(operation, args[0]):
+                            raise
+                        result = None
+                    if result is False and operation not in IDEMPOTENT_OPERATIONS:
+                        raise LookupError("the primary matched no document")
+                except Exception as e:
+                    if self.primary.is_outage_error(e):
+                        logger.warning(f"Journal replay stopped at {operation}: {str(e)}")
+                        self.health.record_failure(e)
+                        break
+                    self.journal.dead_letter(entry, f"{type(e).__name__}: {str(e)}")
+                    dead_lettered += 1
+                processed += 1
+            if processed:
+                self.journal.pop_replayed(processed, dead_lettered)
+                logger.info(
+                    f"Replayed {processed - dead_lettered} journaled operations into {self.primary.name} "
+                    f"({dead_lettered} dead-lettered), {len(self.journal)} pending"
+                )
+            return processed - dead_lettered
+
+    async def _already_replayed(self, operation: str, document: Dict[str, Any]) -> bool:
+        """Whether a duplicate key on replay is this very document (a replay retried after a crash)"""
+        if operation == "create_user":
+            existing = await self.primary.find_user_by_id(str(document["_id"]))
+        elif operation == "create_session":
+            existing = await self.primary.find_session(document.get("session_id"), document.get("user_id"))
+        elif operation == "create_recording":
+            existing = await self.primary.find_recording(document.get("recording_id"))
+        elif operation == "create_refresh_token":
+            existing = await self.primary.find_refresh_token(document.get("token_hash"))
+        else:
+            return False
+        return existing is not None and str(existing.get("_id")) == str(document.get("_id"))
+
+    def notify_primary_available(self):
+        """Called when the primary reconnects so routing and replay resume immediately"""
+        self.health.reset()
+        self._wake.set()
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=REPOSITORY_RECONCILE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.replay_journal()
+            except Exception as e:
+                logger.error(f"Journal reconciler error: {str(e)}")
+
+    def start(self):
+        """Start the background reconciler"""
+        if self.fallback is not None and self._reconciler is None:
+            self.primary.add_availability_listener(self.notify_primary_available)
+            self._reconciler = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            try:
+                await self._reconciler
+            except asyncio.CancelledError:
+                pass
+            self._reconciler = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary": self.health.stats(),
+            "fallback": self.fallback.stats() if self.fallback else None,
+            "journal_pending": len(self.journal),
+            "journal_bytes": self.journal.size_bytes,
+            "journal_rejected": self.journal.rejected,
+            "journal_replayed": self.journal.replayed,
+            "journal_dead_letters": len(self.journal.dead_letters),
+            "fallback_reads": self.fallback_reads,
+            "fallback_writes": self.fallback_writes
+        }
+
+    # User operations
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write("create_user", user_data)
+
+    async def create_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if await self._primary_writable():
+            try:
+                result = await self.primary.create_users(users_data)
+                self.health.record_success()
+                return result
+            except Exception as e:
+                if self.fallback is None or not self.primary.is_outage_error(e):
+                    raise
+                self._mark_outage("create_users", e)
+
+        # Journaled per user so replay can skip the ones that already reached the primary
+        self.journal.ensure_room("create_users")
+        self.fallback_writes += 1
+        result = await self.fallback.create_users(users_data)
+        for user in result["inserted"]:
+            self.journal.append("create_user", (user,))
+        return result
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_user_by_email", email)
+
+    async def find_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_user_by_username", username)
+
+    async def find_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_user_by_id", user_id)
+
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        return await self._write("update_user", user_id, update_data)
+
+    # Session operations
+    async def create_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write("create_session", session_data)
+
+    async def find_session(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_session", session_id, user_id)
+
+    async def find_sessions_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self._read("find_sessions_by_user", user_id)
+
+    async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict[str, Any]) -> bool:
+        return await self._write("add_answer", session_id, user_id, answer, feedback)
+
+    async def find_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        return await self._read("find_session_version", session_id, user_id)
+
+    async def find_sessions_version(self, user_id: str) -> Dict[str, Any]:
+        return await self._read("find_sessions_version", user_id)
+
+    async def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return await self._read("find_sessions_updated_since", user_id, since)
+
+    async def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return await self._read("find_session_tombstones", user_id, since)
+
+    async def update_session(self, session_id: str, user_id: str, update_data: Dict[str, Any]) -> bool:
+        return await self._write("update_session", session_id, user_id, update_data)
+
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        return await self._write("delete_session", session_id, user_id)
+
+    # Recording operations
+    async def create_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write("create_recording", recording_data)
+
+    async def find_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_recording", recording_id)
+
+    async def find_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        return await self._read("find_recordings_by_session", session_id)
+
+    async def count_recordings_by_session(self, session_id: str) -> int:
+        return await self._read("count_recordings_by_session", session_id)
+
+    async def delete_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        return await self._write("delete_recordings_by_session", session_id)
+
+    # Refresh token operations
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write("create_refresh_token", token_data)
+
+    async def find_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_refresh_token", token_hash)
+
+    async def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        return await self._write("revoke_refresh_token", token_hash, replaced_by)
+
+    async def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        return await self._write("revoke_refresh_tokens_by_user", user_id)
+
+    # Parsed resume operations
+    async def save_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write("save_parsed_resume", resume_data)
+
+    async def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        return await self._read("find_parsed_resume", user_id, digest)
+
+def _create_repository() -> Repository:
+    primary = get_backend(STORAGE_BACKEND)
+    fallback = get_backend("memory") if STORAGE_BACKEND == "mongo" else None
+    return Repository(primary, fallback)
+
+repository = _create_repository()
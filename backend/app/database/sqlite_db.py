@@ -0,0 +1,509 @@
+"""
+SQLite storage backend for single-node deployments and benchmark rigs.
+
+Documents are kept as JSON columns next to the indexed fields the services
+query on. The database runs in WAL mode and every call is dispatched to a
+small thread pool, each thread holding its own connection, so the event loop
+never blocks on disk I/O.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decouple import config
+from bson import ObjectId
+from .storage import StorageBackend, DuplicateKeyError, tombstone_horizon
+import asyncio
+import sqlite3
+import threading
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SQLite configuration
+SQLITE_PATH = config("SQLITE_PATH", default="interviewpilot.db")
+SQLITE_WORKERS = int(config("SQLITE_WORKERS", default="4"))
+SQLITE_BUSY_TIMEOUT_MS = int(config("SQLITE_BUSY_TIMEOUT_MS", default="5000"))
+
+# Document fields stored as ISO strings and converted back on read
+DATETIME_FIELDS = ("created_at", "updated_at", "expires_at", "revoked_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    username TEXT NOT NULL UNIQUE,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interview_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_updated ON interview_sessions (user_id, updated_at);
+CREATE TABLE IF NOT EXISTS session_tombstones (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    deleted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted ON session_tombstones (user_id, deleted_at);
+CREATE TABLE IF NOT EXISTS interview_recordings (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    question_index INTEGER NOT NULL,
+    audio_data TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_session ON interview_recordings (session_id, question_index);
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token_hash TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    revoked_at TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens (user_id, revoked_at);
+CREATE TABLE IF NOT EXISTS parsed_resumes (
+    user_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (user_id, digest)
+);
+"""
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=_json_default)
+
+def _loads(raw: str) -> Dict[str, Any]:
+    document = json.loads(raw)
+    for field in DATETIME_FIELDS:
+        if isinstance(document.get(field), str):
+            try:
+                document[field] = datetime.fromisoformat(document[field])
+            except ValueError:
+                pass
+    return document
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+class SQLiteStorageBackend(StorageBackend):
+    """SQLite implementation of the storage backend"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH, workers: int = SQLITE_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, created on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False  # Only close() touches it from another thread
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    async def _run(self, fn: Callable, *args):
+        if self._executor is None:
+            await self.connect()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def connect(self) -> None:
+        if self._executor is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sqlite")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self._connection().executescript(SCHEMA))
+        logger.info(f"SQLite storage ready at {self.path} (WAL, {self.workers} workers)")
+        print(f"DEBUG: SQLite storage ready at {self.path}")
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def is_available(self) -> bool:
+        return True
+
+    # Synchronous helpers, always run on the executor
+    def _fetch_one(self, sql: str, params: tuple) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(sql, params).fetchone()
+        return _loads(row[0]) if row else None
+
+    def _fetch_all(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        return [_loads(row[0]) for row in self._connection().execute(sql, params).fetchall()]
+
+    def _fetch_row(self, sql: str, params: tuple) -> Optional[tuple]:
+        return self._connection().execute(sql, params).fetchone()
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        return self._connection().execute(sql, params).rowcount
+
+    # User operations
+    def _insert_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        user = {"_id": str(ObjectId()), **user_data}
+        user["_id"] = str(user["_id"])
+        try:
+            self._connection().execute(
+                "INSERT INTO users (id, email, username, doc) VALUES (?, ?, ?, ?)",
+                (user["_id"], user["email"], user["username"], _dumps(user))
+            )
+        except sqlite3.IntegrityError as e:
+            message = str(e)
+            raise DuplicateKeyError("email" if "email" in message else "username" if "username" in message else "_id")
+        return user
+
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self._insert_user, user_data)
+
+    def _insert_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        conn = self._connection()
+        inserted, errors = [], []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A failed INSERT only rolls back that statement, so one transaction covers the batch
+            for index, user_data in enumerate(users_data):
+                try:
+                    inserted.append(self._insert_user(user_data))
+                except DuplicateKeyError as e:
+                    errors.append({"index": index, "field": e.field, "error": str(e)})
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {"inserted": inserted, "errors": errors}
+
+    async def create_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._run(self._insert_users, users_data)
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._fetch_one, "SELECT doc FROM users WHERE email = ?", (email,))
+
+    async def find_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._fetch_one, "SELECT doc FROM users WHERE username = ?", (username,))
+
+    async def find_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._fetch_one, "SELECT doc FROM users WHERE id = ?", (str(user_id),))
+
+    def _update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT doc FROM users WHERE id = ?", (user_id,)).fetchone()
+            if not row:
+                conn.execute("ROLLBACK")
+                return False
+            user = {**_loads(row[0]), **update_data, "updated_at": datetime.utcnow()}
+            conn.execute(
+                "UPDATE users SET email = ?, username = ?, doc = ? WHERE id = ?",
+                (user["email"], user["username"], _dumps(user), user_id)
+            )
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK")
+            raise DuplicateKeyError("email" if "email" in str(e) else "username")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        return await self._run(self._update_user, str(user_id), update_data)
+
+    # Session operations
+    def _insert_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        session_id = session_data.get("_id") or session_data["session_id"]
+        session = {**session_data, "_id": session_id}
+        created_at = session.get("created_at") or datetime.utcnow()
+        updated_at = session.get("updated_at") or created_at
+        try:
+            self._connection().execute(
+                "INSERT INTO interview_sessions (id, user_id, created_at, updated_at, doc) VALUES (?, ?, ?, ?, ?)",
+                (session_id, session["user_id"], _json_default(created_at), _json_default(updated_at), _dumps(session))
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError("_id")
+        return session
+
+    async def create_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self._insert_session, session_data)
+
+    async def find_session(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(
+            self._fetch_one,
+            "SELECT doc FROM interview_sessions WHERE id = ? AND user_id = ?",
+            (session_id, user_id)
+        )
+
+    async def find_sessions_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self._run(
+            self._fetch_all,
+            "SELECT doc FROM interview_sessions WHERE user_id = ? ORDER BY created_at",
+            (user_id,)
+        )
+
+    async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict[str, Any]) -> bool:
+        now = _now()
+        # Appends happen inside SQLite's JSON functions, so concurrent answers cannot lose updates
+        changed = await self._run(
+            self._execute,
+            """
+            UPDATE interview_sessions
+            SET doc = json_set(
+                    json_insert(json_insert(doc, '$.answers[#]', ?), '$.feedback[#]', json(?)),
+                    '$.updated_at', ?
+                ),
+                updated_at = ?
+            WHERE id = ? AND user_id = ?
+            """,
+            (answer, _dumps(feedback), now, now, session_id, user_id)
+        )
+        return changed > 0
+
+    async def update_session(self, session_id: str, user_id: str, update_data: Dict[str, Any]) -> bool:
+        now = _now()
+        changed = await self._run(
+            self._execute,
+            """
+            UPDATE interview_sessions
+            SET doc = json_set(json_patch(doc, json(?)), '$.updated_at', ?), updated_at = ?
+            WHERE id = ? AND user_id = ?
+            """,
+            (_dumps(update_data), now, now, session_id, user_id)
+        )
+        return changed > 0
+
+    def _delete_session(self, session_id: str, user_id: str) -> bool:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            changed = conn.execute(
+                "DELETE FROM interview_sessions WHERE id = ? AND user_id = ?", (session_id, user_id)
+            ).rowcount
+            if changed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO session_tombstones (session_id, user_id, deleted_at) VALUES (?, ?, ?)",
+                    (session_id, user_id, _now())
+                )
+                conn.execute(
+                    "DELETE FROM session_tombstones WHERE user_id = ? AND deleted_at < ?",
+                    (user_id, tombstone_horizon().isoformat())
+                )
+            conn.execute("COMMIT")
+            return changed > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        return await self._run(self._delete_session, session_id, user_id)
+
+    async def find_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        row = await self._run(
+            self._fetch_row,
+            "SELECT updated_at FROM interview_sessions WHERE id = ? AND user_id = ?",
+            (session_id, user_id)
+        )
+        return datetime.fromisoformat(row[0]) if row else None
+
+    async def find_sessions_version(self, user_id: str) -> Dict[str, Any]:
+        # Answered from idx_sessions_user_updated alone
+        count, updated_at = await self._run(
+            self._fetch_row,
+            "SELECT COUNT(*), MAX(updated_at) FROM interview_sessions WHERE user_id = ?",
+            (user_id,)
+        )
+        return {"count": count, "updated_at": datetime.fromisoformat(updated_at) if updated_at else None}
+
+    async def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return await self._run(
+            self._fetch_all,
+            "SELECT doc FROM interview_sessions WHERE user_id = ? AND updated_at > ? ORDER BY updated_at",
+            (user_id, since.isoformat())
+        )
+
+    def _fetch_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT session_id, deleted_at FROM session_tombstones WHERE user_id = ? AND deleted_at > ? ORDER BY deleted_at",
+            (user_id, since.isoformat())
+        ).fetchall()
+        return [
+            {"_id": session_id, "session_id": session_id, "user_id": user_id, "deleted_at": datetime.fromisoformat(deleted_at)}
+            for session_id, deleted_at in rows
+        ]
+
+    async def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        return await self._run(self._fetch_tombstones, user_id, since)
+
+    # Recording operations
+    def _insert_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        recording_id = recording_data.get("recording_id") or recording_data["_id"]
+        metadata = {k: v for k, v in recording_data.items() if k != "audio_data"}
+        metadata["recording_id"] = recording_id
+        try:
+            self._connection().execute(
+                "INSERT INTO interview_recordings (id, session_id, question_index, audio_data, doc) VALUES (?, ?, ?, ?, ?)",
+                (recording_id, metadata["session_id"], metadata.get("question_index", 0),
+                 recording_data.get("audio_data"), _dumps(metadata))
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError("_id")
+        return recording_data
+
+    async def create_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self._insert_recording, recording_data)
+
+    def _select_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT doc, audio_data FROM interview_recordings WHERE id = ?", (recording_id,)
+        ).fetchone()
+        if not row:
+            return None
+        recording = _loads(row[0])
+        recording["audio_data"] = row[1]
+        recording["_id"] = recording_id
+        return recording
+
+    async def find_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._select_recording, recording_id)
+
+    async def find_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        # The audio column is not read at all for list responses
+        recordings = await self._run(
+            self._fetch_all,
+            "SELECT doc FROM interview_recordings WHERE session_id = ? ORDER BY question_index",
+            (session_id,)
+        )
+        for recording in recordings:
+            recording["_id"] = recording["recording_id"]
+        return recordings
+
+    def _count(self, sql: str, params: tuple) -> int:
+        return self._connection().execute(sql, params).fetchone()[0]
+
+    async def count_recordings_by_session(self, session_id: str) -> int:
+        return await self._run(
+            self._count, "SELECT COUNT(*) FROM interview_recordings WHERE session_id = ?", (session_id,)
+        )
+
+    def _delete_recordings(self, session_id: str) -> List[Dict[str, Any]]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = [_loads(row[0]) for row in conn.execute(
+                "SELECT doc FROM interview_recordings WHERE session_id = ?", (session_id,)
+            ).fetchall()]
+            conn.execute("DELETE FROM interview_recordings WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+            return deleted
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def delete_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        return await self._run(self._delete_recordings, session_id)
+
+    # Refresh token operations
+    def _insert_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        token = {"_id": token_data["token_hash"], **token_data}
+        try:
+            self._connection().execute(
+                "INSERT INTO refresh_tokens (token_hash, user_id, expires_at, revoked_at, doc) VALUES (?, ?, ?, NULL, ?)",
+                (token["token_hash"], token["user_id"], _json_default(token["expires_at"]), _dumps(token))
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError("token_hash")
+        return token
+
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self._insert_refresh_token, token_data)
+
+    async def find_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._fetch_one, "SELECT doc FROM refresh_tokens WHERE token_hash = ?", (token_hash,))
+
+    async def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        now = _now()
+        changed = await self._run(
+            self._execute,
+            """
+            UPDATE refresh_tokens
+            SET revoked_at = ?, doc = json_set(doc, '$.revoked_at', ?, '$.replaced_by', ?)
+            WHERE token_hash = ? AND revoked_at IS NULL
+            """,
+            (now, now, replaced_by, token_hash)
+        )
+        return changed > 0
+
+    async def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        now = _now()
+        return await self._run(
+            self._execute,
+            """
+            UPDATE refresh_tokens
+            SET revoked_at = ?, doc = json_set(doc, '$.revoked_at', ?)
+            WHERE user_id = ? AND revoked_at IS NULL
+            """,
+            (now, now, str(user_id))
+        )
+
+    # Parsed resume operations
+    def _upsert_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        resume = {"_id": f"{resume_data['user_id']}:{resume_data['digest']}", **resume_data}
+        self._connection().execute(
+            "INSERT OR REPLACE INTO parsed_resumes (user_id, digest, doc) VALUES (?, ?, ?)",
+            (str(resume["user_id"]), resume["digest"], _dumps(resume))
+        )
+        return resume
+
+    async def save_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self._upsert_parsed_resume, resume_data)
+
+    async def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        return await self._run(
+            self._fetch_one, "SELECT doc FROM parsed_resumes WHERE user_id = ? AND digest = ?", (str(user_id), digest)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "path": self.path,
+            "workers": self.workers,
+            "connections": len(self._connections)
+        }
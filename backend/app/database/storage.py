@@ -0,0 +1,207 @@
+"""
+Storage backend interface shared by the MongoDB, SQLite and in-memory stores.
+
+Services reach the backends through ``repository.repository``, and the
+primary backend is selected with the STORAGE_BACKEND setting:
+
+- ``mongo`` (default): MongoDB, falling back to the in-memory store while
+  MongoDB is unreachable
+- ``sqlite``: durable local storage for single-node deployments
+- ``memory``: volatile in-process storage
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from decouple import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = config("STORAGE_BACKEND", default="mongo").strip().lower()
+# Deleted sessions are remembered this long for delta sync; older cursors get a full resync
+SESSION_TOMBSTONE_RETENTION_DAYS = float(config("SESSION_TOMBSTONE_RETENTION_DAYS", default="30"))
+
+def tombstone_horizon() -> datetime:
+    """Deletions before this instant may have been forgotten"""
+    return datetime.utcnow() - timedelta(days=SESSION_TOMBSTONE_RETENTION_DAYS)
+
+class DuplicateKeyError(Exception):
+    """Raised when an insert violates a unique index"""
+
+    def __init__(self, field: str):
+        super().__init__(f"Duplicate value for unique field '{field}'")
+        self.field = field
+
+class StorageBackend(ABC):
+    """Async persistence operations used by the services"""
+
+    name = "base"
+
+    async def connect(self) -> None:
+        """Open connections and create indexes"""
+
+    async def close(self) -> None:
+        """Release connections"""
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Whether the backend can currently serve requests"""
+
+    def is_outage_error(self, error: Exception) -> bool:
+        """Whether an error means the backend is unreachable rather than the request being bad"""
+        return False
+
+    def add_availability_listener(self, listener: Callable[[], Any]) -> None:
+        """Register a callback run when the backend becomes reachable again"""
+
+    async def warm_up(self, connections: int) -> None:
+        """Open connections ahead of the first request"""
+
+    # User operations
+    @abstractmethod
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a user and return it with its ``_id``"""
+
+    @abstractmethod
+    async def create_users(self, users_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insert users without stopping at duplicates
+
+        Returns ``{"inserted": [user, ...], "errors": [{"index", "field", "error"}, ...]}``
+        where ``index`` refers to ``users_data``.
+        """
+
+    @abstractmethod
+    async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def find_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def find_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        pass
+
+    # Session operations
+    @abstractmethod
+    async def create_session(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def find_session(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def find_sessions_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: Dict[str, Any]) -> bool:
+        """Append an answer and its feedback to a session"""
+
+    @abstractmethod
+    async def update_session(self, session_id: str, user_id: str, update_data: Dict[str, Any]) -> bool:
+        """Set fields on a session"""
+
+    @abstractmethod
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        """Delete a session and leave a tombstone for delta sync"""
+
+    @abstractmethod
+    async def find_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        """A session's updated_at without loading the document"""
+
+    @abstractmethod
+    async def find_sessions_version(self, user_id: str) -> Dict[str, Any]:
+        """Count and latest updated_at of a user's sessions (an index-only lookup)"""
+
+    @abstractmethod
+    async def find_sessions_updated_since(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        """A user's sessions with updated_at after ``since``, oldest change first"""
+
+    @abstractmethod
+    async def find_session_tombstones(self, user_id: str, since: datetime) -> List[Dict[str, Any]]:
+        """Sessions a user deleted after ``since`` as ``{"_id", "session_id", "user_id", "deleted_at"}``"""
+
+    # Recording operations
+    @abstractmethod
+    async def create_recording(self, recording_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def find_recording(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        """Get a recording including audio data, with ``_id`` and ``recording_id`` set"""
+
+    @abstractmethod
+    async def find_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """List a session's recordings without audio data, ordered by question_index"""
+
+    @abstractmethod
+    async def count_recordings_by_session(self, session_id: str) -> int:
+        pass
+
+    @abstractmethod
+    async def delete_recordings_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """Delete a session's recordings and return their metadata for blob cleanup"""
+
+    # Refresh token operations (tokens are stored by their SHA-256 hash)
+    @abstractmethod
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def find_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        """Revoke a token unless already revoked; True only for the call that revoked it"""
+
+    @abstractmethod
+    async def revoke_refresh_tokens_by_user(self, user_id: str) -> int:
+        """Revoke every active refresh token of a user"""
+
+    # Parsed resume operations (one document per user and content digest)
+    @abstractmethod
+    async def save_parsed_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace the parsed resume of a user for a content digest"""
+
+    @abstractmethod
+    async def find_parsed_resume(self, user_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend specific statistics"""
+        return {"backend": self.name, "available": self.is_available()}
+
+_backends: Dict[str, StorageBackend] = {}
+
+def get_backend(name: str) -> StorageBackend:
+    """Get (and lazily create) a backend by name"""
+    if name not in _backends:
+        if name == "mongo":
+            from .mongo_backend import MongoStorageBackend
+            _backends[name] = MongoStorageBackend()
+        elif name == "sqlite":
+            from .sqlite_db import SQLiteStorageBackend
+            _backends[name] = SQLiteStorageBackend()
+        elif name == "memory":
+            from .memory_backend import MemoryStorageBackend
+            _backends[name] = MemoryStorageBackend()
+        else:
+            raise ValueError(f"Unknown storage backend: {name}")
+    return _backends[name]
+
+async def connect_storage() -> None:
+    """Connect the configured storage backend"""
+    logger.info(f"Using '{STORAGE_BACKEND}' storage backend")
+    await get_backend(STORAGE_BACKEND).connect()
+
+async def close_storage() -> None:
+    """Close every backend that was created"""
+    for backend in _backends.values():
+        await backend.close()
@@ -61,7 +61,8 @@ class InterviewSession(BaseModel):
     interviewer_type: InterviewerType
     difficulty: DifficultyLevel
     job_description: str
-    resume_text: str
+    resume_text: str = ""  # Empty when the session references a cached resume
+    resume_id: Optional[str] = None
     questions: List[str] = []
     answers: List[str] = []
     feedback: List[Dict[str, Any]] = []
@@ -105,9 +106,11 @@ class ResumeData(BaseModel):
     email: Optional[str] = None
     phone: Optional[str] = None
     skills: List[str] = []
+    skill_counts: Dict[str, int] = {}
     experience: List[Dict[str, Any]] = []
     education: List[Dict[str, Any]] = []
     raw_text: str
+    resume_id: Optional[str] = None  # SHA-256 of the uploaded content
 
 class JobDescription(BaseModel):
     title: str
@@ -122,7 +125,8 @@ class InterviewRecording(BaseModel):
     user_id: str  # Use string instead of PyObjectId for consistency
     session_id: str  # Keep as string since we use UUIDs for session IDs
     question_index: int
-    audio_data: str  # Base64 encoded audio
+    audio_data: Optional[str] = None  # Base64 encoded audio (legacy JSON uploads)
+    storage: str = "inline"  # "inline", "gridfs" or "local" for streamed uploads
     duration: float  # Duration in seconds
     transcript: Optional[str] = None
     file_size: int
@@ -143,3 +147,11 @@ class SaveRecordingRequest(BaseModel):
     transcript: Optional[str] = None
     file_size: int
     mime_type: str = "audio/webm"
+
+class CreateRecordingUploadRequest(BaseModel):
+    session_id: str
+    question_index: int
+    duration: float
+    transcript: Optional[str] = None
+    total_size: Optional[int] = None  # Expected byte size, enforced when given
+    mime_type: str = "audio/webm"
@@ -59,6 +59,9 @@ class UserCreate(BaseModel):
     full_name: str
     password: str
 
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate]
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -75,6 +78,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[str] = None
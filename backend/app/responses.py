@@ -0,0 +1,97 @@
+"""
+Fast JSON responses.
+
+``FastJSONResponse`` renders with orjson when it is installed and with the
+standard library otherwise. With FAST_JSON_RESPONSES on (the default) it is
+the application's default response class, so every route encodes faster.
+Values returned from a route still go through FastAPI's ``jsonable_encoder``
+first, which dominates for large nested payloads. Routes that build their
+payload from data the server already trusts (stored sessions, summaries,
+recordings) return ``trusted_json(payload)`` instead, which hands the dict
+straight to the encoder and skips that pass and any response-model validation.
+
+Conditional GETs: routes derive a weak ETag from a version (``updated_at``,
+a session count) they can look up without loading the resource, and answer
+a matching ``If-None-Match`` with ``not_modified`` before building the body.
+"""
+from typing import Any, Dict, Optional
+from datetime import date, datetime, time
+from enum import Enum
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from decouple import config
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used instead
+    orjson = None
+
+FAST_JSON_RESPONSES = config("FAST_JSON_RESPONSES", default=True, cast=bool)
+
+# Per-user data may be stored by the browser but must be revalidated on every use
+PRIVATE_REVALIDATE = "private, no-cache"
+
+# Part of every ETag; bump when a response format changes so cached copies are refetched
+ETAG_FORMAT_VERSION = 1
+
+def _default(obj: Any) -> Any:
+    """Encode the values jsonable_encoder would otherwise have converted"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", "replace")
+    return str(obj)  # ObjectId, Decimal, UUID, paths
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (the standard library when orjson is not installed)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def trusted_json(content: Any, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Respond with server-built data as is, skipping jsonable_encoder and validation"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the values that identify a representation's version"""
+    key = "|".join(str(part) for part in (ETAG_FORMAT_VERSION, *parts))
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+default_response_class = FastJSONResponse if FAST_JSON_RESPONSES else JSONResponse
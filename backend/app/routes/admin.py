@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Header, status, Depends
+from typing import Optional
+from decouple import config
+from ..models.user_models import BulkUserCreate
+from ..services.auth_service import auth_service
+import secrets
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Admin configuration (empty disables the admin endpoints)
+ADMIN_API_KEY = config("ADMIN_API_KEY", default="")
+ADMIN_BULK_MAX_USERS = int(config("ADMIN_BULK_MAX_USERS", default="2000"))
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Check the X-Admin-Key header against ADMIN_API_KEY"""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
+
+@router.post("/users/bulk", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_admin)])
+async def bulk_create_users(request: BulkUserCreate):
+    """Provision many users at once, e.g. a whole cohort, as a background job"""
+    if not request.users:
+        raise HTTPException(status_code=400, detail="No users provided")
+    if len(request.users) > ADMIN_BULK_MAX_USERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {ADMIN_BULK_MAX_USERS} users per request"
+        )
+    
+    job = auth_service.start_bulk_create_users(request.users)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "requested": job["requested"]
+    }
+
+@router.get("/users/bulk/{job_id}", dependencies=[Depends(require_admin)])
+async def get_bulk_create_job(job_id: str):
+    """Progress and per-user failures of a bulk provisioning job"""
+    job = auth_service.get_bulk_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk provisioning job not found")
+    return job
+
+@router.post("/users/{user_id}/deactivate", dependencies=[Depends(require_admin)])
+async def deactivate_user(user_id: str):
+    """Deactivate a user and revoke their refresh tokens"""
+    try:
+        updated = await auth_service.deactivate_user(user_id)
+    except Exception as e:
+        logger.error(f"Error deactivating user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during deactivation"
+        )
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"user_id": user_id, "is_active": False}
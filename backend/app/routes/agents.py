@@ -1,109 +1,120 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from ..agents.interviewer_agents import InterviewerFactory
-from ..services.gemini_service import GeminiService
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Any, Dict, List
+from ..services.container import services
+from ..responses import trusted_json, dumps, make_etag, etag_matches, not_modified
 from ..models.interview_models import InterviewerType, DifficultyLevel
+from decouple import config
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize Gemini service
-try:
-    gemini_service = GeminiService()
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini service: {str(e)}")
-    gemini_service = None
+AGENT_METADATA_MAX_AGE = int(config("AGENT_METADATA_MAX_AGE", default="3600"))
+
+# Static metadata: served with a content ETag and cached by browsers for AGENT_METADATA_MAX_AGE
+INTERVIEWER_TYPES = {
+    "interviewer_types": [
+        {
+            "type": "hr",
+            "name": "HR Interviewer",
+            "description": "Focuses on cultural fit, communication skills, and soft skills",
+            "focus_areas": [
+                "Cultural fit and values alignment",
+                "Communication and interpersonal skills", 
+                "Career goals and motivation",
+                "Work-life balance and team dynamics",
+                "Company culture adaptation"
+            ]
+        },
+        {
+            "type": "tech_lead", 
+            "name": "Technical Lead",
+            "description": "Focuses on technical expertise, problem-solving, and system design",
+            "focus_areas": [
+                "Technical expertise and depth",
+                "Problem-solving methodology",
+                "System design and architecture",
+                "Code quality and best practices",
+                "Technology stack proficiency"
+            ]
+        },
+        {
+            "type": "behavioral",
+            "name": "Behavioral Interviewer", 
+            "description": "Focuses on past experiences and situational responses using STAR method",
+            "focus_areas": [
+                "Leadership and influence",
+                "Conflict resolution and teamwork",
+                "Adaptability and learning agility",
+                "Decision-making under pressure",
+                "Achievement orientation and results"
+            ]
+        }
+    ]
+}
+
+DIFFICULTY_LEVELS = {
+    "difficulty_levels": [
+        {
+            "level": "easy",
+            "name": "Easy",
+            "description": "Basic questions suitable for entry-level positions and straightforward scenarios",
+            "characteristics": [
+                "Fundamental concepts and practices",
+                "Simple behavioral scenarios",
+                "Clear yes/no situations",
+                "Basic technical knowledge"
+            ]
+        },
+        {
+            "level": "medium",
+            "name": "Medium", 
+            "description": "Moderate complexity questions for mid-level positions with situational judgment",
+            "characteristics": [
+                "Intermediate technical concepts",
+                "Multi-step problem solving",
+                "Team dynamics scenarios",
+                "Trade-off discussions"
+            ]
+        },
+        {
+            "level": "hard",
+            "name": "Hard",
+            "description": "Complex questions for senior positions requiring strategic thinking and leadership",
+            "characteristics": [
+                "Advanced system architecture",
+                "High-stakes leadership situations",
+                "Complex stakeholder management",
+                "Strategic decision making"
+            ]
+        }
+    ]
+}
+
+INTERVIEWER_TYPES_ETAG = make_etag("interviewer_types", dumps(INTERVIEWER_TYPES).decode("utf-8"))
+DIFFICULTY_LEVELS_ETAG = make_etag("difficulty_levels", dumps(DIFFICULTY_LEVELS).decode("utf-8"))
+
+def _metadata_response(request: Request, content: Dict[str, Any], etag: str) -> Response:
+    cache_control = f"public, max-age={AGENT_METADATA_MAX_AGE}"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+    return trusted_json(content, headers={"ETag": etag, "Cache-Control": cache_control})
 
 @router.get("/types")
-async def get_interviewer_types():
+async def get_interviewer_types(request: Request):
     """Get all available interviewer types"""
-    return {
-        "interviewer_types": [
-            {
-                "type": "hr",
-                "name": "HR Interviewer",
-                "description": "Focuses on cultural fit, communication skills, and soft skills",
-                "focus_areas": [
-                    "Cultural fit and values alignment",
-                    "Communication and interpersonal skills", 
-                    "Career goals and motivation",
-                    "Work-life balance and team dynamics",
-                    "Company culture adaptation"
-                ]
-            },
-            {
-                "type": "tech_lead", 
-                "name": "Technical Lead",
-                "description": "Focuses on technical expertise, problem-solving, and system design",
-                "focus_areas": [
-                    "Technical expertise and depth",
-                    "Problem-solving methodology",
-                    "System design and architecture",
-                    "Code quality and best practices",
-                    "Technology stack proficiency"
-                ]
-            },
-            {
-                "type": "behavioral",
-                "name": "Behavioral Interviewer", 
-                "description": "Focuses on past experiences and situational responses using STAR method",
-                "focus_areas": [
-                    "Leadership and influence",
-                    "Conflict resolution and teamwork",
-                    "Adaptability and learning agility",
-                    "Decision-making under pressure",
-                    "Achievement orientation and results"
-                ]
-            }        ]
-    }
+    return _metadata_response(request, INTERVIEWER_TYPES, INTERVIEWER_TYPES_ETAG)
 
 @router.get("/difficulty-levels")
-async def get_difficulty_levels():
+async def get_difficulty_levels(request: Request):
     """Get all available difficulty levels"""
-    return {
-        "difficulty_levels": [
-            {
-                "level": "easy",
-                "name": "Easy",
-                "description": "Basic questions suitable for entry-level positions and straightforward scenarios",
-                "characteristics": [
-                    "Fundamental concepts and practices",
-                    "Simple behavioral scenarios",
-                    "Clear yes/no situations",
-                    "Basic technical knowledge"
-                ]
-            },
-            {
-                "level": "medium",
-                "name": "Medium", 
-                "description": "Moderate complexity questions for mid-level positions with situational judgment",
-                "characteristics": [
-                    "Intermediate technical concepts",
-                    "Multi-step problem solving",
-                    "Team dynamics scenarios",
-                    "Trade-off discussions"
-                ]
-            },
-            {
-                "level": "hard",
-                "name": "Hard",
-                "description": "Complex questions for senior positions requiring strategic thinking and leadership",
-                "characteristics": [
-                    "Advanced system architecture",
-                    "High-stakes leadership situations",
-                    "Complex stakeholder management",
-                    "Strategic decision making"
-                ]
-            }
-        ]
-    }
+    return _metadata_response(request, DIFFICULTY_LEVELS, DIFFICULTY_LEVELS_ETAG)
 
 @router.post("/questions")
 async def generate_questions(request: dict):
     """Generate interview questions for a specific interviewer type"""
     
-    if not gemini_service:
+    if not services.gemini:
         raise HTTPException(
             status_code=500,
             detail="Gemini service not available. Please check your API key configuration."
@@ -145,7 +156,7 @@ async def generate_questions(request: dict):
             )
         
         # Create interviewer agent
-        interviewer = InterviewerFactory.create_interviewer(interviewer_enum, gemini_service)
+        interviewer = services.interviewer(interviewer_enum)
         
         # Generate questions
         questions = await interviewer.generate_questions(
@@ -175,7 +186,7 @@ async def generate_questions(request: dict):
 async def evaluate_answer(request: dict):
     """Evaluate an interview answer"""
     
-    if not gemini_service:
+    if not services.gemini:
         raise HTTPException(
             status_code=500,
             detail="Gemini service not available. Please check your API key configuration."
@@ -203,7 +214,7 @@ async def evaluate_answer(request: dict):
             )
         
         # Create interviewer agent
-        interviewer = InterviewerFactory.create_interviewer(interviewer_enum, gemini_service)
+        interviewer = services.interviewer(interviewer_enum)
         
         # Evaluate answer
         evaluation = await interviewer.evaluate_answer(question, answer, job_description)
@@ -227,7 +238,7 @@ async def evaluate_answer(request: dict):
 async def generate_follow_up(request: dict):
     """Generate a follow-up question based on the answer"""
     
-    if not gemini_service:
+    if not services.gemini:
         raise HTTPException(
             status_code=500,
             detail="Gemini service not available. Please check your API key configuration."
@@ -254,7 +265,7 @@ async def generate_follow_up(request: dict):
             )
         
         # Create interviewer agent
-        interviewer = InterviewerFactory.create_interviewer(interviewer_enum, gemini_service)
+        interviewer = services.interviewer(interviewer_enum)
         
         # Generate follow-up question
         follow_up = await interviewer.get_follow_up_question(original_question, answer)
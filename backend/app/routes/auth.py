@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from datetime import timedelta
-from ..models.user_models import UserCreate, UserLogin, Token, UserResponse
-from ..services.auth_service import auth_service, get_current_active_user
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Optional
+from ..models.user_models import UserCreate, UserLogin, Token, UserResponse, RefreshTokenRequest
+from ..services.auth_service import auth_service, get_current_user, get_current_active_user, optional_security
 from ..models.user_models import User
 import logging
 
@@ -20,26 +21,8 @@ async def signup(user_data: UserCreate):
             password=user_data.password
         )
         
-        # Create access token
-        access_token_expires = timedelta(minutes=30)
-        access_token = auth_service.create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
-        )
-        
-        user_response = UserResponse(
-            id=str(user.id),
-            email=user.email,
-            username=user.username,
-            full_name=user.full_name,
-            is_active=user.is_active,
-            created_at=user.created_at
-        )
-        
-        return Token(
-            access_token=access_token,
-            token_type="bearer",
-            user=user_response
-        )
+        # Create access and refresh tokens
+        return await auth_service.create_token_response(user)
         
     except HTTPException:
         raise
@@ -61,25 +44,7 @@ async def login(user_credentials: UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=30)
-    access_token = auth_service.create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
-    )
-    
-    user_response = UserResponse(
-        id=str(user.id),
-        email=user.email,
-        username=user.username,
-        full_name=user.full_name,
-        is_active=user.is_active,
-        created_at=user.created_at
-    )
-    
-    return Token(
-        access_token=access_token,
-        token_type="bearer",
-        user=user_response
-    )
+    return await auth_service.create_token_response(user)
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
@@ -94,24 +59,26 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
     )
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_active_user)):
-    """Refresh access token"""
-    access_token_expires = timedelta(minutes=30)
-    access_token = auth_service.create_access_token(
-        data={"sub": str(current_user.id)}, expires_delta=access_token_expires
-    )
-    
-    user_response = UserResponse(
-        id=str(current_user.id),
-        email=current_user.email,
-        username=current_user.username,
-        full_name=current_user.full_name,
-        is_active=current_user.is_active,
-        created_at=current_user.created_at
-    )
-    
-    return Token(
-        access_token=access_token,
-        token_type="bearer",
-        user=user_response
-    )
+async def refresh_token(
+    refresh_request: Optional[RefreshTokenRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Refresh access token with a refresh token (rotated on use) or a still-valid access token"""
+    if refresh_request is not None:
+        user, new_refresh_token = await auth_service.rotate_refresh_token(refresh_request.refresh_token)
+        return await auth_service.create_token_response(user, refresh_token=new_refresh_token)
+
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    current_user = await get_current_active_user(await get_current_user(credentials))
+    return await auth_service.create_token_response(current_user)
+
+@router.post("/logout")
+async def logout(refresh_request: RefreshTokenRequest):
+    """Revoke a refresh token"""
+    await auth_service.revoke_refresh_token(refresh_request.refresh_token)
+    return {"message": "Logged out"}
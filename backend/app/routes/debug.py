@@ -4,7 +4,10 @@ import os
 from decouple import config
 from ..services.auth_service import get_current_user
 from ..models.user_models import User
-from ..services.interview_service import InterviewService
+from ..services.container import services
+from ..services.warmup import warmup
+from ..compression import compression_stats
+from ..services.live_interview import live_interviews
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -110,11 +113,37 @@ async def debug_mongodb():
             "debug_info": {"error": str(e)}
         }
 
+@router.get("/storage")
+async def debug_storage():
+    """Repository routing state, outage journal and backend statistics"""
+    from ..database.repository import repository
+    return repository.stats()
+
+@router.get("/metrics")
+async def debug_metrics():
+    """Runtime metrics: storage routing, MongoDB connection state and pool usage"""
+    from ..database.repository import repository
+    from ..database.mongo_supervisor import supervisor
+    from ..services.cache import cache_stats
+    from ..services.worker_pool import pool_stats
+    from ..services.resume_cache import resume_cache
+    return {
+        "storage": repository.stats(),
+        "mongodb": supervisor.stats(),
+        "caches": cache_stats(),
+        "resume_cache": resume_cache.stats(),
+        "worker_pools": pool_stats(),
+        "services": services.stats(),
+        "warmup": warmup.stats(),
+        "compression": compression_stats.stats(),
+        "live_interviews": live_interviews.stats()
+    }
+
 @router.get("/test-session-creation")
 async def test_session_creation(current_user: User = Depends(get_current_user)):
     """Test session creation to debug database storage issues"""
     try:
-        interview_service = InterviewService()
+        interview_service = services.interview
         
         # Test session data
         session_data = {
@@ -174,7 +203,7 @@ async def test_session_creation(current_user: User = Depends(get_current_user)):
     """Debug endpoint to test session creation"""
     try:
         from ..database import is_connected, get_database
-        interview_service = InterviewService()
+        interview_service = services.interview
         
         # Check MongoDB connection status
         mongodb_connected = is_connected()
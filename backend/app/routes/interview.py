@@ -1,94 +1,115 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List, Any
-from ..services.gemini_service import GeminiService
-from ..services.interview_service import InterviewService
-from ..services.auth_service import get_current_user
-from ..agents.interviewer_agents import InterviewerFactory
-from ..models.interview_models import InterviewSession, InterviewerType, DifficultyLevel, Answer, Feedback
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Any, Optional, Tuple
+from ..services.container import services
+from ..services.recording_storage import (
+    recording_storage, upload_manager, iter_file_chunks, RECORDING_MAX_BYTES, RECORDING_CHUNK_SIZE,
+    UploadOffsetMismatchError, UploadNotFoundError
+)
+from ..services.upload_spool import UploadTooLargeError, check_content_length, limited_stream
+from ..services.auth_service import get_current_user, authenticate_token
+from ..services.live_interview import LiveInterview, LiveInterviewError, LIVE_INTERVIEW_AUTH_TIMEOUT_SECONDS
+from ..services.resume_cache import resume_cache
+from ..responses import trusted_json, dumps, make_etag, etag_matches, not_modified, PRIVATE_REVALIDATE
+from ..models.interview_models import InterviewSession, InterviewerType, DifficultyLevel, Answer, Feedback, CreateRecordingUploadRequest
 from ..models.user_models import User
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize services
-try:
-    gemini_service = GeminiService()
-    interview_service = InterviewService()
-except Exception as e:
-    logger.error(f"Failed to initialize services: {str(e)}")
-    gemini_service = None
-    interview_service = None
+async def _create_interview_session(request: dict, current_user: User) -> Tuple[InterviewSession, Dict[str, Any]]:
+    """Validate a start request, generate the questions and store the session (HTTP and live channel)"""
+    interviewer_type = request.get('interviewer_type')
+    difficulty = request.get('difficulty', 'medium')  # Default to medium
+    job_description = request.get('job_description', '')
+    resume_text = request.get('resume_text', '')
+    resume_id = request.get('resume_id')
+    num_questions = request.get('num_questions', 5)
+    
+    # A resume_id from /api/resume/upload stands in for the resume text
+    if resume_id:
+        cached_text = await resume_cache.get_text(str(current_user.id), resume_id)
+        if cached_text:
+            resume_text = cached_text
+        elif not resume_text:
+            raise HTTPException(
+                status_code=400,
+                detail="Resume not found, please upload it again"
+            )
+        else:
+            resume_id = None
+    
+    if not all([interviewer_type, job_description, resume_text]):
+        raise HTTPException(
+            status_code=400,
+            detail="interviewer_type, job_description, and resume_text are required"
+        )
+    
+    # Validate interviewer type
+    try:
+        interviewer_enum = InterviewerType(interviewer_type)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid interviewer type. Must be one of: {[t.value for t in InterviewerType]}"
+        )
+    
+    # Validate difficulty level
+    try:
+        difficulty_enum = DifficultyLevel(difficulty)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid difficulty level. Must be one of: {[d.value for d in DifficultyLevel]}"
+        )
+    
+    # Generate session ID
+    session_id = str(uuid.uuid4())
+    
+    # Create interviewer agent and generate questions
+    interviewer = services.interviewer(interviewer_enum)
+    questions = await interviewer.generate_questions(resume_text, job_description, difficulty, num_questions)
+    
+    # Prepare session data
+    session_data = {
+        "interviewer_type": interviewer_enum,
+        "difficulty": difficulty_enum,
+        "job_description": job_description,
+        # Sessions reference a cached resume instead of copying its text
+        "resume_text": "" if resume_id else resume_text,
+        "resume_id": resume_id,
+        "questions": questions
+    }
+    
+    # Store session in database
+    session = await services.interview.create_session(current_user, session_data)
+    
+    return session, {
+        "session_id": session.session_id,
+        "interviewer_type": interviewer_type,
+        "difficulty": difficulty,
+        "questions": questions,
+        "total_questions": len(questions),
+        "current_question": 0
+    }
 
 @router.post("/start")
 async def start_interview(request: dict, current_user: User = Depends(get_current_user)):
     """Start a new interview session"""
     
-    if not gemini_service or not interview_service:
+    if not services.gemini or not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Services not available. Please check configuration."
         )
     try:
-        interviewer_type = request.get('interviewer_type')
-        difficulty = request.get('difficulty', 'medium')  # Default to medium
-        job_description = request.get('job_description', '')
-        resume_text = request.get('resume_text', '')
-        num_questions = request.get('num_questions', 5)
-        
-        if not all([interviewer_type, job_description, resume_text]):
-            raise HTTPException(
-                status_code=400,
-                detail="interviewer_type, job_description, and resume_text are required"
-            )
-        
-        # Validate interviewer type
-        try:
-            interviewer_enum = InterviewerType(interviewer_type)
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid interviewer type. Must be one of: {[t.value for t in InterviewerType]}"
-            )
-        
-        # Validate difficulty level
-        try:
-            difficulty_enum = DifficultyLevel(difficulty)
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid difficulty level. Must be one of: {[d.value for d in DifficultyLevel]}"
-            )
-        
-        # Generate session ID
-        session_id = str(uuid.uuid4())
-          # Create interviewer agent and generate questions
-        interviewer = InterviewerFactory.create_interviewer(interviewer_enum, gemini_service)
-        questions = await interviewer.generate_questions(resume_text, job_description, difficulty, num_questions)
-        
-        # Prepare session data
-        session_data = {
-            "interviewer_type": interviewer_enum,
-            "difficulty": difficulty_enum,
-            "job_description": job_description,
-            "resume_text": resume_text,
-            "questions": questions
-        }
-        
-        # Store session in database
-        session = await interview_service.create_session(current_user, session_data)
-        
-        return {
-            "session_id": session.session_id,
-            "interviewer_type": interviewer_type,
-            "difficulty": difficulty,
-            "questions": questions,
-            "total_questions": len(questions),
-            "current_question": 0
-        }
+        _, response = await _create_interview_session(request, current_user)
+        return response
         
     except HTTPException:
         raise
@@ -99,17 +120,57 @@ async def start_interview(request: dict, current_user: User = Depends(get_curren
             detail=f"Error starting interview: {str(e)}"
         )
 
+def _sessions_etag(kind: str, user_id: str, count: int, updated_at: Optional[datetime]) -> str:
+    """ETag of a response derived from all of a user's sessions (list, stats)"""
+    return make_etag(kind, user_id, count, updated_at.isoformat() if updated_at else "")
+
+def _sessions_etag_of(kind: str, user_id: str, sessions: List[InterviewSession]) -> str:
+    return _sessions_etag(kind, user_id, len(sessions), max((s.updated_at for s in sessions), default=None))
+
+async def _sessions_not_modified(request: Request, kind: str, user_id: str) -> Optional[str]:
+    """The current ETag when it matches If-None-Match (one index lookup), otherwise None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    version = await services.interview.get_sessions_version(user_id)
+    if version is None:
+        return None
+    etag = _sessions_etag(kind, user_id, version["count"], version["updated_at"])
+    return etag if etag_matches(if_none_match, etag) else None
+
+def _session_payload(session: InterviewSession) -> Dict[str, Any]:
+    return {
+        "session_id": session.session_id,
+        "interviewer_type": session.interviewer_type.value,
+        "difficulty": session.difficulty.value,
+        "questions": session.questions,
+        "answers": session.answers,
+        "feedback": session.feedback,
+        "current_question": len(session.answers),
+        "total_questions": len(session.questions),
+        "completed": len(session.answers) >= len(session.questions)
+    }
+
 @router.get("/session/{session_id}")
-async def get_session(session_id: str, current_user: User = Depends(get_current_user)):
+async def get_session(session_id: str, request: Request, current_user: User = Depends(get_current_user)):
     """Get interview session details"""
     
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
         )
     
-    session = await interview_service.get_session(session_id, str(current_user.id))
+    # Conditional GET: compare against the stored version before loading the session
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = await services.interview.get_session_version(session_id, str(current_user.id))
+        if version is not None:
+            etag = make_etag("session", session_id, version.isoformat())
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
+    session = await services.interview.get_session(session_id, str(current_user.id))
     
     if not session:
         raise HTTPException(
@@ -117,23 +178,14 @@ async def get_session(session_id: str, current_user: User = Depends(get_current_
             detail="Interview session not found"
         )
     
-    return {
-        "session_id": session_id,
-        "interviewer_type": session.interviewer_type.value,
-        "difficulty": session.difficulty.value,
-        "questions": session.questions,
-        "answers": session.answers,
-        "feedback": session.feedback,
-        "current_question": len(session.answers),
-        "total_questions": len(session.questions),
-        "completed": len(session.answers) >= len(session.questions)
-    }
+    etag = make_etag("session", session_id, session.updated_at.isoformat())
+    return trusted_json(_session_payload(session), headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
 
 @router.post("/answer")
 async def submit_answer(request: dict, current_user: User = Depends(get_current_user)):
     """Submit an answer to a question"""
     
-    if not gemini_service or not interview_service:
+    if not services.gemini or not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Services not available. Please check configuration."
@@ -150,7 +202,7 @@ async def submit_answer(request: dict, current_user: User = Depends(get_current_
             )
         
         # Get session from database
-        session = await interview_service.get_session(session_id, str(current_user.id))
+        session = await services.interview.get_session(session_id, str(current_user.id))
         
         if not session:
             raise HTTPException(
@@ -169,7 +221,7 @@ async def submit_answer(request: dict, current_user: User = Depends(get_current_
         current_question = session.questions[current_question_index]
         
         # Create interviewer agent and evaluate answer
-        interviewer = InterviewerFactory.create_interviewer(session.interviewer_type, gemini_service)
+        interviewer = services.interviewer(session.interviewer_type)
         evaluation = await interviewer.evaluate_answer(
             current_question, 
             answer, 
@@ -177,7 +229,7 @@ async def submit_answer(request: dict, current_user: User = Depends(get_current_
         )
         
         # Update session with new answer and feedback
-        await interview_service.add_answer(session_id, str(current_user.id), answer, evaluation)
+        await services.interview.add_answer(session_id, str(current_user.id), answer, evaluation)
         
         return {
             "session_id": session_id,
@@ -202,7 +254,7 @@ async def submit_answer(request: dict, current_user: User = Depends(get_current_
 async def get_interview_summary(session_id: str, current_user: User = Depends(get_current_user)):
     """Get comprehensive interview summary"""
     
-    if not gemini_service or not interview_service:
+    if not services.gemini or not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Services not available. Please check configuration."
@@ -210,7 +262,7 @@ async def get_interview_summary(session_id: str, current_user: User = Depends(ge
     
     try:
         # Get session from database
-        session = await interview_service.get_session(session_id, str(current_user.id))
+        session = await services.interview.get_session(session_id, str(current_user.id))
         
         if not session:
             raise HTTPException(
@@ -225,48 +277,16 @@ async def get_interview_summary(session_id: str, current_user: User = Depends(ge
             )
         
         # Generate comprehensive summary
-        summary = await gemini_service.generate_interview_summary(
+        summary = await services.gemini.generate_interview_summary(
             session.questions,
             session.answers,
             session.interviewer_type.value
         )
         
-        # Calculate overall score from individual feedback
-        total_score = 0
-        valid_scores = 0
-        
-        for feedback in session.feedback:
-            if isinstance(feedback, dict) and 'score' in feedback:
-                try:
-                    score = float(feedback['score'])
-                    total_score += score
-                    valid_scores += 1
-                except (ValueError, TypeError):
-                    continue
-        
-        average_score = total_score / valid_scores if valid_scores > 0 else 0
-        
         # Update session with completion status
-        await interview_service.update_session_completion(session_id, str(current_user.id), True)
+        await services.interview.update_session_completion(session_id, str(current_user.id), True)
         
-        return {
-            "session_id": session_id,
-            "interviewer_type": session.interviewer_type.value,
-            "difficulty": session.difficulty.value,
-            "total_questions": len(session.questions),
-            "answered_questions": len(session.answers),
-            "average_score": round(average_score, 2),
-            "individual_feedback": session.feedback,
-            "overall_summary": summary,
-            "qa_pairs": [
-                {
-                    "question": q,
-                    "answer": a,
-                    "feedback": f
-                }
-                for q, a, f in zip(session.questions, session.answers, session.feedback)
-            ]
-        }
+        return trusted_json(services.interview.summary_payload(session, summary))
         
     except HTTPException:
         raise
@@ -277,35 +297,74 @@ async def get_interview_summary(session_id: str, current_user: User = Depends(ge
             detail=f"Error generating summary: {str(e)}"
         )
 
+_EPOCH = datetime(1970, 1, 1)
+
+def _parse_sync_cursor(since: str) -> datetime:
+    """A delta sync cursor: an ISO-8601 timestamp or a version (milliseconds since the epoch)"""
+    since = since.strip()
+    if since.isdigit():
+        return _EPOCH + timedelta(milliseconds=int(since))
+    cursor = datetime.fromisoformat(since)
+    if cursor.tzinfo is not None:
+        cursor = cursor.astimezone(timezone.utc).replace(tzinfo=None)
+    return cursor
+
+def _session_list_entry(session: InterviewSession) -> Dict[str, Any]:
+    return {
+        "session_id": session.session_id,
+        "interviewer_type": session.interviewer_type.value,
+        "difficulty": session.difficulty.value,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "total_questions": len(session.questions),
+        "answered_questions": len(session.answers),
+        "completed": session.completed if hasattr(session, 'completed') else len(session.answers) >= len(session.questions)
+    }
+
 @router.get("/sessions")
-async def list_sessions(current_user: User = Depends(get_current_user)):
-    """List all interview sessions for the current user"""
+async def list_sessions(request: Request, since: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """List all interview sessions for the current user, or only the changes after ``since``"""
     
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
         )
     
+    cursor = None
+    if since:
+        try:
+            cursor = _parse_sync_cursor(since)
+        except (ValueError, OverflowError):
+            raise HTTPException(
+                status_code=400,
+                detail="since must be an ISO-8601 timestamp or a version returned by a previous sync"
+            )
+    
     try:
-        sessions = await interview_service.get_user_sessions(str(current_user.id))
-        
-        sessions_list = []
-        for session in sessions:
-            sessions_list.append({
-                "session_id": session.session_id,
-                "interviewer_type": session.interviewer_type.value,
-                "difficulty": session.difficulty.value,
-                "created_at": session.created_at,
-                "total_questions": len(session.questions),
-                "answered_questions": len(session.answers),
-                "completed": session.completed if hasattr(session, 'completed') else len(session.answers) >= len(session.questions)
-            })
+        if cursor is None:
+            etag = await _sessions_not_modified(request, "sessions", str(current_user.id))
+            if etag:
+                return not_modified(etag)
         
-        return {
+        changes = await services.interview.get_session_changes(str(current_user.id), cursor)
+        sessions = changes["sessions"]
+        sessions_list = [_session_list_entry(session) for session in sessions]
+        
+        content = {
             "sessions": sorted(sessions_list, key=lambda x: x['created_at'], reverse=True),
-            "total_sessions": len(sessions_list)
+            "deleted": changes["deleted"],
+            "full": changes["full"],
+            "cursor": changes["cursor"].isoformat(),
+            "version": (changes["cursor"] - _EPOCH) // timedelta(milliseconds=1)
         }
+        if not changes["full"]:
+            return trusted_json(content, headers={"Cache-Control": "private, no-store"})
+        content["total_sessions"] = len(sessions_list)
+        return trusted_json(content, headers={
+            "ETag": _sessions_etag_of("sessions", str(current_user.id), sessions),
+            "Cache-Control": PRIVATE_REVALIDATE
+        })
         
     except Exception as e:
         logger.error(f"Error listing sessions: {str(e)}")
@@ -318,7 +377,7 @@ async def list_sessions(current_user: User = Depends(get_current_user)):
 async def delete_session(session_id: str, current_user: User = Depends(get_current_user)):
     """Delete an interview session"""
     
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
@@ -326,7 +385,7 @@ async def delete_session(session_id: str, current_user: User = Depends(get_curre
     
     try:
         # Check if session exists and belongs to user
-        session = await interview_service.get_session(session_id, str(current_user.id))
+        session = await services.interview.get_session(session_id, str(current_user.id))
         
         if not session:
             raise HTTPException(
@@ -335,7 +394,7 @@ async def delete_session(session_id: str, current_user: User = Depends(get_curre
             )
         
         # Delete session
-        await interview_service.delete_session(session_id, str(current_user.id))
+        await services.interview.delete_session(session_id, str(current_user.id))
         
         return {
             "message": "Interview session deleted successfully",
@@ -352,18 +411,26 @@ async def delete_session(session_id: str, current_user: User = Depends(get_curre
         )
 
 @router.get("/stats")
-async def get_user_stats(current_user: User = Depends(get_current_user)):
+async def get_user_stats(request: Request, current_user: User = Depends(get_current_user)):
     """Get user interview statistics"""
     
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
         )
     
     try:
-        stats = await interview_service.get_user_stats(str(current_user.id))
-        return stats
+        etag = await _sessions_not_modified(request, "stats", str(current_user.id))
+        if etag:
+            return not_modified(etag)
+        
+        sessions = await services.interview.get_user_sessions(str(current_user.id))
+        stats = services.interview.summarize_user_stats(sessions)
+        return trusted_json(stats, headers={
+            "ETag": _sessions_etag_of("stats", str(current_user.id), sessions),
+            "Cache-Control": PRIVATE_REVALIDATE
+        })
         
     except Exception as e:
         logger.error(f"Error getting user stats: {str(e)}")
@@ -377,7 +444,7 @@ async def get_user_stats(current_user: User = Depends(get_current_user)):
 async def save_recording(request: dict, current_user: User = Depends(get_current_user)):
     """Save audio recording for an interview session"""
     
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
@@ -417,7 +484,7 @@ async def save_recording(request: dict, current_user: User = Depends(get_current
             )
         
         # Validate session exists and belongs to user
-        session = await interview_service.get_session(session_id, str(current_user.id))
+        session = await services.interview.get_session(session_id, str(current_user.id))
         if not session:
             raise HTTPException(status_code=404, detail="Interview session not found")
         
@@ -436,7 +503,7 @@ async def save_recording(request: dict, current_user: User = Depends(get_current
             'created_at': datetime.now()
         }
         
-        recording_id = await interview_service.save_recording(recording_data)
+        recording_id = await services.interview.save_recording(recording_data)
         
         return {
             "success": True,
@@ -456,7 +523,7 @@ async def save_recording(request: dict, current_user: User = Depends(get_current
 @router.get("/recordings/{session_id}")
 async def get_session_recordings(session_id: str, current_user: User = Depends(get_current_user)):
     """Get all recordings for a specific interview session"""
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
@@ -464,19 +531,19 @@ async def get_session_recordings(session_id: str, current_user: User = Depends(g
     
     try:
         # Validate session exists and belongs to user
-        session = await interview_service.get_session(session_id, str(current_user.id))
+        session = await services.interview.get_session(session_id, str(current_user.id))
         if not session:
             raise HTTPException(status_code=404, detail="Interview session not found")
         
         if str(session.user_id) != str(current_user.id):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        recordings = await interview_service.get_session_recordings(session_id)
+        recordings = await services.interview.get_session_recordings(session_id)
         
-        return {
+        return trusted_json({
             "success": True,
             "recordings": recordings
-        }
+        })
         
     except HTTPException:
         raise
@@ -490,7 +557,7 @@ async def get_session_recordings(session_id: str, current_user: User = Depends(g
 @router.get("/recording/{recording_id}")
 async def get_recording(recording_id: str, current_user: User = Depends(get_current_user)):
     """Get a specific recording with audio data"""
-    if not interview_service:
+    if not services.interview:
         raise HTTPException(
             status_code=500,
             detail="Interview service not available."
@@ -499,7 +566,7 @@ async def get_recording(recording_id: str, current_user: User = Depends(get_curr
     try:
         logger.info(f"Fetching recording with ID: {recording_id}")
         
-        recording = await interview_service.get_recording(recording_id)
+        recording = await services.interview.get_recording(recording_id)
         
         if not recording:
             logger.warning(f"Recording not found for ID: {recording_id}")
@@ -509,15 +576,19 @@ async def get_recording(recording_id: str, current_user: User = Depends(get_curr
         
         # Verify the recording belongs to the current user
         # We need to check if the session belongs to the user
-        session = await interview_service.get_session(recording.get('session_id'), str(current_user.id))
+        session = await services.interview.get_session(recording.get('session_id'), str(current_user.id))
         if not session:
             logger.warning(f"Access denied for recording {recording_id} - session not found or not owned by user")
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return {
+        # Streamed recordings keep their audio in blob storage
+        if recording.get('storage') in ('gridfs', 'local'):
+            recording['audio_url'] = f"/api/interview/recording/{recording_id}/audio"
+        
+        return trusted_json({
             "success": True,
             "recording": recording
-        }
+        })
         
     except HTTPException:
         raise
@@ -527,3 +598,306 @@ async def get_recording(recording_id: str, current_user: User = Depends(get_curr
             status_code=500,
             detail=f"Error getting recording: {str(e)}"
         )
+
+async def _require_session(session_id: str, current_user: User):
+    """Ensure the session exists and belongs to the current user"""
+    session = await services.interview.get_session(session_id, str(current_user.id))
+    if not session:
+        raise HTTPException(status_code=404, detail="Interview session not found")
+    return session
+
+@router.post("/recordings/upload")
+async def upload_recording(
+    request: Request,
+    session_id: str,
+    question_index: int,
+    duration: float,
+    transcript: str = "",
+    current_user: User = Depends(get_current_user)
+):
+    """Upload recording audio as a raw binary body, streamed to storage"""
+    
+    if not services.interview:
+        raise HTTPException(
+            status_code=500,
+            detail="Interview service not available."
+        )
+    
+    try:
+        check_content_length(request, RECORDING_MAX_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    await _require_session(session_id, current_user)
+    
+    mime_type = request.headers.get('content-type', 'audio/webm').split(';')[0].strip() or 'audio/webm'
+    recording_data = {
+        'user_id': str(current_user.id),
+        'session_id': session_id,
+        'question_index': question_index,
+        'duration': duration,
+        'transcript': transcript,
+        'mime_type': mime_type,
+        'created_at': datetime.now()
+    }
+    
+    try:
+        recording_id = await services.interview.save_recording_stream(
+            recording_data, limited_stream(request, RECORDING_MAX_BYTES)
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error uploading recording: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error uploading recording: {str(e)}"
+        )
+    
+    return {
+        "success": True,
+        "recording_id": recording_id,
+        "message": "Recording saved successfully"
+    }
+
+@router.post("/recordings/uploads")
+async def create_recording_upload(
+    upload_request: CreateRecordingUploadRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable recording upload"""
+    
+    if not services.interview:
+        raise HTTPException(
+            status_code=500,
+            detail="Interview service not available."
+        )
+    
+    await _require_session(upload_request.session_id, current_user)
+    
+    try:
+        state = await upload_manager.create(str(current_user.id), upload_request.dict())
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    return {
+        "upload_id": state["upload_id"],
+        "offset": state["offset"],
+        "chunk_size": RECORDING_CHUNK_SIZE,
+        "max_bytes": RECORDING_MAX_BYTES
+    }
+
+@router.get("/recordings/uploads/{upload_id}")
+async def get_recording_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Get the current offset of a resumable upload"""
+    try:
+        state = await upload_manager.get(upload_id, str(current_user.id))
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    return {
+        "upload_id": upload_id,
+        "offset": state["offset"],
+        "total_size": state.get("total_size")
+    }
+
+@router.patch("/recordings/uploads/{upload_id}")
+async def append_recording_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: User = Depends(get_current_user)
+):
+    """Append a chunk to a resumable upload at the given byte offset"""
+    try:
+        check_content_length(request, RECORDING_MAX_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    try:
+        state = await upload_manager.append(
+            upload_id, str(current_user.id), upload_offset, limited_stream(request, RECORDING_MAX_BYTES)
+        )
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetMismatchError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload offset mismatch, current offset is {e.expected}",
+            headers={"Upload-Offset": str(e.expected)}
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    return {
+        "upload_id": upload_id,
+        "offset": state["offset"]
+    }
+
+@router.post("/recordings/uploads/{upload_id}/complete")
+async def complete_recording_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Finish a resumable upload and store it as a recording"""
+    
+    if not services.interview:
+        raise HTTPException(
+            status_code=500,
+            detail="Interview service not available."
+        )
+    
+    try:
+        state = await upload_manager.get(upload_id, str(current_user.id))
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    if state.get("total_size") is not None and state["offset"] != state["total_size"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: received {state['offset']} of {state['total_size']} bytes",
+            headers={"Upload-Offset": str(state["offset"])}
+        )
+    
+    await _require_session(state["session_id"], current_user)
+    
+    recording_data = {
+        'user_id': str(current_user.id),
+        'session_id': state['session_id'],
+        'question_index': state['question_index'],
+        'duration': state['duration'],
+        'transcript': state.get('transcript') or '',
+        'mime_type': state.get('mime_type', 'audio/webm'),
+        'created_at': datetime.now()
+    }
+    
+    try:
+        recording_id = await services.interview.save_recording_stream(
+            recording_data, iter_file_chunks(upload_manager.part_path(upload_id))
+        )
+    except Exception as e:
+        logger.error(f"Error completing upload {upload_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error completing upload: {str(e)}"
+        )
+    
+    await upload_manager.discard(upload_id)
+    
+    return {
+        "success": True,
+        "recording_id": recording_id,
+        "message": "Recording saved successfully"
+    }
+
+@router.delete("/recordings/uploads/{upload_id}")
+async def cancel_recording_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Abort a resumable upload and discard received data"""
+    try:
+        await upload_manager.get(upload_id, str(current_user.id))
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    await upload_manager.discard(upload_id)
+    return {"message": "Upload cancelled", "upload_id": upload_id}
+
+@router.get("/recording/{recording_id}/audio")
+async def stream_recording_audio(recording_id: str, current_user: User = Depends(get_current_user)):
+    """Stream the audio of a recording uploaded through the binary endpoints"""
+    if not services.interview:
+        raise HTTPException(
+            status_code=500,
+            detail="Interview service not available."
+        )
+    
+    recording = await services.interview.get_recording(recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    
+    session = await services.interview.get_session(recording.get('session_id'), str(current_user.id))
+    if not session:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if recording.get('storage') not in ('gridfs', 'local'):
+        raise HTTPException(status_code=404, detail="Recording audio is stored inline, use /recording/{recording_id}")
+    
+    return StreamingResponse(
+        recording_storage.open_stream(recording),
+        media_type=recording.get('mime_type', 'audio/webm'),
+        headers={"Content-Length": str(recording.get('file_size', 0))} if recording.get('file_size') else None
+    )
+
+async def _handle_live_message(live: LiveInterview, current_user: User, message: Dict[str, Any], message_id: Any):
+    message_type = message.get("type")
+    if message_type == "ping":
+        await live.push({"type": "pong", "id": message_id})
+    elif message_type == "start":
+        live.check_idle()
+        session, response = await _create_interview_session(message, current_user)
+        live.attach(session)
+        await live.push({"type": "started", "id": message_id, **response})
+    elif message_type == "resume":
+        session_id = message.get("session_id")
+        if not session_id:
+            raise HTTPException(status_code=400, detail="session_id is required")
+        session = await services.interview.get_session(session_id, str(current_user.id))
+        if not session:
+            raise HTTPException(status_code=404, detail="Interview session not found")
+        live.attach(session)
+        await live.push({"type": "session", "id": message_id, **_session_payload(session)})
+    elif message_type == "answer":
+        index = live.submit_answer(str(message.get("answer") or ""), bool(message.get("follow_up")), message_id)
+        await live.push({"type": "answer_accepted", "id": message_id, "question_index": index})
+    elif message_type == "recording":
+        await live.save_recording(message, message_id)
+    elif message_type == "summary":
+        live.request_summary(message_id)
+    else:
+        raise LiveInterviewError(f"Unknown message type: {message_type}")
+
+@router.websocket("/live")
+async def live_interview(websocket: WebSocket):
+    """Run an interview over one connection: authenticate once, then start or resume,
+    answer, save recordings and summarize, with results pushed as they complete"""
+    await websocket.accept()
+    if not services.gemini or not services.interview or not services.live_interviews:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Services not available")
+        return
+    
+    # Browsers cannot set headers on a WebSocket, so the access token is the first message
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=LIVE_INTERVIEW_AUTH_TIMEOUT_SECONDS)
+        if not isinstance(message, dict) or message.get("type") != "auth":
+            raise HTTPException(status_code=401, detail="The first message must be an auth message")
+        current_user = await authenticate_token(str(message.get("token") or ""))
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, HTTPException, ValueError, KeyError):
+        services.live_interviews.auth_failures += 1
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    
+    async def send(payload: Dict[str, Any]):
+        await websocket.send_text(dumps(payload).decode("utf-8"))
+    
+    live = services.live_interviews.open(current_user, send)
+    try:
+        await live.push({"type": "ready", "id": message.get("id"), "user_id": str(current_user.id)})
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError):
+                message = None
+            if not isinstance(message, dict):
+                await live.push({"type": "error", "status_code": 400, "detail": "Messages must be JSON objects"})
+                continue
+            
+            message_id = message.get("id")
+            try:
+                await _handle_live_message(live, current_user, message, message_id)
+            except (HTTPException, LiveInterviewError) as e:
+                await live.push({"type": "error", "id": message_id, "status_code": e.status_code, "detail": e.detail})
+            except Exception as e:
+                logger.error(f"Error handling live interview message: {str(e)}")
+                await live.push({"type": "error", "id": message_id, "status_code": 500, "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Queued writes are flushed even though the client is gone
+        await services.live_interviews.release(live)
@@ -1,42 +1,129 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from ..services.resume_parser import ResumeParser
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from decouple import config
+from ..services.resume_parser import ResumeParser, ResumeSource, resume_pool
+from ..services.resume_cache import resume_cache, digest_bytes, digest_text, normalize_resume_text
+from ..services.upload_spool import SpooledUpload, UploadTooLargeError, UploadFormatError, read_multipart_uploads
+from ..services.worker_pool import WorkerPoolBusyError, WorkerPoolTimeoutError
+from ..services.auth_service import get_optional_user
 from ..models.interview_models import ResumeData
+from ..models.user_models import User
+import asyncio
+import json
+import zipfile
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# Upload size caps, enforced while the body streams in
+RESUME_MAX_UPLOAD_BYTES = int(config("RESUME_MAX_UPLOAD_BYTES", default=str(10 * 1024 * 1024)))
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Part headers and boundaries around the file
+
+# Batch ingestion limits (concurrency 0 means one job per resume worker)
+RESUME_BATCH_MAX_FILES = int(config("RESUME_BATCH_MAX_FILES", default="200"))
+RESUME_BATCH_MAX_FILE_BYTES = int(config("RESUME_BATCH_MAX_FILE_BYTES", default=str(10 * 1024 * 1024)))
+RESUME_BATCH_MAX_BYTES = int(config("RESUME_BATCH_MAX_BYTES", default=str(200 * 1024 * 1024)))
+RESUME_BATCH_CONCURRENCY = int(config("RESUME_BATCH_CONCURRENCY", default="0"))
+
+def _multipart_body(field: str, many: bool = False) -> Dict[str, Any]:
+    """OpenAPI request body for endpoints that parse their multipart body themselves"""
+    file_schema = {"type": "string", "format": "binary"}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "required": [field],
+        "properties": {field: {"type": "array", "items": file_schema} if many else file_schema}
+    }}}}}
+
+async def _receive_uploads(request: Request, max_body_bytes: int, max_file_bytes: int,
+                           max_files: int) -> List[SpooledUpload]:
+    """Stream the multipart body into spooled uploads, mapping limit errors to HTTP errors"""
+    try:
+        uploads, _ = await read_multipart_uploads(request, max_body_bytes, max_file_bytes, max_files)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return uploads
+
+def _close_uploads(uploads: List[SpooledUpload], *files):
+    for upload in uploads:
+        upload.close()
+    for file in files:
+        file.close()
+
+def _pool_http_error(error: Exception) -> HTTPException:
+    """Map resume worker pool errors to HTTP errors"""
+    if isinstance(error, WorkerPoolBusyError):
+        return HTTPException(
+            status_code=503,
+            detail="Resume parser is busy, please try again shortly",
+            headers={"Retry-After": "5"}
+        )
+    return HTTPException(
+        status_code=504,
+        detail="Resume parsing took too long"
+    )
+
 resume_parser = ResumeParser()
 
-@router.post("/upload", response_model=ResumeData)
-async def upload_resume(file: UploadFile = File(...)):
+async def _parse_cached(content: ResumeSource, filename: str, digest: str,
+                        user: Optional[User]) -> Tuple[ResumeData, bool]:
+    """Parse a resume unless this user already uploaded the same content; returns (data, cache hit)"""
+    user_id = str(user.id) if user else None
+    parsed_data = await resume_cache.get(user_id, digest)
+    hit = parsed_data is not None
+    if not hit:
+        parsed_data = await resume_parser.parse_resume(content, filename)
+        await resume_cache.put(user_id, digest, parsed_data, filename)
+    return ResumeData(**parsed_data, resume_id=digest), hit
+
+@router.post("/upload", response_model=ResumeData, openapi_extra=_multipart_body("file"))
+async def upload_resume(request: Request, response: Response,
+                        current_user: Optional[User] = Depends(get_optional_user)):
     """Upload and parse a resume file"""
     
-    # Validate file type
-    if not file.filename.endswith(('.pdf', '.docx', '.txt')):
-        raise HTTPException(
-            status_code=400,
-            detail="Only PDF, DOCX, and TXT files are supported"
-        )
-    
+    # Stream the upload into a spooled file, stopping as soon as it exceeds the cap
+    uploads = await _receive_uploads(
+        request, RESUME_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES, RESUME_MAX_UPLOAD_BYTES, max_files=1
+    )
     try:
-        # Read file content
-        content = await file.read()
+        file = next((upload for upload in uploads if upload.field_name == "file"), None)
+        if file is None:
+            raise HTTPException(status_code=422, detail="A 'file' upload is required")
         
-        # Parse resume
-        parsed_data = await resume_parser.parse_resume(content, file.filename)
+        # Validate file type
+        if not file.filename.endswith(SUPPORTED_EXTENSIONS):
+            raise HTTPException(
+                status_code=400,
+                detail="Only PDF, DOCX, and TXT files are supported"
+            )
         
-        return ResumeData(**parsed_data)
+        # Parse resume from the spooled file (repeat uploads are served from the cache)
+        resume, hit = await _parse_cached(file.source(), file.filename, file.digest, current_user)
+        response.headers["X-Resume-Cache"] = "hit" if hit else "miss"
+        return resume
         
+    except HTTPException:
+        raise
+    except (WorkerPoolBusyError, WorkerPoolTimeoutError) as e:
+        raise _pool_http_error(e)
     except Exception as e:
         logger.error(f"Error processing resume: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing resume: {str(e)}"
         )
+    finally:
+        _close_uploads(uploads)
 
 @router.post("/parse-text", response_model=ResumeData)
-async def parse_resume_text(resume_text: dict):
+async def parse_resume_text(resume_text: dict, response: Response,
+                            current_user: Optional[User] = Depends(get_optional_user)):
     """Parse resume from raw text"""
     
     try:
@@ -48,16 +135,145 @@ async def parse_resume_text(resume_text: dict):
             )
         
         # Create a fake filename for text parsing
-        parsed_data = await resume_parser.parse_resume(
-            text.encode('utf-8'), 
-            'resume.txt'
-        )
-        
-        return ResumeData(**parsed_data)
+        text = normalize_resume_text(text)
+        resume, hit = await _parse_cached(text.encode('utf-8'), 'resume.txt', digest_text(text), current_user)
+        response.headers["X-Resume-Cache"] = "hit" if hit else "miss"
+        return resume
         
+    except HTTPException:
+        raise
+    except (WorkerPoolBusyError, WorkerPoolTimeoutError) as e:
+        raise _pool_http_error(e)
     except Exception as e:
         logger.error(f"Error parsing resume text: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error parsing resume text: {str(e)}"
         )
+
+# A batch item is (filename, loader returning (content, digest), or an error message)
+BatchItem = Tuple[str, Optional[Callable[[], Tuple[ResumeSource, str]]], Optional[str]]
+
+def _read_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Tuple[bytes, str]:
+    # The size in the archive header can lie, so the read itself is bounded too
+    with archive.open(info) as member:
+        content = member.read(RESUME_BATCH_MAX_FILE_BYTES + 1)
+    if len(content) > RESUME_BATCH_MAX_FILE_BYTES:
+        raise ValueError(f"File is larger than {RESUME_BATCH_MAX_FILE_BYTES} bytes")
+    return content, digest_bytes(content)
+
+def _expand_batch(files: List[SpooledUpload], archive_files: list) -> List[BatchItem]:
+    """Flatten uploads and ZIP archives into one item per resume
+
+    Opened archive files are appended to ``archive_files`` for the caller to close.
+    """
+    items: List[BatchItem] = []
+    for file in files:
+        filename = file.filename or "upload"
+        if filename.lower().endswith(".zip"):
+            try:
+                archive_file = file.open()
+                archive_files.append(archive_file)
+                archive = zipfile.ZipFile(archive_file)
+                members = archive.infolist()
+            except zipfile.BadZipFile:
+                items.append((filename, None, "Invalid ZIP archive"))
+                continue
+            for info in members:
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or name.rsplit("/", 1)[-1].startswith("."):
+                    continue
+                if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    items.append((f"{filename}/{name}", None, "Only PDF, DOCX, and TXT files are supported"))
+                elif info.file_size > RESUME_BATCH_MAX_FILE_BYTES:
+                    items.append((f"{filename}/{name}", None, f"File is larger than {RESUME_BATCH_MAX_FILE_BYTES} bytes"))
+                else:
+                    items.append((f"{filename}/{name}", lambda a=archive, i=info: _read_zip_member(a, i), None))
+        elif file.size > RESUME_BATCH_MAX_FILE_BYTES:
+            items.append((filename, None, f"File is larger than {RESUME_BATCH_MAX_FILE_BYTES} bytes"))
+        elif filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            # Parsed straight from the spooled upload
+            items.append((filename, lambda f=file: (f.source(), f.digest), None))
+        else:
+            items.append((filename, None, "Only PDF, DOCX, ZIP and TXT files are supported"))
+    return items
+
+def _batch_error_message(error: Exception) -> str:
+    if isinstance(error, (WorkerPoolBusyError, WorkerPoolTimeoutError)):
+        return _pool_http_error(error).detail
+    return str(error) or type(error).__name__
+
+async def _stream_batch(items: List[BatchItem], user: Optional[User]) -> AsyncIterator[str]:
+    """Parse items concurrently and yield one NDJSON line per item as it completes"""
+    concurrency = RESUME_BATCH_CONCURRENCY or resume_pool.max_workers
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    tasks: List[asyncio.Task] = []
+
+    async def parse_item(index: int, filename: str, load: Callable[[], Tuple[ResumeSource, str]]):
+        line: Dict[str, object] = {"index": index, "filename": filename}
+        try:
+            # Reading and decompressing happen off the event loop
+            content, digest = await asyncio.to_thread(load)
+            name = filename.rsplit("/", 1)[-1].lower()
+            resume, hit = await _parse_cached(content, name, digest, user)
+            line.update({"status": "ok", "cached": hit, "resume": resume.dict()})
+        except Exception as e:
+            logger.error(f"Error processing batch resume {filename}: {str(e)}")
+            line.update({"status": "error", "error": _batch_error_message(e)})
+        finally:
+            slots.release()
+        await results.put(line)
+
+    async def schedule():
+        for index, (filename, load, error) in enumerate(items):
+            if error is not None:
+                await results.put({"index": index, "filename": filename, "status": "error", "error": error})
+                continue
+            await slots.acquire()
+            tasks.append(asyncio.create_task(parse_item(index, filename, load)))
+
+    scheduler = asyncio.create_task(schedule())
+    succeeded = 0
+    try:
+        for _ in range(len(items)):
+            line = await results.get()
+            succeeded += line["status"] == "ok"
+            yield json.dumps(line, default=str) + "\n"
+        yield json.dumps({
+            "done": True,
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded
+        }) + "\n"
+    finally:
+        # Stop scheduling and drop pending work if the client went away
+        scheduler.cancel()
+        for task in tasks:
+            task.cancel()
+
+@router.post("/batch", openapi_extra=_multipart_body("files", many=True))
+async def upload_resume_batch(request: Request, current_user: Optional[User] = Depends(get_optional_user)):
+    """Parse many resumes (files and/or ZIP archives), streaming NDJSON results as each completes"""
+    uploads = await _receive_uploads(
+        request, RESUME_BATCH_MAX_BYTES, RESUME_BATCH_MAX_BYTES, max_files=RESUME_BATCH_MAX_FILES
+    )
+    archive_files: list = []
+    try:
+        items = await asyncio.to_thread(_expand_batch, uploads, archive_files)
+        if not items:
+            raise HTTPException(status_code=400, detail="No resumes found in the upload")
+        if len(items) > RESUME_BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many resumes in one batch (maximum {RESUME_BATCH_MAX_FILES})"
+            )
+    except BaseException:
+        _close_uploads(uploads, *archive_files)
+        raise
+    # Spooled files are removed once the response has been sent
+    return StreamingResponse(
+        _stream_batch(items, current_user),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(_close_uploads, uploads, *archive_files)
+    )
@@ -1,12 +1,21 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set
+from collections import OrderedDict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from decouple import config
-from ..database import get_database
-from ..models.user_models import User, TokenData
+from ..database.repository import repository
+from ..database.storage import DuplicateKeyError
+from ..models.user_models import User, TokenData, Token, UserResponse, UserCreate
+from .cache import TTLCache
+from .worker_pool import WorkerPool, WorkerPoolBusyError
+import asyncio
+import hashlib
+import secrets
+import time
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,14 +24,53 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = config("JWT_SECRET_KEY", default="your-secret-key-here-change-in-production")
 ALGORITHM = config("JWT_ALGORITHM", default="HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(config("ACCESS_TOKEN_EXPIRE_MINUTES", default="30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(config("REFRESH_TOKEN_EXPIRE_DAYS", default="30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated user cache (size 0 disables it)
+AUTH_CACHE_SIZE = int(config("AUTH_CACHE_SIZE", default="4096"))
+AUTH_CACHE_TTL_SECONDS = float(config("AUTH_CACHE_TTL_SECONDS", default="60"))
+
+# Verified token -> user_id (never outlives the token's exp), and user_id -> User
+token_cache = TTLCache("auth_tokens", AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache("auth_users", AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+# Password hashing (hashes with a different cost are upgraded on the next login)
+BCRYPT_ROUNDS = int(config("BCRYPT_ROUNDS", default="12"))
+PASSWORD_HASH_WORKERS = int(config("PASSWORD_HASH_WORKERS", default="4"))
+PASSWORD_HASH_QUEUE_LIMIT = int(config("PASSWORD_HASH_QUEUE_LIMIT", default="256"))
+
+# bcrypt releases the GIL, so threads hash in parallel without blocking the event loop
+password_pool = WorkerPool("password-hashing", PASSWORD_HASH_WORKERS, queue_limit=PASSWORD_HASH_QUEUE_LIMIT)
+
+# Bulk provisioning hashes in its own pool so it cannot starve interactive logins
+PASSWORD_BULK_WORKERS = int(config("PASSWORD_BULK_WORKERS", default="2"))
+BULK_USER_BATCH_SIZE = int(config("BULK_USER_BATCH_SIZE", default="100"))
+# One batch is hashed at a time, so the queue never needs to hold more than a batch
+PASSWORD_BULK_QUEUE_LIMIT = int(config("PASSWORD_BULK_QUEUE_LIMIT", default=str(BULK_USER_BATCH_SIZE)))
+bulk_password_pool = WorkerPool("password-bulk", PASSWORD_BULK_WORKERS, queue_limit=PASSWORD_BULK_QUEUE_LIMIT)
+BULK_JOB_HISTORY = 100  # Finished bulk jobs kept for status lookups
+
+# Messages for unique key violations on the users collection
+DUPLICATE_USER_MESSAGES = {
+    "email": "Email already registered",
+    "username": "Username already taken"
+}
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 class AuthService:
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS,
+            bcrypt__max_rounds=BCRYPT_ROUNDS
+        )
+        self._user_lookups: Dict[str, asyncio.Future] = {}
+        self._bulk_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bulk_tasks: Set[asyncio.Task] = set()
+        self._bulk_lock = asyncio.Lock()
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
@@ -32,6 +80,25 @@ class AuthService:
         """Hash a password"""
         return self.pwd_context.hash(password)
 
+    async def _run_password_job(self, fn, *args):
+        try:
+            return await password_pool.run(fn, *args)
+        except WorkerPoolBusyError:
+            logger.warning("Password hashing pool is saturated, rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "2"}
+            )
+
+    async def hash_password(self, password: str) -> str:
+        """Hash a password in the password worker pool"""
+        return await self._run_password_job(self.get_password_hash, password)
+
+    async def verify_and_update_password(self, plain_password: str, hashed_password: str):
+        """Verify a password in the worker pool; returns (valid, new_hash or None)"""
+        return await self._run_password_job(self.pwd_context.verify_and_update, plain_password, hashed_password)
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         """Create JWT access token"""
         to_encode = data.copy()
@@ -44,22 +111,99 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
 
+    @staticmethod
+    def _hash_refresh_token(refresh_token: str) -> str:
+        # Refresh tokens are random 384-bit values, so a fast hash is enough to store them safely
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    async def issue_refresh_token(self, user_id: str, family_id: Optional[str] = None) -> str:
+        """Create and store a new refresh token, returning the raw token"""
+        refresh_token = secrets.token_urlsafe(48)
+        await repository.create_refresh_token({
+            "token_hash": self._hash_refresh_token(refresh_token),
+            "user_id": str(user_id),
+            "family_id": family_id or str(uuid.uuid4()),
+            "created_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            "revoked_at": None,
+            "replaced_by": None
+        })
+        return refresh_token
+
+    async def rotate_refresh_token(self, refresh_token: str):
+        """Exchange a refresh token for its user and a replacement token"""
+        invalid_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        token_hash = self._hash_refresh_token(refresh_token)
+        stored = await repository.find_refresh_token(token_hash)
+        if not stored or stored["expires_at"] <= datetime.utcnow():
+            raise invalid_exception
+
+        replacement = secrets.token_urlsafe(48)
+        replacement_hash = self._hash_refresh_token(replacement)
+        if stored.get("revoked_at") is not None or not await repository.revoke_refresh_token(token_hash, replacement_hash):
+            # A rotated token was presented again, so it has probably leaked: log the user out everywhere
+            logger.warning(f"Refresh token reuse detected for user {stored['user_id']}, revoking all sessions")
+            await repository.revoke_refresh_tokens_by_user(stored["user_id"])
+            raise invalid_exception
+
+        user = await self.get_cached_user(stored["user_id"])
+        if user is None or not user.is_active:
+            raise invalid_exception
+
+        await repository.create_refresh_token({
+            "token_hash": replacement_hash,
+            "user_id": stored["user_id"],
+            "family_id": stored.get("family_id"),
+            "created_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            "revoked_at": None,
+            "replaced_by": None
+        })
+        return user, replacement
+
+    async def revoke_refresh_token(self, refresh_token: str) -> bool:
+        """Revoke a single refresh token, e.g. on logout"""
+        return await repository.revoke_refresh_token(self._hash_refresh_token(refresh_token))
+
+    async def create_token_response(self, user: User, refresh_token: Optional[str] = None) -> Token:
+        """Build the token response, issuing a new refresh token unless one is given"""
+        access_token = self.create_access_token(
+            data={"sub": str(user.id)}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        if refresh_token is None:
+            refresh_token = await self.issue_refresh_token(str(user.id))
+
+        user_response = UserResponse(
+            id=str(user.id),
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            created_at=user.created_at
+        )
+
+        return Token(
+            access_token=access_token,
+            token_type="bearer",
+            user=user_response,
+            expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            refresh_token=refresh_token
+        )
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email from database"""
-        db = get_database()
-        users_collection = db.users
-        
-        user_data = await users_collection.find_one({"email": email})
+        user_data = await repository.find_user_by_email(email)
         if user_data:
             return User(**user_data)
         return None
 
     async def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username from database"""
-        db = get_database()
-        users_collection = db.users
-        
-        user_data = await users_collection.find_one({"username": username})
+        user_data = await repository.find_user_by_username(username)
         if user_data:
             return User(**user_data)
         return None
@@ -67,11 +211,7 @@ class AuthService:
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID from database"""
         try:
-            from bson import ObjectId
-            db = get_database()
-            users_collection = db.users
-            
-            user_data = await users_collection.find_one({"_id": ObjectId(user_id)})
+            user_data = await repository.find_user_by_id(user_id)
             if user_data:
                 return User(**user_data)
             return None
@@ -79,38 +219,70 @@ class AuthService:
             logger.error(f"Error getting user by ID {user_id}: {str(e)}")
             return None
 
+    async def get_cached_user(self, user_id: str) -> Optional[User]:
+        """Get a user through the auth cache, coalescing concurrent lookups of one user"""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        lookup = self._user_lookups.get(user_id)
+        if lookup is None:
+            # Its own task, so a caller going away never cancels the lookup for the others
+            lookup = asyncio.ensure_future(self._load_user(user_id))
+            self._user_lookups[user_id] = lookup
+        return await asyncio.shield(lookup)
+
+    async def _load_user(self, user_id: str) -> Optional[User]:
+        lookup = asyncio.current_task()
+        try:
+            user = await self.get_user_by_id(user_id)
+            # Skip caching if the user was invalidated while the lookup was running
+            if user is not None and self._user_lookups.get(user_id) is lookup:
+                user_cache.set(user_id, user)
+            return user
+        finally:
+            if self._user_lookups.get(user_id) is lookup:
+                del self._user_lookups[user_id]
+
+    def invalidate_user(self, user_id: str):
+        """Drop a user from the auth cache so the next request reloads it"""
+        user_cache.invalidate(user_id)
+        self._user_lookups.pop(user_id, None)
+
+    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update user fields and invalidate the cached user"""
+        try:
+            return await repository.update_user(user_id, update_data)
+        finally:
+            self.invalidate_user(user_id)
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        """Deactivate a user; cached sessions stop working on their next request"""
+        updated = await self.update_user(user_id, {"is_active": False})
+        await repository.revoke_refresh_tokens_by_user(user_id)
+        return updated
+
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        valid, new_hash = await self.verify_and_update_password(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this hash was created
+            try:
+                await self.update_user(str(user.id), {"hashed_password": new_hash})
+                user.hashed_password = new_hash
+                logger.info(f"Rehashed password for user {user.id} with cost {BCRYPT_ROUNDS}")
+            except Exception as e:
+                logger.warning(f"Could not store rehashed password for user {user.id}: {str(e)}")
         return user
 
-    async def create_user(self, email: str, username: str, full_name: str, password: str) -> User:
-        """Create a new user"""
-        db = get_database()
-        users_collection = db.users
-        
-        # Check if user already exists
-        existing_user = await self.get_user_by_email(email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        existing_username = await self.get_user_by_username(username)
-        if existing_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-        
-        # Create user
-        hashed_password = self.get_password_hash(password)
-        user_data = {
+    @staticmethod
+    def _new_user_document(email: str, username: str, full_name: str, hashed_password: str) -> Dict[str, Any]:
+        return {
             "email": email,
             "username": username,
             "full_name": full_name,
@@ -119,38 +291,136 @@ class AuthService:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
+
+    async def create_user(self, email: str, username: str, full_name: str, password: str) -> User:
+        """Create a new user"""
+        # Uniqueness is enforced by the storage indexes, so this is a single insert
+        hashed_password = await self.hash_password(password)
+        user_data = self._new_user_document(email, username, full_name, hashed_password)
         
-        result = await users_collection.insert_one(user_data)
-        user_data["_id"] = result.inserted_id
-        
-        return User(**user_data)
+        try:
+            user = await repository.create_user(user_data)
+        except DuplicateKeyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=DUPLICATE_USER_MESSAGES.get(e.field, "User already exists")
+            )
+        return User(**user)
+
+    async def bulk_create_users(self, users: List[UserCreate],
+                                progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Provision many users: parallel hashing, unordered batch inserts"""
+        created = 0
+        failed = []
+        if progress is not None:
+            progress["failed"] = failed
+        for start in range(0, len(users), BULK_USER_BATCH_SIZE):
+            batch = users[start:start + BULK_USER_BATCH_SIZE]
+            hashed_passwords = await asyncio.gather(*[
+                bulk_password_pool.run(self.get_password_hash, user.password) for user in batch
+            ])
+            result = await repository.create_users([
+                self._new_user_document(user.email, user.username, user.full_name, hashed_password)
+                for user, hashed_password in zip(batch, hashed_passwords)
+            ])
+            created += len(result["inserted"])
+            for error in result["errors"]:
+                user = batch[error["index"]]
+                failed.append({
+                    "index": start + error["index"],
+                    "email": user.email,
+                    "username": user.username,
+                    "error": DUPLICATE_USER_MESSAGES.get(error["field"], error["error"])
+                })
+            if progress is not None:
+                progress["created"] = created
+        logger.info(f"Bulk provisioned {created} users, {len(failed)} failed")
+        return {"created": created, "failed": failed}
+
+    def start_bulk_create_users(self, users: List[UserCreate]) -> Dict[str, Any]:
+        """Provision users in a background job and return the job's status document"""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "requested": len(users),
+            "created": 0,
+            "failed": [],
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        self._bulk_jobs[job["job_id"]] = job
+        finished = [job_id for job_id, other in self._bulk_jobs.items() if other["finished_at"] is not None]
+        for job_id in finished[:max(0, len(finished) - BULK_JOB_HISTORY)]:
+            del self._bulk_jobs[job_id]
+        task = asyncio.create_task(self._run_bulk_job(job, users))
+        self._bulk_tasks.add(task)
+        task.add_done_callback(self._bulk_tasks.discard)
+        return job
+
+    async def _run_bulk_job(self, job: Dict[str, Any], users: List[UserCreate]):
+        # Jobs run one at a time so they share the bulk pool's queue instead of overflowing it
+        async with self._bulk_lock:
+            job["status"] = "running"
+            try:
+                await self.bulk_create_users(users, progress=job)
+                job["status"] = "completed"
+            except Exception as e:
+                logger.error(f"Bulk provisioning job {job['job_id']} failed: {str(e)}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            finally:
+                job["finished_at"] = datetime.utcnow()
+
+    def get_bulk_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a bulk provisioning job"""
+        return self._bulk_jobs.get(job_id)
 
 # Create auth service instance
 auth_service = AuthService()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Get current authenticated user"""
+    return await authenticate_token(credentials.credentials)
+
+async def authenticate_token(token: str) -> User:
+    """User of an access token (also used by WebSocket handlers, which cannot use the Bearer dependency)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+            token_data = TokenData(user_id=user_id)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
-        raise credentials_exception
+        user_id = token_data.user_id
+        # A cached token must still expire with the JWT
+        token_cache.set(token, user_id, ttl=payload.get("exp", 0) - time.time())
     
-    user = await auth_service.get_user_by_id(user_id=token_data.user_id)
+    user = await auth_service.get_cached_user(user_id)
     if user is None:
         raise credentials_exception
     return user
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[User]:
+    """Get the authenticated user, or None for anonymous requests and invalid tokens"""
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials)
+    except HTTPException:
+        return None
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user"""
     if not current_user.is_active:
@@ -5,9 +5,7 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from decouple import config
-from ..database import get_database
-from ..database.memory_db import memory_db
-from ..database.mongodb import is_connected
+from ..database.repository import repository
 from ..models.user_models import User, TokenData
 import logging
 
@@ -48,77 +46,26 @@ class AuthService:
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email from database"""
-        try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                users_collection = db.users
-                
-                user_data = await users_collection.find_one({"email": email})
-                if user_data:
-                    return User(**user_data)
-            else:
-                # Use in-memory database
-                user_data = memory_db.find_user_by_email(email)
-                if user_data:
-                    return User(**user_data)
-        except Exception as e:
-            logger.error(f"Error getting user by email: {str(e)}")
-            # Fallback to memory database
-            user_data = memory_db.find_user_by_email(email)
-            if user_data:
-                return User(**user_data)
-        
+        user_data = await repository.find_user_by_email(email)
+        if user_data:
+            return User(**user_data)
         return None
 
     async def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username from database"""
-        try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                users_collection = db.users
-                
-                user_data = await users_collection.find_one({"username": username})
-                if user_data:
-                    return User(**user_data)
-            else:
-                # Use in-memory database
-                user_data = memory_db.find_user_by_username(username)
-                if user_data:
-                    return User(**user_data)
-        except Exception as e:
-            logger.error(f"Error getting user by username: {str(e)}")
-            # Fallback to memory database
-            user_data = memory_db.find_user_by_username(username)
-            if user_data:
-                return User(**user_data)
-        
+        user_data = await repository.find_user_by_username(username)
+        if user_data:
+            return User(**user_data)
         return None
 
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID from database"""
         try:
-            if is_connected():
-                # Use MongoDB
-                from bson import ObjectId
-                db = get_database()
-                users_collection = db.users
-                
-                user_data = await users_collection.find_one({"_id": ObjectId(user_id)})
-                if user_data:
-                    return User(**user_data)
-            else:
-                # Use in-memory database
-                user_data = memory_db.find_user_by_id(user_id)
-                if user_data:
-                    return User(**user_data)
-        except Exception as e:
-            logger.error(f"Error getting user by ID {user_id}: {str(e)}")
-            # Fallback to memory database
-            user_data = memory_db.find_user_by_id(user_id)
+            user_data = await repository.find_user_by_id(user_id)
             if user_data:
                 return User(**user_data)
+        except Exception as e:
+            logger.error(f"Error getting user by ID {user_id}: {str(e)}")
         
         return None
 
@@ -160,25 +107,8 @@ class AuthService:
             "updated_at": datetime.utcnow()
         }
         
-        try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                users_collection = db.users
-                
-                result = await users_collection.insert_one(user_data)
-                user_data["_id"] = result.inserted_id
-                
-                return User(**user_data)
-            else:
-                # Use in-memory database
-                user = memory_db.create_user(user_data)
-                return User(**user)
-        except Exception as e:
-            logger.error(f"Error creating user: {str(e)}")
-            # Fallback to memory database
-            user = memory_db.create_user(user_data)
-            return User(**user)
+        user = await repository.create_user(user_data)
+        return User(**user)
 
 # Create auth service instance
 auth_service = AuthService()
@@ -0,0 +1,161 @@
+"""
+In-process caches shared by the services.
+
+``TTLCache`` is a bounded LRU whose entries also expire after a TTL, so data
+cached in one worker goes stale for at most a few seconds. ``RequestMemo``
+memoizes values for the duration of a single HTTP request; the request scope
+is opened by the ``request_scope`` middleware in ``main.py``.
+"""
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+from contextvars import ContextVar
+from contextlib import contextmanager
+import threading
+import time
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry and hit-rate counters"""
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        _caches.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, optionally expiring sooner than the cache TTL"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl is None else min(ttl, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+_caches: List[TTLCache] = []
+
+_request_memo: ContextVar[Optional[Dict[Hashable, Any]]] = ContextVar("request_memo", default=None)
+
+class RequestMemo:
+    """Per-request memoization keyed by (namespace, key), a no-op outside a request scope"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        _memos.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        memo = _request_memo.get()
+        if memo is None:
+            return default
+        value = memo.get((self.namespace, key), _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        memo = _request_memo.get()
+        if memo is not None:
+            memo[(self.namespace, key)] = value
+
+    def invalidate(self, key: Hashable):
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.pop((self.namespace, key), None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+_memos: List[RequestMemo] = []
+
+@contextmanager
+def request_scope():
+    """Open a request memoization scope for the current context"""
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+def cache_stats() -> Dict[str, Any]:
+    """Statistics of every process cache and request memo"""
+    return {
+        "process": [cache.stats() for cache in _caches],
+        "request": [memo.stats() for memo in _memos]
+    }
+
+def clear_caches():
+    """Drop the entries of every process cache"""
+    for cache in _caches:
+        cache.clear()
@@ -0,0 +1,184 @@
+"""
+Application-scoped service container shared by every router.
+
+The container owns the long-lived resources: the Gemini client, the
+interview service, one interviewer agent per type, the live interview
+connections, the worker pools and the process caches. Each is registered as a ``Component`` with a factory and
+optional warm-up and close hooks. ``start()`` runs on application startup
+and builds every component up front; ``close()`` runs on shutdown in reverse
+order. A component asked for outside the application lifespan (scripts,
+the startup profile) is still constructed on first use. Construction and
+warm-up times are reported under /api/debug/metrics.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union, TYPE_CHECKING
+import inspect
+import time
+import logging
+
+if TYPE_CHECKING:
+    from .gemini_service import GeminiService
+    from .interview_service import InterviewService
+    from .live_interview import LiveInterviewRegistry
+    from ..agents.interviewer_agents import BaseInterviewer
+    from ..models.interview_models import InterviewerType
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[Any], Union[None, Awaitable[None]]]
+
+class Component:
+    """A container-owned resource with its factory and lifecycle hooks"""
+
+    def __init__(self, name: str, factory: Callable[[], Any],
+                 warm_up: Optional[Hook] = None, close: Optional[Hook] = None):
+        self.name = name
+        self.factory = factory
+        self.warm_up = warm_up
+        self.close = close
+
+async def _call_hook(hook: Hook, instance: Any):
+    result = hook(instance)
+    if inspect.isawaitable(result):
+        await result
+
+class ServiceContainer:
+    """Process-wide service instances with explicit startup and shutdown"""
+
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self.init_ms: Dict[str, float] = {}
+        self.warm_ms: Dict[str, float] = {}
+        self.started = False
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 warm_up: Optional[Hook] = None, close: Optional[Hook] = None):
+        """Add a component; components start in registration order and close in reverse"""
+        self._components[name] = Component(name, factory, warm_up, close)
+
+    def _get(self, name: str) -> Optional[Any]:
+        """The named component, constructed on first use; None if construction failed"""
+        if name in self._instances:
+            return self._instances[name]
+        if name in self._errors:
+            return None
+        started = time.perf_counter()
+        try:
+            self._instances[name] = self._components[name].factory()
+        except Exception as e:
+            logger.error(f"Failed to initialize {name} service: {str(e)}")
+            self._errors[name] = str(e)
+        finally:
+            self.init_ms[name] = round((time.perf_counter() - started) * 1000, 3)
+        return self._instances.get(name)
+
+    @property
+    def gemini(self) -> Optional["GeminiService"]:
+        return self._get("gemini")
+
+    @property
+    def interview(self) -> Optional["InterviewService"]:
+        return self._get("interview")
+
+    @property
+    def live_interviews(self) -> Optional["LiveInterviewRegistry"]:
+        return self._get("live_interviews")
+
+    def interviewer(self, interviewer_type: Union["InterviewerType", str]) -> "BaseInterviewer":
+        """The shared agent for an interviewer type (agents are stateless between requests)"""
+        from ..models.interview_models import InterviewerType
+        interviewers = self._get("interviewers")
+        if interviewers is None:
+            raise RuntimeError("Interviewer agents are unavailable")
+        try:
+            return interviewers[InterviewerType(interviewer_type)]
+        except (KeyError, ValueError):
+            raise ValueError(f"Unknown interviewer type: {interviewer_type}")
+
+    def _create_interviewers(self) -> Dict["InterviewerType", "BaseInterviewer"]:
+        from ..agents.interviewer_agents import InterviewerFactory
+        gemini = self.gemini
+        if gemini is None:
+            raise RuntimeError("Gemini service is unavailable")
+        return {
+            interviewer_type: InterviewerFactory.create_interviewer(interviewer_type, gemini)
+            for interviewer_type in InterviewerFactory.get_all_interviewer_types()
+        }
+
+    async def start(self):
+        """Construct every component and run its warm-up hook (application startup)"""
+        for name, component in self._components.items():
+            instance = self._get(name)
+            if instance is None or component.warm_up is None:
+                continue
+            started = time.perf_counter()
+            try:
+                await _call_hook(component.warm_up, instance)
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {str(e)}")
+            finally:
+                self.warm_ms[name] = round((time.perf_counter() - started) * 1000, 3)
+        self.started = True
+        logger.info(f"Service container started: {sorted(self._instances)}")
+
+    async def close(self):
+        """Run close hooks in reverse order and drop every instance (application shutdown)"""
+        for name in reversed(list(self._components)):
+            component = self._components[name]
+            instance = self._instances.pop(name, None)
+            if instance is None or component.close is None:
+                continue
+            try:
+                await _call_hook(component.close, instance)
+            except Exception as e:
+                logger.error(f"Error closing {name}: {str(e)}")
+        self._errors.clear()
+        self.started = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "components": list(self._components),
+            "initialized": sorted(self._instances),
+            "failed": dict(self._errors),
+            "init_ms": dict(self.init_ms),
+            "warm_ms": dict(self.warm_ms)
+        }
+
+def _create_gemini():
+    from .gemini_service import GeminiService
+    return GeminiService()
+
+def _create_interview():
+    from .interview_service import InterviewService
+    return InterviewService()
+
+def _create_live_interviews():
+    from .live_interview import live_interviews
+    return live_interviews
+
+def _create_worker_pools() -> List[Any]:
+    from .worker_pool import all_pools
+    return all_pools()
+
+def _start_worker_pools(pools: List[Any]):
+    for pool in pools:
+        pool.start()
+
+def _shutdown_worker_pools(pools: List[Any]):
+    for pool in pools:
+        pool.shutdown()
+
+def _create_caches():
+    from . import cache
+    return cache
+
+services = ServiceContainer()
+services.register("worker_pools", _create_worker_pools, warm_up=_start_worker_pools, close=_shutdown_worker_pools)
+services.register("caches", _create_caches, close=lambda cache: cache.clear_caches())
+services.register("gemini", _create_gemini)
+services.register("interview", _create_interview)
+services.register("interviewers", services._create_interviewers)
+# Closed first on shutdown, so open live interviews flush their writes while storage is still up
+services.register("live_interviews", _create_live_interviews, close=lambda registry: registry.close())
@@ -1,7 +1,7 @@
-import google.generativeai as genai
 from decouple import config
 import json
 from typing import List, Dict, Any
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,9 +12,23 @@ class GeminiService:
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
+        # Imported here because the SDK alone takes about half a second to load
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash')
     
+    async def warm_up(self, timeout: float = 10) -> None:
+        """Open the API channel (DNS, TLS, auth) with a token count, which is not billed"""
+        # The model uses the SDK's default client, so warming that client warms the model's channel
+        import google.ai.generativelanguage as glm
+        from google.generativeai import client
+        generative_client = client.get_default_generative_client()
+        request = glm.CountTokensRequest(
+            model=self.model.model_name,
+            contents=[glm.Content(parts=[glm.Part(text="ping")])]
+        )
+        await asyncio.to_thread(generative_client.count_tokens, request, timeout=timeout, retry=None)
+    
     async def generate_content(self, prompt: str) -> str:
         """Generate content using Gemini API"""
         try:
@@ -1,18 +1,37 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from ..database import get_database, is_connected
-from ..database.memory_db import memory_db
-from ..models.interview_models import InterviewSession, InterviewSummary
+from typing import List, Optional, Dict, Any, AsyncIterator
+from datetime import datetime, timedelta
+from ..database.repository import repository
+from ..database.storage import tombstone_horizon
+from ..models.interview_models import InterviewSession, InterviewSummary, InterviewRecording
 from ..models.user_models import User
+from .recording_storage import recording_storage
+from .cache import TTLCache, RequestMemo
+from decouple import config
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Session cache configuration (size 0 disables the process-level cache)
+SESSION_CACHE_SIZE = int(config("SESSION_CACHE_SIZE", default="1024"))
+SESSION_CACHE_TTL_SECONDS = float(config("SESSION_CACHE_TTL_SECONDS", default="5"))
+
+# Shared by every InterviewService instance, keyed by (session_id, user_id)
+session_cache = TTLCache("sessions", SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
+session_memo = RequestMemo("sessions")
+
+# Delta sync cursors trail the clock so writes stamped just before a sync are not skipped
+SESSION_SYNC_OVERLAP_SECONDS = float(config("SESSION_SYNC_OVERLAP_SECONDS", default="2"))
+
 class InterviewService:
     def __init__(self):
         pass
 
+    @staticmethod
+    def _invalidate_session(session_id: str, user_id: str):
+        session_memo.invalidate((session_id, user_id))
+        session_cache.invalidate((session_id, user_id))
+
     async def create_session(self, user: User, session_data: dict) -> InterviewSession:
         """Create a new interview session"""
         session_id = str(uuid.uuid4())
@@ -21,227 +40,174 @@ class InterviewService:
             id=session_id,  # Set the MongoDB _id to the same value as session_id
             session_id=session_id,
             user_id=str(user.id),
-            interviewer_type=session_data["interviewer_type"],            difficulty=session_data["difficulty"],
+            interviewer_type=session_data["interviewer_type"],
+            difficulty=session_data["difficulty"],
             job_description=session_data["job_description"],
             resume_text=session_data["resume_text"],
+            resume_id=session_data.get("resume_id"),
             questions=session_data.get("questions", []),
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
         
-        try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                session_dict = session.dict(by_alias=True)
-                result = await sessions_collection.insert_one(session_dict)
-                
-                # Verify the session was actually saved
-                saved_session = await sessions_collection.find_one({"session_id": session_id})
-                if saved_session:
-                    logger.info(f"Session {session_id} successfully saved to MongoDB")
-                else:
-                    logger.error(f"Session {session_id} failed to save to MongoDB - falling back to memory")
-                    raise Exception("MongoDB save verification failed")
-            else:
-                logger.warning("MongoDB not connected - using memory database")
-                # Use in-memory database
-                session_dict = session.dict()
-                memory_db.create_session(session_dict)
-                logger.info(f"Created session {session_id} in memory database")
-        except Exception as e:
-            logger.error(f"Error creating session in MongoDB: {str(e)}")
-            # Fallback to memory database
-            session_dict = session.dict()
-            memory_db.create_session(session_dict)
-            logger.info(f"Created session {session_id} in memory database (fallback)")
-        
+        await repository.create_session(session.dict(by_alias=True))
         return session
 
     async def get_session(self, session_id: str, user_id: str) -> Optional[InterviewSession]:
         """Get interview session by ID for specific user"""
-        try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                
-                session_data = await sessions_collection.find_one({
-                    "session_id": session_id,
-                    "user_id": user_id
-                })
-                
-                if session_data:
-                    return InterviewSession(**session_data)
-            else:
-                # Use in-memory database
-                session_data = memory_db.find_session(session_id, user_id)
-                if session_data:
-                    return InterviewSession(**session_data)
-        except Exception as e:
-            logger.error(f"Error getting session: {str(e)}")
-            # Fallback to memory database
-            session_data = memory_db.find_session(session_id, user_id)
-            if session_data:
-                return InterviewSession(**session_data)
-        
-        return None
+        key = (session_id, user_id)
+        session = session_memo.get(key)
+        if session is not None:
+            return session
+
+        cached = session_cache.get(key)
+        if cached is not None:
+            # Callers may modify the model, so each request gets its own copy
+            session = cached.copy(deep=True)
+        else:
+            try:
+                session_data = await repository.find_session(session_id, user_id)
+            except Exception as e:
+                logger.error(f"Error getting session: {str(e)}")
+                return None
+            if not session_data:
+                return None
+            session = InterviewSession(**session_data)
+            session_cache.set(key, session.copy(deep=True))
+
+        session_memo.set(key, session)
+        return session
 
     async def add_answer(self, session_id: str, user_id: str, answer: str, feedback: dict) -> bool:
         """Add answer and feedback to session"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                
-                result = await sessions_collection.update_one(
-                    {"session_id": session_id, "user_id": user_id},
-                    {
-                        "$push": {
-                            "answers": answer,
-                            "feedback": feedback
-                        },
-                        "$set": {"updated_at": datetime.utcnow()}
-                    }
-                )
-                return result.modified_count > 0
-            else:
-                # Use in-memory database
-                session_data = memory_db.find_session(session_id, user_id)
-                if session_data:
-                    session_data["answers"].append(answer)
-                    session_data["feedback"].append(feedback)
-                    session_data["updated_at"] = datetime.utcnow()
-                    return True
+            return await repository.add_answer(session_id, user_id, answer, feedback)
         except Exception as e:
             logger.error(f"Error adding answer: {str(e)}")
-            # Fallback to memory database
-            session_data = memory_db.find_session(session_id, user_id)
-            if session_data:
-                session_data["answers"].append(answer)
-                session_data["feedback"].append(feedback)
-                session_data["updated_at"] = datetime.utcnow()
-                return True
-        
-        return False
+            return False
+        finally:
+            self._invalidate_session(session_id, user_id)
 
     async def update_session_completion(self, session_id: str, user_id: str, completed: bool) -> bool:
         """Update session completion status"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                
-                result = await sessions_collection.update_one(
-                    {"session_id": session_id, "user_id": user_id},
-                    {
-                        "$set": {
-                            "completed": completed,
-                            "updated_at": datetime.utcnow()
-                        }
-                    }
-                )
-                return result.modified_count > 0
-            else:
-                # Use in-memory database
-                session_data = memory_db.find_session(session_id, user_id)
-                if session_data:
-                    session_data["completed"] = completed
-                    session_data["updated_at"] = datetime.utcnow()
-                    return True
+            return await repository.update_session(session_id, user_id, {"completed": completed})
         except Exception as e:
             logger.error(f"Error updating session completion: {str(e)}")
-            # Fallback to memory database
-            session_data = memory_db.find_session(session_id, user_id)
-            if session_data:
-                session_data["completed"] = completed
-                session_data["updated_at"] = datetime.utcnow()
-                return True
-        
-        return False
+            return False
+        finally:
+            self._invalidate_session(session_id, user_id)
 
     async def get_user_sessions(self, user_id: str) -> List[InterviewSession]:
         """Get all sessions for a user"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                
-                cursor = sessions_collection.find({"user_id": user_id})
-                sessions = []
-                async for session_data in cursor:
-                    sessions.append(InterviewSession(**session_data))
-                return sessions
-            else:
-                # Use in-memory database
-                sessions_data = memory_db.find_sessions_by_user(user_id)
-                return [InterviewSession(**session) for session in sessions_data]
-        except Exception as e:
-            logger.error(f"Error getting user sessions: {str(e)}")            # Fallback to memory database
-            sessions_data = memory_db.find_sessions_by_user(user_id)
+            sessions_data = await repository.find_sessions_by_user(user_id)
             return [InterviewSession(**session) for session in sessions_data]
+        except Exception as e:
+            logger.error(f"Error getting user sessions: {str(e)}")
+            return []
+
+    async def get_session_version(self, session_id: str, user_id: str) -> Optional[datetime]:
+        """A session's updated_at, looked up without loading the session"""
+        try:
+            return await repository.find_session_version(session_id, user_id)
+        except Exception as e:
+            logger.error(f"Error getting session version: {str(e)}")
+            return None
+
+    async def get_sessions_version(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Count and latest updated_at of a user's sessions, from the index alone"""
+        try:
+            return await repository.find_sessions_version(user_id)
+        except Exception as e:
+            logger.error(f"Error getting sessions version: {str(e)}")
+            return None
+
+    async def get_session_changes(self, user_id: str, since: Optional[datetime]) -> Dict[str, Any]:
+        """Sessions created, updated or deleted after a sync cursor
+
+        Without a cursor, or with one older than the retained tombstones, every
+        session is returned with ``full`` set. ``cursor`` is where the next sync
+        resumes from.
+        """
+        started = datetime.utcnow()
+        cursor = started - timedelta(seconds=SESSION_SYNC_OVERLAP_SECONDS)
+        if since is None or since < tombstone_horizon():
+            return {"full": True, "sessions": await self.get_user_sessions(user_id), "deleted": [], "cursor": cursor}
+
+        sessions_data = await repository.find_sessions_updated_since(user_id, since)
+        tombstones = await repository.find_session_tombstones(user_id, since)
+        return {
+            "full": False,
+            "sessions": [InterviewSession(**session) for session in sessions_data],
+            "deleted": [tombstone["session_id"] for tombstone in tombstones],
+            "cursor": max(cursor, since)
+        }
+
+    @staticmethod
+    def summary_payload(session: InterviewSession, overall_summary: Any) -> Dict[str, Any]:
+        """The interview summary response for a session and its generated overall summary"""
+        scores = []
+        for feedback in session.feedback:
+            if isinstance(feedback, dict) and 'score' in feedback:
+                try:
+                    scores.append(float(feedback['score']))
+                except (ValueError, TypeError):
+                    continue
+        average_score = sum(scores) / len(scores) if scores else 0
+        
+        return {
+            "session_id": session.session_id,
+            "interviewer_type": session.interviewer_type.value,
+            "difficulty": session.difficulty.value,
+            "total_questions": len(session.questions),
+            "answered_questions": len(session.answers),
+            "average_score": round(average_score, 2),
+            "individual_feedback": session.feedback,
+            "overall_summary": overall_summary,
+            "qa_pairs": [
+                {
+                    "question": q,
+                    "answer": a,
+                    "feedback": f
+                }
+                for q, a, f in zip(session.questions, session.answers, session.feedback)
+            ]
+        }
 
     async def delete_session(self, session_id: str, user_id: str) -> bool:
         """Delete a session and all its related recordings"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                sessions_collection = db.interview_sessions
-                recordings_collection = db.interview_recordings
-                
-                # First, delete all recordings associated with this session
-                recordings_result = await recordings_collection.delete_many({
-                    "session_id": session_id
-                })
-                logger.info(f"Deleted {recordings_result.deleted_count} recordings for session {session_id}")
-                
-                # Then delete the session itself
-                session_result = await sessions_collection.delete_one({
-                    "session_id": session_id,
-                    "user_id": user_id
-                })
-                
-                session_deleted = session_result.deleted_count > 0
-                if session_deleted:
-                    logger.info(f"Successfully deleted session {session_id} and {recordings_result.deleted_count} associated recordings")
-                else:
-                    logger.warning(f"Session {session_id} not found or not owned by user {user_id}")
-                
-                return session_deleted
-            else:
-                # Use in-memory database
-                # Delete recordings from memory
-                if hasattr(memory_db, 'recordings'):
-                    recordings_to_delete = [rid for rid, rec in memory_db.recordings.items() 
-                                          if rec.get('session_id') == session_id]
-                    for rid in recordings_to_delete:
-                        del memory_db.recordings[rid]
-                    logger.info(f"Deleted {len(recordings_to_delete)} recordings from memory for session {session_id}")
-                
-                # Delete session from memory
-                return memory_db.delete_session(session_id, user_id)
+            # Usually memoized by the route's ownership check
+            session = await self.get_session(session_id, user_id)
+            if not session:
+                logger.warning(f"Session {session_id} not found or not owned by user {user_id}")
+                return False
+            
+            # First, delete all recordings (and their streamed audio blobs) for this session
+            deleted_recordings = await repository.delete_recordings_by_session(session_id)
+            for recording in deleted_recordings:
+                await recording_storage.delete(recording)
+            
+            # Then delete the session itself
+            session_deleted = await repository.delete_session(session_id, user_id)
+            self._invalidate_session(session_id, user_id)
+            if session_deleted:
+                logger.info(f"Successfully deleted session {session_id} and {len(deleted_recordings)} associated recordings")
+            return session_deleted
         except Exception as e:
             logger.error(f"Error deleting session and recordings: {str(e)}")
-            # Fallback to memory database
-            # Delete recordings from memory
-            if hasattr(memory_db, 'recordings'):
-                recordings_to_delete = [rid for rid, rec in memory_db.recordings.items() 
-                                      if rec.get('session_id') == session_id]
-                for rid in recordings_to_delete:
-                    del memory_db.recordings[rid]
-            
-            return memory_db.delete_session(session_id, user_id)
+            return False
 
     async def get_user_stats(self, user_id: str) -> dict:
         """Get user statistics"""
+        sessions = await self.get_user_sessions(user_id)
+        return self.summarize_user_stats(sessions)
+    
+    @staticmethod
+    def summarize_user_stats(sessions: List[InterviewSession]) -> dict:
+        """Compute user statistics from already loaded sessions"""
         try:
-            sessions = await self.get_user_sessions(user_id)
-            
             total_sessions = len(sessions)
             completed_sessions = sum(1 for s in sessions if getattr(s, 'completed', False))
             total_questions = sum(len(s.questions) for s in sessions)
@@ -282,8 +248,6 @@ class InterviewService:
     async def save_recording(self, recording_data: dict) -> str:
         """Save audio recording to database"""
         try:
-            from ..models.interview_models import InterviewRecording
-            
             # Generate custom recording ID
             recording_id = str(uuid.uuid4())
             
@@ -297,70 +261,57 @@ class InterviewService:
                 duration=recording_data['duration'],
                 transcript=recording_data.get('transcript', ''),
                 file_size=recording_data['file_size'],
-                mime_type=recording_data['mime_type'],                created_at=recording_data['created_at']
+                mime_type=recording_data['mime_type'],
+                created_at=recording_data['created_at']
             )
             
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                recordings_collection = db.interview_recordings
-                result = await recordings_collection.insert_one(recording.dict(by_alias=True))
-                logger.info(f"Recording saved to MongoDB for session: {recording_data['session_id']}")
-            else:
-                # Use in-memory database (simplified storage)
-                if not hasattr(memory_db, 'recordings'):
-                    memory_db.recordings = {}
-                memory_db.recordings[recording_id] = recording.dict()
-                logger.info(f"Recording saved to memory database")
-                
+            await repository.create_recording(recording.dict())
             return recording_id
             
         except Exception as e:
             logger.error(f"Error saving recording: {str(e)}")
             raise
 
+    async def save_recording_stream(self, recording_data: dict, chunks: AsyncIterator[bytes]) -> str:
+        """Stream audio straight into blob storage and save the recording metadata"""
+        recording_id = str(uuid.uuid4())
+        stored = await recording_storage.store_stream(
+            recording_id,
+            chunks,
+            recording_data['mime_type'],
+            metadata={
+                "session_id": str(recording_data['session_id']),
+                "user_id": str(recording_data['user_id'])
+            }
+        )
+        
+        recording = InterviewRecording(
+            recording_id=recording_id,
+            user_id=str(recording_data['user_id']),
+            session_id=str(recording_data['session_id']),
+            question_index=recording_data['question_index'],
+            storage=stored['storage'],
+            duration=recording_data['duration'],
+            transcript=recording_data.get('transcript', ''),
+            file_size=stored['file_size'],
+            mime_type=recording_data['mime_type'],
+            created_at=recording_data['created_at']
+        )
+        
+        try:
+            await repository.create_recording(recording.dict())
+        except Exception as e:
+            logger.error(f"Error saving streamed recording metadata: {str(e)}")
+            await recording_storage.delete(recording.dict())
+            raise
+        return recording_id
+
     async def get_session_recordings(self, session_id: str) -> List[dict]:
         """Get all recordings for a specific session"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                recordings_collection = db.interview_recordings
-                
-                # Query by session_id as string (no ObjectId conversion needed)
-                cursor = recordings_collection.find({
-                    "session_id": session_id
-                }).sort("question_index", 1)
-                recordings = []
-                async for recording in cursor:
-                    # Use recording_id if available, otherwise use _id
-                    recording_id = recording.get('_id', str(recording.get('_id')))
-                    recording["recording_id"] = recording_id
-                    recording["user_id"] = str(recording["user_id"])
-                    # session_id is already a string, no conversion needed
-                    # Don't include large audio_data in list response
-                    recording.pop("audio_data", None)
-                    recordings.append(recording)
-                    
-                return recordings
-            else:
-                # Use in-memory database
-                if not hasattr(memory_db, 'recordings'):
-                    return []
-                    
-                recordings = []
-                for recording_id, recording in memory_db.recordings.items():
-                    if recording.get('session_id') == session_id:
-                        # Don't include large audio_data in list response
-                        recording_copy = recording.copy()
-                        recording_copy.pop("audio_data", None)
-                        recording_copy['_id'] = recording_id
-                        recordings.append(recording_copy)
-                # Sort by question_index
-                recordings.sort(key=lambda x: x.get('question_index', 0))
-                logger.info(f"Retrieved {len(recordings)} recordings for session {session_id} from memory")
-                return recordings
-                
+            recordings = await repository.find_recordings_by_session(session_id)
+            logger.info(f"Retrieved {len(recordings)} recordings for session {session_id}")
+            return recordings
         except Exception as e:
             logger.error(f"Error getting session recordings: {str(e)}")
             raise
@@ -368,32 +319,7 @@ class InterviewService:
     async def get_recording(self, recording_id: str) -> Optional[dict]:
         """Get a specific recording including audio data"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                recordings_collection = db.interview_recordings
-                
-                # Query by recording_id field instead of _id ObjectId
-                query = {"_id": recording_id}  # Since recording_id is stored as _id
-                
-                recording = await recordings_collection.find_one(query)
-                
-                if recording:
-                    recording["recording_id"] = str(recording["_id"])
-                    recording["user_id"] = str(recording["user_id"])
-                    # session_id is already a string, no conversion needed
-                    return recording
-                else:
-                    return None
-            else:
-                # Use in-memory database
-                if hasattr(memory_db, 'recordings') and recording_id in memory_db.recordings:
-                    recording = memory_db.recordings[recording_id].copy()
-                    recording['_id'] = recording_id
-                    return recording
-                else:
-                    return None
-                    
+            return await repository.find_recording(recording_id)
         except Exception as e:
             logger.error(f"Error getting recording {recording_id}: {str(e)}")
             return None
@@ -401,19 +327,7 @@ class InterviewService:
     async def get_session_recordings_count(self, session_id: str) -> int:
         """Get count of recordings for a session (for delete confirmation)"""
         try:
-            if is_connected():
-                # Use MongoDB
-                db = get_database()
-                recordings_collection = db.interview_recordings
-                count = await recordings_collection.count_documents({"session_id": session_id})
-                return count
-            else:
-                # Use in-memory database
-                if hasattr(memory_db, 'recordings'):
-                    count = sum(1 for rec in memory_db.recordings.values() 
-                              if rec.get('session_id') == session_id)
-                    return count
-                return 0
+            return await repository.count_recordings_by_session(session_id)
         except Exception as e:
             logger.error(f"Error counting session recordings: {str(e)}")
             return 0
@@ -0,0 +1,351 @@
+"""
+Live interview state for the WebSocket channel (/api/interview/live).
+
+Over HTTP every turn re-authenticates and reloads the session before the
+interviewer agent is called. A ``LiveInterview`` belongs to one authenticated
+connection and keeps its session in memory instead, so a turn costs the
+evaluation call and nothing else. Results are pushed to the client as they
+complete (the evaluation, then the follow-up question; summary progress),
+while the session writes go through a per-connection queue that a
+background writer persists in order and acknowledges. An answer whose write
+fails is rolled back from the in-memory session (with any answers after it),
+so the session never runs ahead of what is stored. Writes still queued when
+the connection closes are flushed before the connection is released, and on
+shutdown for every open connection.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from datetime import datetime
+from decouple import config
+from ..models.interview_models import InterviewSession
+from ..models.user_models import User
+from .container import services
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Live interview channel configuration
+LIVE_INTERVIEW_AUTH_TIMEOUT_SECONDS = float(config("LIVE_INTERVIEW_AUTH_TIMEOUT_SECONDS", default="10"))
+LIVE_INTERVIEW_MAX_PENDING_WRITES = int(config("LIVE_INTERVIEW_MAX_PENDING_WRITES", default="32"))
+LIVE_INTERVIEW_FLUSH_TIMEOUT_SECONDS = float(config("LIVE_INTERVIEW_FLUSH_TIMEOUT_SECONDS", default="30"))
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Write = Callable[[], Awaitable[Any]]
+Rollback = Callable[[], Dict[str, Any]]
+
+class LiveInterviewError(Exception):
+    """A client message that cannot be applied to the live session"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+class LiveInterview:
+    """In-memory state, pushed results and ordered background writes of one live connection"""
+
+    def __init__(self, user: User, send: Send, registry: "LiveInterviewRegistry"):
+        self.user = user
+        self.user_id = str(user.id)
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.registry = registry
+        self.session: Optional[InterviewSession] = None
+        self._evaluation: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._writes: asyncio.Queue = asyncio.Queue(maxsize=LIVE_INTERVIEW_MAX_PENDING_WRITES)
+        self._writer: Optional[asyncio.Task] = None
+        self.connected = True
+
+    async def push(self, message: Dict[str, Any]):
+        """Send a message unless the client is gone (pending work still completes)"""
+        if not self.connected:
+            return
+        try:
+            async with self._send_lock:
+                await self._send(message)
+        except Exception as e:
+            logger.info(f"Live interview client of user {self.user_id} went away: {str(e)}")
+            self.connected = False
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # Session state
+    @property
+    def evaluating(self) -> bool:
+        return self._evaluation is not None and not self._evaluation.done()
+
+    def check_idle(self):
+        if self.evaluating:
+            raise LiveInterviewError("The previous answer is still being evaluated", status_code=409)
+
+    def attach(self, session: InterviewSession):
+        """Make a started or resumed session the one this connection works on"""
+        self.check_idle()
+        # A private copy: the session may be shared through the session cache
+        self.session = session.copy(deep=True)
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def _require_session(self) -> InterviewSession:
+        if self.session is None:
+            raise LiveInterviewError("Start or resume an interview first", status_code=409)
+        return self.session
+
+    # Ordered background persistence
+    async def _persist(self, label: str, write: Write, ack: Optional[Callable[[Any], Dict[str, Any]]] = None,
+                       rollback: Optional[Rollback] = None):
+        """Queue a write; waits only when LIVE_INTERVIEW_MAX_PENDING_WRITES are already pending"""
+        self.registry.writes_queued += 1
+        await self._writes.put((label, write, ack, rollback))
+
+    async def _write_loop(self):
+        while True:
+            label, write, ack, rollback = await self._writes.get()
+            started = time.perf_counter()
+            try:
+                result = await write()
+                if result is False:
+                    raise RuntimeError("storage rejected the write")
+                self.registry.writes += 1
+                self.registry.write_ms += (time.perf_counter() - started) * 1000
+                if ack is not None:
+                    await self.push(ack(result))
+            except Exception as e:
+                self.registry.write_failures += 1
+                logger.error(f"Live interview could not save {label}: {str(e)}")
+                undone = rollback() if rollback is not None else {}
+                await self.push({
+                    "type": "error", "status_code": 500, "detail": f"Could not save {label}: {str(e)}", **undone
+                })
+            finally:
+                self._writes.task_done()
+
+    # Answers
+    def submit_answer(self, answer: str, follow_up: bool = False, message_id: Any = None) -> int:
+        """Start evaluating an answer to the current question and return its index"""
+        session = self._require_session()
+        self.check_idle()
+        if not answer or not answer.strip():
+            raise LiveInterviewError("answer is required")
+        index = len(session.answers)
+        if index >= len(session.questions):
+            raise LiveInterviewError("All questions have been answered")
+        interviewer = services.interviewer(session.interviewer_type)
+        self._evaluation = self._spawn(self._evaluate(interviewer, index, answer, follow_up, message_id))
+        self.registry.turns += 1
+        return index
+
+    async def _evaluate(self, interviewer, index: int, answer: str, follow_up: bool, message_id: Any):
+        session = self.session
+        question = session.questions[index]
+        try:
+            evaluation = await interviewer.evaluate_answer(question, answer, session.job_description)
+        except Exception as e:
+            logger.error(f"Error evaluating live answer: {str(e)}")
+            await self.push({
+                "type": "error", "id": message_id, "status_code": 500, "question_index": index,
+                "detail": f"Error submitting answer: {str(e)}"
+            })
+            return
+
+        if len(session.answers) != index:
+            # An earlier answer failed to save and was rolled back while this one was evaluated
+            await self.push({
+                "type": "error", "id": message_id, "status_code": 409, "question_index": index,
+                "detail": "An earlier answer was not saved, answer it again first",
+                "current_question": len(session.answers)
+            })
+            return
+        session.answers.append(answer)
+        session.feedback.append(evaluation)
+        session.updated_at = datetime.utcnow()
+
+        async def write():
+            if len(session.answers) <= index:
+                raise RuntimeError("an earlier answer was not saved")
+            return await services.interview.add_answer(session.session_id, self.user_id, answer, evaluation)
+
+        def rollback() -> Dict[str, Any]:
+            # Later answers go too: the stored session must not skip one
+            del session.answers[index:]
+            del session.feedback[index:]
+            return {"question_index": index, "current_question": len(session.answers)}
+
+        await self._persist(
+            f"answer {index + 1}",
+            write,
+            lambda _: {"type": "answer_saved", "session_id": session.session_id, "question_index": index},
+            rollback
+        )
+        await self.push({
+            "type": "evaluation",
+            "id": message_id,
+            "session_id": session.session_id,
+            "question_index": index,
+            "question": question,
+            "answer": answer,
+            "evaluation": evaluation,
+            "current_question": index + 1,
+            "total_questions": len(session.questions),
+            "completed": index + 1 >= len(session.questions)
+        })
+        if follow_up:
+            # Not awaited, so the next answer is accepted while the follow-up is generated
+            self._spawn(self._follow_up(interviewer, index, question, answer, message_id))
+
+    async def _follow_up(self, interviewer, index: int, question: str, answer: str, message_id: Any):
+        try:
+            follow_up = await interviewer.get_follow_up_question(question, answer)
+        except Exception as e:
+            logger.error(f"Error generating live follow-up question: {str(e)}")
+            await self.push({
+                "type": "error", "id": message_id, "status_code": 500, "question_index": index,
+                "detail": f"Error generating follow-up question: {str(e)}"
+            })
+            return
+        await self.push({
+            "type": "follow_up",
+            "id": message_id,
+            "question_index": index,
+            "original_question": question,
+            "follow_up_question": follow_up.strip()
+        })
+
+    # Recordings
+    async def save_recording(self, message: Dict[str, Any], message_id: Any = None):
+        """Queue a recording of the current session for saving"""
+        session = self._require_session()
+        missing_fields = [
+            field for field in ("question_index", "audio_data", "duration", "file_size")
+            if message.get(field) in (None, "")
+        ]
+        if missing_fields:
+            raise LiveInterviewError(f"Missing required fields: {', '.join(missing_fields)}")
+        recording_data = {
+            'user_id': self.user_id,
+            'session_id': session.session_id,
+            'question_index': message['question_index'],
+            'audio_data': message['audio_data'],
+            'duration': message['duration'],
+            'transcript': message.get('transcript', ''),
+            'file_size': message['file_size'],
+            'mime_type': message.get('mime_type', 'audio/webm'),
+            'created_at': datetime.now()
+        }
+        await self._persist(
+            f"recording {message['question_index']}",
+            lambda: services.interview.save_recording(recording_data),
+            lambda recording_id: {
+                "type": "recording_saved", "id": message_id,
+                "question_index": recording_data['question_index'], "recording_id": str(recording_id)
+            }
+        )
+
+    # Summary
+    def request_summary(self, message_id: Any = None):
+        """Generate the summary in the background, pushing progress as it goes"""
+        session = self._require_session()
+        self._spawn(self._summarize(session, message_id))
+
+    async def _summarize(self, session: InterviewSession, message_id: Any):
+        if self.evaluating:
+            await self.push({"type": "summary_progress", "id": message_id, "stage": "waiting_for_evaluation"})
+            await asyncio.shield(self._evaluation)
+        if not session.answers:
+            await self.push({"type": "error", "id": message_id, "status_code": 400, "detail": "No answers submitted yet"})
+            return
+
+        await self.push({"type": "summary_progress", "id": message_id, "stage": "generating"})
+        try:
+            summary = await services.gemini.generate_interview_summary(
+                session.questions,
+                session.answers,
+                session.interviewer_type.value
+            )
+        except Exception as e:
+            logger.error(f"Error generating live summary: {str(e)}")
+            await self.push({"type": "error", "id": message_id, "status_code": 500, "detail": f"Error generating summary: {str(e)}"})
+            return
+
+        await self._persist(
+            "session completion",
+            lambda: services.interview.update_session_completion(session.session_id, self.user_id, True)
+        )
+        await self.push({"type": "summary", "id": message_id, **services.interview.summary_payload(session, summary)})
+
+    # Shutdown
+    async def close(self, timeout: float = LIVE_INTERVIEW_FLUSH_TIMEOUT_SECONDS):
+        """Let in-flight evaluations finish and flush every queued write"""
+        self.connected = False
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.registry.dropped_writes += self._writes.qsize()
+            logger.error(
+                f"Live interview of user {self.user_id} closed with {self._writes.qsize()} unsaved writes "
+                f"after {timeout}s"
+            )
+        for task in list(self._tasks):
+            task.cancel()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
+    async def _drain(self):
+        # Evaluations and summaries still queue writes, so wait for them before the queue
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self._writer is not None:
+            await self._writes.join()
+
+class LiveInterviewRegistry:
+    """Open live interview connections and their counters"""
+
+    def __init__(self):
+        self.active: Set[LiveInterview] = set()
+        self.connections = 0
+        self.auth_failures = 0
+        self.turns = 0
+        self.writes_queued = 0
+        self.writes = 0
+        self.write_failures = 0
+        self.dropped_writes = 0
+        self.write_ms = 0.0
+
+    def open(self, user: User, send: Send) -> LiveInterview:
+        live = LiveInterview(user, send, self)
+        self.active.add(live)
+        self.connections += 1
+        return live
+
+    async def release(self, live: LiveInterview):
+        """Flush a closed connection's writes and forget it"""
+        try:
+            await live.close()
+        finally:
+            self.active.discard(live)
+
+    async def close(self):
+        """Flush every open connection (application shutdown)"""
+        await asyncio.gather(*(self.release(live) for live in list(self.active)), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self.active),
+            "connections": self.connections,
+            "auth_failures": self.auth_failures,
+            "turns": self.turns,
+            "writes_queued": self.writes_queued,
+            "writes": self.writes,
+            "write_failures": self.write_failures,
+            "dropped_writes": self.dropped_writes,
+            "avg_write_ms": round(self.write_ms / self.writes, 3) if self.writes else None
+        }
+
+live_interviews = LiveInterviewRegistry()
@@ -0,0 +1,329 @@
+"""
+Streaming storage for interview recordings.
+
+Audio is written chunk by chunk, either into a GridFS bucket when MongoDB is
+connected or into a local directory otherwise, so peak memory per upload is
+bounded by the chunk size rather than by the recording length.
+"""
+from typing import AsyncIterator, Dict, List, Optional, Set, Any
+from datetime import datetime
+from decouple import config
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from ..database import get_database, is_connected
+from ..database.memory_db import memory_db
+from .upload_spool import UploadTooLargeError
+import aiofiles
+import aiofiles.os
+import asyncio
+import tempfile
+import json
+import uuid
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Recording upload configuration
+RECORDING_MAX_BYTES = int(config("RECORDING_MAX_BYTES", default=str(50 * 1024 * 1024)))
+RECORDING_CHUNK_SIZE = int(config("RECORDING_CHUNK_SIZE", default=str(256 * 1024)))
+RECORDING_STORAGE_DIR = config(
+    "RECORDING_STORAGE_DIR",
+    default=os.path.join(tempfile.gettempdir(), "interviewpilot_recordings")
+)
+RECORDING_UPLOAD_TTL_SECONDS = int(config("RECORDING_UPLOAD_TTL_SECONDS", default="86400"))
+RECORDING_UPLOAD_PURGE_INTERVAL_SECONDS = float(config("RECORDING_UPLOAD_PURGE_INTERVAL_SECONDS", default="3600"))
+GRIDFS_BUCKET_NAME = "recordings"
+
+
+class RecordingTooLargeError(UploadTooLargeError):
+    """Raised when an upload exceeds RECORDING_MAX_BYTES"""
+
+
+class UploadOffsetMismatchError(Exception):
+    """Raised when a resumable chunk does not start at the current offset"""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Upload offset mismatch, expected {expected}")
+        self.expected = expected
+
+
+class UploadNotFoundError(Exception):
+    """Raised when a resumable upload id is unknown or owned by another user"""
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def iter_file_chunks(path: str, chunk_size: int = RECORDING_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a file's content in fixed-size chunks"""
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class RecordingStorage:
+    """Stores recording audio blobs in GridFS or on local disk"""
+
+    def __init__(self, storage_dir: str = RECORDING_STORAGE_DIR, max_bytes: int = RECORDING_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(storage_dir, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._pending_deletes: Set[asyncio.Task] = set()
+
+    def _blob_path(self, recording_id: str) -> str:
+        # Recording ids are generated server side as UUIDs, basename() guards anyway
+        return os.path.join(self.blob_dir, os.path.basename(recording_id))
+
+    def _bucket(self) -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(get_database(), bucket_name=GRIDFS_BUCKET_NAME)
+
+    async def store_stream(self, recording_id: str, chunks: AsyncIterator[bytes],
+                           mime_type: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write an audio stream to storage, enforcing the size cap as bytes arrive"""
+        if is_connected():
+            try:
+                size = await self._store_gridfs(recording_id, chunks, mime_type, metadata or {})
+                return {"storage": "gridfs", "file_size": size}
+            except RecordingTooLargeError:
+                raise
+            except Exception as e:
+                # The stream may already be partially consumed, so we cannot
+                # transparently retry against local disk here
+                logger.error(f"Error writing recording {recording_id} to GridFS: {str(e)}")
+                raise
+
+        size = await self._store_local(recording_id, chunks)
+        return {"storage": "local", "file_size": size}
+
+    async def _store_gridfs(self, recording_id: str, chunks: AsyncIterator[bytes],
+                            mime_type: str, metadata: Dict[str, Any]) -> int:
+        grid_in = self._bucket().open_upload_stream_with_id(
+            recording_id,
+            recording_id,
+            chunk_size_bytes=RECORDING_CHUNK_SIZE,
+            metadata={**metadata, "mime_type": mime_type}
+        )
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise RecordingTooLargeError(f"Recording exceeds {self.max_bytes} bytes")
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        logger.info(f"Recording {recording_id} streamed to GridFS ({size} bytes)")
+        return size
+
+    async def _store_local(self, recording_id: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self._blob_path(recording_id)
+        size = 0
+        try:
+            async with aiofiles.open(path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise RecordingTooLargeError(f"Recording exceeds {self.max_bytes} bytes")
+                    await f.write(chunk)
+        except BaseException:
+            await self._remove_file(path)
+            raise
+        logger.info(f"Recording {recording_id} streamed to local storage ({size} bytes)")
+        return size
+
+    async def open_stream(self, recording: Dict[str, Any]) -> AsyncIterator[bytes]:
+        """Stream a stored recording back in chunks"""
+        recording_id = recording.get("recording_id") or recording.get("_id")
+        if recording.get("storage") == "gridfs":
+            grid_out = await self._bucket().open_download_stream(recording_id)
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            async for chunk in iter_file_chunks(self._blob_path(recording_id)):
+                yield chunk
+
+    async def delete(self, recording: Dict[str, Any]) -> None:
+        """Delete the blob backing a recording, if any"""
+        recording_id = recording.get("recording_id") or recording.get("_id")
+        storage = recording.get("storage")
+        try:
+            if storage == "gridfs" and is_connected():
+                await self._bucket().delete(recording_id)
+            elif storage == "local":
+                await self._remove_file(self._blob_path(recording_id))
+        except Exception as e:
+            logger.warning(f"Could not delete blob for recording {recording_id}: {str(e)}")
+
+    def delete_local_blob(self, recording: Dict[str, Any]) -> None:
+        """Remove a local blob when the memory DB evicts a recording (a sync listener)"""
+        if not recording or recording.get("storage") != "local":
+            return
+        path = self._blob_path(recording.get("recording_id") or recording.get("_id"))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Evictions while the memory DB loads happen before the event loop runs
+            _remove_quietly(path)
+            return
+        task = loop.create_task(asyncio.to_thread(_remove_quietly, path))
+        self._pending_deletes.add(task)
+        task.add_done_callback(self._pending_deletes.discard)
+
+    @staticmethod
+    async def _remove_file(path: str) -> None:
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ResumableUploadManager:
+    """
+    Offset-based resumable uploads.
+
+    Each upload keeps a small JSON state file and a ``.part`` data file on
+    local disk, so a client on a flaky connection can ask for the current
+    offset and continue from there, even across process restarts.
+    """
+
+    def __init__(self, storage_dir: str = RECORDING_STORAGE_DIR, max_bytes: int = RECORDING_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.upload_dir = os.path.join(storage_dir, "uploads")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._purger: Optional[asyncio.Task] = None
+        self.purged = 0
+
+    def _state_path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{os.path.basename(upload_id)}.json")
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{os.path.basename(upload_id)}.part")
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        if upload_id not in self._locks:
+            self._locks[upload_id] = asyncio.Lock()
+        return self._locks[upload_id]
+
+    async def _write_state(self, state: Dict[str, Any]) -> None:
+        async with aiofiles.open(self._state_path(state["upload_id"]), "w") as f:
+            await f.write(json.dumps(state))
+
+    async def get(self, upload_id: str, user_id: str) -> Dict[str, Any]:
+        """Load upload state, checking ownership"""
+        try:
+            async with aiofiles.open(self._state_path(upload_id), "r") as f:
+                state = json.loads(await f.read())
+        except (FileNotFoundError, ValueError):
+            raise UploadNotFoundError(upload_id)
+        if state.get("user_id") != user_id:
+            raise UploadNotFoundError(upload_id)
+        return state
+
+    async def create(self, user_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a new resumable upload"""
+        total_size = metadata.get("total_size")
+        if total_size is not None and int(total_size) > self.max_bytes:
+            raise RecordingTooLargeError(f"Recording exceeds {self.max_bytes} bytes")
+
+        upload_id = str(uuid.uuid4())
+        state = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "offset": 0,
+            "created_at": datetime.utcnow().isoformat(),
+            **metadata
+        }
+        async with aiofiles.open(self.part_path(upload_id), "wb"):
+            pass
+        await self._write_state(state)
+        return state
+
+    async def append(self, upload_id: str, user_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Append a chunk stream at the given offset and return the new state"""
+        async with self._lock(upload_id):
+            state = await self.get(upload_id, user_id)
+            if offset != state["offset"]:
+                raise UploadOffsetMismatchError(state["offset"])
+
+            size = state["offset"]
+            limit = min(self.max_bytes, int(state.get("total_size") or self.max_bytes))
+            try:
+                async with aiofiles.open(self.part_path(upload_id), "ab") as f:
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        if size > limit:
+                            raise RecordingTooLargeError(f"Recording exceeds {limit} bytes")
+                        await f.write(chunk)
+            finally:
+                # Persist whatever reached disk so the client can resume from it
+                state["offset"] = os.path.getsize(self.part_path(upload_id))
+                await self._write_state(state)
+            return state
+
+    async def discard(self, upload_id: str) -> None:
+        """Remove an upload's state and data files"""
+        for path in (self.part_path(upload_id), self._state_path(upload_id)):
+            await RecordingStorage._remove_file(path)
+        self._locks.pop(upload_id, None)
+
+    def _expired_uploads(self) -> List[str]:
+        cutoff = datetime.utcnow().timestamp() - RECORDING_UPLOAD_TTL_SECONDS
+        expired = []
+        for name in os.listdir(self.upload_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.upload_dir, name)) < cutoff:
+                    expired.append(name[:-len(".json")])
+            except FileNotFoundError:
+                pass  # Completed or discarded meanwhile
+        return expired
+
+    async def purge_expired(self) -> int:
+        """Remove uploads untouched for RECORDING_UPLOAD_TTL_SECONDS"""
+        expired = await asyncio.to_thread(self._expired_uploads)
+        for upload_id in expired:
+            await self.discard(upload_id)
+        self.purged += len(expired)
+        if expired:
+            logger.info(f"Purged {len(expired)} abandoned recording uploads")
+        return len(expired)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logger.error(f"Error purging recording uploads: {str(e)}")
+            await asyncio.sleep(RECORDING_UPLOAD_PURGE_INTERVAL_SECONDS)
+
+    def start(self):
+        """Purge abandoned uploads now and every RECORDING_UPLOAD_PURGE_INTERVAL_SECONDS"""
+        if self._purger is None:
+            self._purger = asyncio.create_task(self._purge_loop())
+
+    async def stop(self):
+        if self._purger is not None:
+            self._purger.cancel()
+            try:
+                await self._purger
+            except asyncio.CancelledError:
+                pass
+            self._purger = None
+
+
+recording_storage = RecordingStorage()
+memory_db.add_eviction_listener(recording_storage.delete_local_blob)
+upload_manager = ResumableUploadManager()
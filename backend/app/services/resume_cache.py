@@ -0,0 +1,116 @@
+"""
+Cache of parsed resumes keyed by the SHA-256 of their content.
+
+Users upload the same resume for every interview, so parse results are kept
+in a bounded in-process LRU and, for signed-in users, persisted per user
+through the repository. The digest doubles as a resume id that interview
+sessions can reference instead of storing their own copy of the text. Only
+the parsed fields are tied to PARSER_VERSION: the raw text stays readable by
+digest after a parser upgrade, so referenced resumes never have to be
+uploaded again.
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime
+from decouple import config
+from ..database.repository import repository
+from .cache import TTLCache
+from .resume_parser import PARSER_VERSION
+import copy
+import hashlib
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# In-process cache of parse results (size 0 disables it)
+RESUME_CACHE_SIZE = int(config("RESUME_CACHE_SIZE", default="256"))
+RESUME_CACHE_TTL_SECONDS = float(config("RESUME_CACHE_TTL_SECONDS", default="3600"))
+
+def digest_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def normalize_resume_text(text: str) -> str:
+    """Normalize pasted text so cosmetic differences hash the same"""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+def digest_text(text: str) -> str:
+    """Digest of already normalized resume text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ResumeCache:
+    """Parsed resumes by (user, digest): process LRU first, then the user's stored copy"""
+
+    def __init__(self):
+        self.memory = TTLCache("parsed-resumes", RESUME_CACHE_SIZE, RESUME_CACHE_TTL_SECONDS)
+        self.stored_hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: Optional[str], digest: str) -> Optional[Dict[str, Any]]:
+        """Parsed resume data, or None when it has to be parsed"""
+        key = (user_id, digest)
+        parsed = self.memory.get(key)
+        if parsed is not None:
+            return copy.deepcopy(parsed)
+
+        if user_id:
+            try:
+                stored = await repository.find_parsed_resume(user_id, digest)
+            except Exception as e:
+                logger.error(f"Error loading parsed resume: {str(e)}")
+                stored = None
+            if stored and stored.get("parser_version") == PARSER_VERSION:
+                self.stored_hits += 1
+                self.memory.set(key, stored["data"])
+                return copy.deepcopy(stored["data"])
+
+        self.misses += 1
+        return None
+
+    async def get_text(self, user_id: Optional[str], digest: str) -> Optional[str]:
+        """Raw text of a resume by digest, whichever parser version stored it"""
+        parsed = self.memory.get((user_id, digest))
+        if parsed is not None:
+            return parsed.get("raw_text", "")
+        if not user_id:
+            return None
+        try:
+            stored = await repository.find_parsed_resume(user_id, digest)
+        except Exception as e:
+            logger.error(f"Error loading resume text: {str(e)}")
+            return None
+        if not stored:
+            return None
+        if "raw_text" in stored:
+            return stored["raw_text"]
+        return (stored.get("data") or {}).get("raw_text")
+
+    async def put(self, user_id: Optional[str], digest: str, parsed: Dict[str, Any],
+                  filename: Optional[str] = None):
+        """Remember a parse result; persisted only for signed-in users"""
+        self.memory.set((user_id, digest), copy.deepcopy(parsed))
+        if not user_id:
+            return
+        try:
+            await repository.save_parsed_resume({
+                "user_id": user_id,
+                "digest": digest,
+                "parser_version": PARSER_VERSION,
+                "filename": filename,
+                # Kept outside the versioned parse result so it survives parser upgrades
+                "raw_text": parsed.get("raw_text", ""),
+                "data": parsed,
+                "updated_at": datetime.utcnow()
+            })
+        except Exception as e:
+            # The in-process copy still serves repeat uploads
+            logger.error(f"Error storing parsed resume: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "stored_hits": self.stored_hits,
+            "misses": self.misses
+        }
+
+resume_cache = ResumeCache()
@@ -1,75 +1,337 @@
-import PyPDF2
-import docx
+import io
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+from contextlib import contextmanager
+from decouple import config
+import asyncio
+import mmap
+import os
 import logging
-from textblob import TextBlob
+from .worker_pool import WorkerPool
+from .skill_matcher import get_skill_matcher
+
+# PyPDF2 and python-docx are imported on first use, mostly inside the worker
+# processes, so they stay off the web process's startup path
 
 logger = logging.getLogger(__name__)
 
+# Bump when the parsed output changes so cached parse results are not reused
+PARSER_VERSION = 1
+
+# Resume parsing runs in worker processes so PDF/DOCX extraction never blocks the event loop
+RESUME_PARSER_WORKERS = int(config("RESUME_PARSER_WORKERS", default="2"))
+RESUME_PARSE_TIMEOUT_SECONDS = float(config("RESUME_PARSE_TIMEOUT_SECONDS", default="30"))
+RESUME_PARSE_QUEUE_LIMIT = int(config("RESUME_PARSE_QUEUE_LIMIT", default="32"))
+RESUME_MAX_PAGES = int(config("RESUME_MAX_PAGES", default="50"))  # Later pages are ignored
+
+# PDFs longer than this are split into page ranges extracted by several workers
+RESUME_PARALLEL_PAGE_THRESHOLD = int(config("RESUME_PARALLEL_PAGE_THRESHOLD", default="8"))
+RESUME_PAGES_PER_JOB = int(config("RESUME_PAGES_PER_JOB", default="4"))
+# Extraction stops once this much text is gathered, far more than question generation needs
+RESUME_MAX_TEXT_CHARS = int(config("RESUME_MAX_TEXT_CHARS", default="100000"))
+
+# Section headings, classified once per line by a single precompiled pattern
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me"],
+    "experience": ["experience", "work history", "employment", "employment history"],
+    "education": ["education", "academic", "academics", "academic background", "qualification", "qualifications"],
+    "skills": ["skills", "skill", "competencies", "core competencies"],
+    "projects": ["projects", "project"],
+    "certifications": ["certifications", "certification", "certificates", "licenses"],
+    "achievements": ["achievements", "achievement", "awards", "honors"]
+}
+_HEADING_PATTERN = re.compile(
+    r"^[^a-z]*(?:(?:professional|work|relevant|technical|key|selected|other|career|academic)\s+)?(?:"
+    + "|".join(
+        rf"(?P<{section}>" + "|".join(sorted((re.escape(h) for h in headings), key=len, reverse=True)) + ")"
+        for section, headings in SECTION_HEADINGS.items()
+    )
+    + r")(?:\s*(?:&|and)\s+[a-z]+(?:\s+[a-z]+)?)?[\s:.\-]*$"
+)
+_HEADING_MAX_CHARS = 50
+
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_PATTERN = re.compile(r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+_ENTRY_SPLIT_PATTERN = re.compile(r'\n(?=\d{4}|\w+\s+\d{4})')
+_DEGREE_PATTERN = re.compile(
+    r'\b(bachelor|master|phd|doctorate|b\.?\s?sc|m\.?\s?sc|b\.?\s?tech|m\.?\s?tech|b\.?\s?a|m\.?\s?a'
+    r'|undergraduate|graduate|postgraduate'
+    r'|diploma|certificate)\b',
+    re.IGNORECASE
+)
+_YEAR_RANGE_PATTERN = re.compile(r'\d{4}\s*-?\s*(\d{4}|present|current)', re.IGNORECASE)
+_NAME_EXCLUDE_PATTERN = re.compile(r'@|\.com|phone|email')
+_LETTER_PATTERN = re.compile(r'[A-Za-z]')
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """Split resume text into sections in one pass over its lines
+
+    Each section holds the lines after its heading up to the next heading;
+    repeated headings of the same section are joined.
+    """
+    sections: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped and len(stripped) <= _HEADING_MAX_CHARS:
+            match = _HEADING_PATTERN.match(stripped.lower())
+            if match:
+                current = sections.setdefault(match.lastgroup, [])
+                continue
+        if current is not None:
+            current.append(line)
+    return {section: "\n".join(lines) for section, lines in sections.items()}
+
+resume_pool = WorkerPool(
+    "resume-parsing",
+    RESUME_PARSER_WORKERS,
+    queue_limit=RESUME_PARSE_QUEUE_LIMIT,
+    timeout=RESUME_PARSE_TIMEOUT_SECONDS,
+    kind="process"
+)
+
+# Resume content: the bytes themselves, or the path of an upload spooled to disk
+ResumeSource = Union[bytes, str]
+
+@contextmanager
+def open_source(source: ResumeSource, mapped: bool = True):
+    """Binary stream over resume content, memory-mapped when given a file path"""
+    if not isinstance(source, str):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        if not mapped:
+            yield f
+            return
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files cannot be mapped
+            yield f
+            return
+        with mapped:
+            yield mapped
+
+# One parser per worker process, created on its first job
+_worker_parser: Optional["ResumeParser"] = None
+
+def _get_worker_parser(max_pages: int) -> "ResumeParser":
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = ResumeParser()
+    _worker_parser.max_pages = max_pages
+    return _worker_parser
+
+def parse_resume_in_worker(source: ResumeSource, filename: str, max_pages: int = RESUME_MAX_PAGES,
+                           split_threshold: int = 0) -> Dict[str, Any]:
+    """Process pool entry point"""
+    return _get_worker_parser(max_pages).parse_resume_sync(source, filename, split_threshold)
+
+def extract_pdf_pages_in_worker(source: ResumeSource, start: int, end: int) -> List[str]:
+    """Process pool entry point for one page range of a split PDF"""
+    import PyPDF2
+    with open_source(source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        return ResumeParser._extract_pdf_pages(reader, start, end, RESUME_MAX_TEXT_CHARS)
+
+def parse_text_in_worker(text: str) -> Dict[str, Any]:
+    """Process pool entry point for already extracted text"""
+    parsed_data = _get_worker_parser(RESUME_MAX_PAGES)._parse_text(text)
+    parsed_data['raw_text'] = text
+    return parsed_data
+
+_WARM_UP_RESUME = """Jane Doe
+jane.doe@example.com | +1 555 010 0000
+
+EXPERIENCE
+Software Engineer, Example Corp (2019 - 2023)
+Built Python and React services on AWS.
+
+EDUCATION
+Bachelor of Science in Computer Science (2015 - 2019)
+"""
+
+def warm_up_worker() -> int:
+    """Process pool entry point for the startup warm-up; returns the worker's pid"""
+    # Load the deferred document libraries and the skill taxonomy ahead of the first upload
+    import PyPDF2
+    import docx
+    parse_text_in_worker(_WARM_UP_RESUME)
+    return os.getpid()
+
 class ResumeParser:
-    def __init__(self):
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        self.phone_pattern = r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+    def __init__(self, max_pages: int = RESUME_MAX_PAGES, max_text_chars: int = RESUME_MAX_TEXT_CHARS):
+        self.email_pattern = _EMAIL_PATTERN
+        self.phone_pattern = _PHONE_PATTERN
+        self.max_pages = max_pages
+        self.max_text_chars = max_text_chars
         
-    async def parse_resume(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Parse resume from uploaded file"""
+    async def parse_resume(self, source: ResumeSource, filename: str) -> Dict[str, Any]:
+        """Parse resume from uploaded file (bytes or a spooled file path) in the resume worker pool"""
         try:
-            # Extract text based on file type
-            if filename.endswith('.pdf'):
-                text = self._extract_text_from_pdf(file_content)
-            elif filename.endswith('.docx'):
-                text = self._extract_text_from_docx(file_content)
-            elif filename.endswith('.txt'):
-                text = file_content.decode('utf-8')
-            else:
-                raise ValueError("Unsupported file format")
-            
-            # Parse the extracted text
-            parsed_data = self._parse_text(text)
-            parsed_data['raw_text'] = text
-            
-            return parsed_data
-            
+            # Splitting only pays off with more than one worker and more than one core
+            can_split = resume_pool.max_workers > 1 and (os.cpu_count() or 1) > 1
+            split_threshold = RESUME_PARALLEL_PAGE_THRESHOLD if can_split else 0
+            parsed_data = await resume_pool.run(
+                parse_resume_in_worker, source, filename, self.max_pages, split_threshold
+            )
+            if "split_pages" not in parsed_data:
+                return parsed_data
+
+            # Large PDF: extract page ranges in parallel, then parse the joined text once
+            text = await self._extract_pdf_parallel(source, parsed_data["split_pages"])
+            return await resume_pool.run(parse_text_in_worker, text)
         except Exception as e:
             logger.error(f"Error parsing resume: {str(e)}")
             raise
+
+    async def _extract_pdf_parallel(self, source: ResumeSource, page_count: int) -> str:
+        """Extract page ranges across the pool, one wave of ranges per worker count"""
+        ranges = [
+            (start, min(start + RESUME_PAGES_PER_JOB, page_count))
+            for start in range(0, page_count, RESUME_PAGES_PER_JOB)
+        ]
+        pages: List[str] = []
+        gathered = 0
+        for wave_start in range(0, len(ranges), resume_pool.max_workers):
+            wave = ranges[wave_start:wave_start + resume_pool.max_workers]
+            results = await asyncio.gather(*[
+                resume_pool.run(extract_pdf_pages_in_worker, source, start, end)
+                for start, end in wave
+            ])
+            for page_texts in results:
+                pages.extend(page_texts)
+                gathered += sum(len(page_text) for page_text in page_texts)
+            if gathered >= self.max_text_chars:
+                break
+        return "\n".join(pages)
+
+    def parse_resume_sync(self, source: ResumeSource, filename: str, split_threshold: int = 0) -> Dict[str, Any]:
+        """Extract and parse a resume in the calling thread
+
+        With ``split_threshold`` set, PDFs longer than that many pages are not
+        extracted here; ``{"split_pages": n}`` is returned so the caller can
+        extract them in parallel.
+        """
+        # Extract text based on file type
+        if filename.endswith('.pdf'):
+            if split_threshold:
+                page_count = self._count_pdf_pages(source)
+                if page_count > split_threshold:
+                    return {"split_pages": page_count}
+            text = self._extract_text_from_pdf(source)
+        elif filename.endswith('.docx'):
+            text = self._extract_text_from_docx(source)
+        elif filename.endswith('.txt'):
+            with open_source(source) as stream:
+                text = stream.read().decode('utf-8')
+        else:
+            raise ValueError("Unsupported file format")
+        
+        # Parse the extracted text
+        parsed_data = self._parse_text(text)
+        parsed_data['raw_text'] = text
+        
+        return parsed_data
+
+    def _count_pdf_pages(self, source: ResumeSource) -> int:
+        import PyPDF2
+        try:
+            with open_source(source) as stream:
+                return min(len(PyPDF2.PdfReader(stream).pages), self.max_pages)
+        except Exception as e:
+            logger.error(f"Error reading PDF page count: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _extract_pdf_pages(reader: "PyPDF2.PdfReader", start: int, end: int, max_chars: int) -> List[str]:
+        """Text of pages [start, end), stopping early once ``max_chars`` are gathered"""
+        pages = []
+        gathered = 0
+        for index in range(start, end):
+            page_text = reader.pages[index].extract_text() or ""
+            pages.append(page_text)
+            gathered += len(page_text)
+            if gathered >= max_chars:
+                break
+        return pages
     
-    def _extract_text_from_pdf(self, file_content: bytes) -> str:
+    def _extract_text_from_pdf(self, source: ResumeSource) -> str:
         """Extract text from PDF file"""
+        import PyPDF2
         try:
-            import io
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
+            with open_source(source) as stream:
+                pdf_reader = PyPDF2.PdfReader(stream)
+                page_count = min(len(pdf_reader.pages), self.max_pages)
+                return "\n".join(self._extract_pdf_pages(pdf_reader, 0, page_count, self.max_text_chars))
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             return ""
     
-    def _extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file"""
+    @staticmethod
+    def _docx_table_lines(table) -> List[str]:
+        lines = []
+        for row in table.rows:
+            cells = []
+            for cell in row.cells:
+                # Merged cells repeat across the row
+                if cell.text and (not cells or cells[-1] != cell.text):
+                    cells.append(cell.text)
+            if cells:
+                lines.append(" | ".join(cells))
+        return lines
+
+    def _extract_text_from_docx(self, source: ResumeSource) -> str:
+        """Extract text from DOCX file: headers, then body paragraphs and tables in order"""
+        import docx
+        from docx.table import Table
         try:
-            import io
-            doc = docx.Document(io.BytesIO(file_content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            # The package is fully read when opened; zipfile needs a real file object, not a mapping
+            with open_source(source, mapped=False) as stream:
+                doc = docx.Document(stream)
+            lines: List[str] = []
+            gathered = 0
+
+            # Names and contact details often live in the page header
+            seen_headers = set()
+            for section in doc.sections:
+                for header in (section.first_page_header, section.header):
+                    if header.is_linked_to_previous:
+                        continue
+                    for paragraph in header.paragraphs:
+                        if paragraph.text.strip() and paragraph.text not in seen_headers:
+                            seen_headers.add(paragraph.text)
+                            lines.append(paragraph.text)
+                    for table in header.tables:
+                        lines.extend(self._docx_table_lines(table))
+
+            for block in doc.iter_inner_content():
+                if isinstance(block, Table):
+                    block_lines = self._docx_table_lines(block)
+                else:
+                    block_lines = [block.text]
+                lines.extend(block_lines)
+                gathered += sum(len(line) for line in block_lines)
+                if gathered >= self.max_text_chars:
+                    break
+
+            return "\n".join(lines) + "\n"
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             return ""
     
     def _parse_text(self, text: str) -> Dict[str, Any]:
         """Parse structured data from resume text"""
+        skills, skill_counts = get_skill_matcher().match(text)
+        sections = segment_sections(text)
         result = {
             'name': self._extract_name(text),
             'email': self._extract_email(text),
             'phone': self._extract_phone(text),
-            'skills': self._extract_skills(text),
-            'experience': self._extract_experience(text),
-            'education': self._extract_education(text)
+            'skills': skills,
+            'skill_counts': skill_counts,
+            'experience': self._extract_experience(text, sections),
+            'education': self._extract_education(text, sections)
         }
         return result
     
@@ -79,58 +341,38 @@ class ResumeParser:
         # Usually name is in the first few lines
         for line in lines[:5]:
             line = line.strip()
-            if line and len(line.split()) <= 4 and not re.search(r'@|\.com|phone|email', line.lower()):
+            if line and len(line.split()) <= 4 and not _NAME_EXCLUDE_PATTERN.search(line.lower()):
                 # Check if it looks like a name (contains alphabetic characters)
-                if re.search(r'[A-Za-z]', line):
+                if _LETTER_PATTERN.search(line):
                     return line
         return ""
     
     def _extract_email(self, text: str) -> str:
         """Extract email from resume text"""
-        emails = re.findall(self.email_pattern, text)
+        emails = self.email_pattern.findall(text)
         return emails[0] if emails else ""
     
     def _extract_phone(self, text: str) -> str:
         """Extract phone number from resume text"""
-        phones = re.findall(self.phone_pattern, text)
+        phones = self.phone_pattern.findall(text)
         return phones[0] if phones else ""
     
     def _extract_skills(self, text: str) -> List[str]:
-        """Extract skills from resume text"""
-        # Common skill keywords
-        skill_keywords = [
-            'python', 'java', 'javascript', 'react', 'angular', 'vue', 'node.js',
-            'django', 'flask', 'fastapi', 'spring', 'express', 'mongodb', 'mysql',
-            'postgresql', 'redis', 'aws', 'azure', 'gcp', 'docker', 'kubernetes',
-            'git', 'jenkins', 'ci/cd', 'linux', 'windows', 'macos', 'html', 'css',
-            'typescript', 'c++', 'c#', 'go', 'rust', 'scala', 'kotlin', 'swift',
-            'machine learning', 'data science', 'artificial intelligence', 'deep learning',
-            'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit-learn', 'sql',
-            'nosql', 'microservices', 'rest api', 'graphql', 'agile', 'scrum'
-        ]
-        
-        text_lower = text.lower()
-        found_skills = []
-        
-        for skill in skill_keywords:
-            if skill.lower() in text_lower:
-                # Find the actual case in the original text
-                matches = re.findall(rf'\b{re.escape(skill)}\b', text, re.IGNORECASE)
-                if matches:
-                    found_skills.append(matches[0])
-        
-        return list(set(found_skills))  # Remove duplicates
+        """Extract canonical skills from resume text"""
+        skills, _ = get_skill_matcher().match(text)
+        return skills
     
-    def _extract_experience(self, text: str) -> List[Dict[str, Any]]:
+    def _extract_experience(self, text: str, sections: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """Extract work experience from resume text"""
         experience = []
         
-        # Look for experience section
-        experience_section = self._find_section(text, ['experience', 'work history', 'employment'])
+        if sections is None:
+            sections = segment_sections(text)
+        experience_section = sections.get("experience", "")
         
         if experience_section:
             # Split by potential job entries (look for years or company patterns)
-            entries = re.split(r'\n(?=\d{4}|\w+\s+\d{4})', experience_section)
+            entries = _ENTRY_SPLIT_PATTERN.split(experience_section)
             
             for entry in entries:
                 if entry.strip():
@@ -145,66 +387,30 @@ class ResumeParser:
         
         return experience
     
-    def _extract_education(self, text: str) -> List[Dict[str, Any]]:
+    def _extract_education(self, text: str, sections: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """Extract education from resume text"""
         education = []
         
-        # Look for education section
-        education_section = self._find_section(text, ['education', 'academic', 'qualification'])
+        if sections is None:
+            sections = segment_sections(text)
+        education_section = sections.get("education", "")
         
         if education_section:
-            # Common degree patterns
-            degree_patterns = [
-                r'(bachelor|master|phd|doctorate|b\.?\s?sc|m\.?\s?sc|b\.?\s?tech|m\.?\s?tech|b\.?\s?a|m\.?\s?a)',
-                r'(undergraduate|graduate|postgraduate)',
-                r'(diploma|certificate)'
-            ]
-            
-            for pattern in degree_patterns:
-                matches = re.finditer(pattern, education_section, re.IGNORECASE)
-                for match in matches:
-                    # Extract context around the match
-                    start = max(0, match.start() - 100)
-                    end = min(len(education_section), match.end() + 100)
-                    context = education_section[start:end].strip()
-                    
-                    edu_data = {
-                        'degree': match.group(),
-                        'description': context,
-                        'institution': self._extract_institution_from_entry(context)
-                    }
-                    education.append(edu_data)
-        
-        return education
-    
-    def _find_section(self, text: str, keywords: List[str]) -> str:
-        """Find a section in the resume text based on keywords"""
-        text_lower = text.lower()
-        
-        for keyword in keywords:
-            # Look for the keyword as a section header
-            pattern = rf'^.*{keyword}.*$'
-            matches = re.finditer(pattern, text_lower, re.MULTILINE)
-            
-            for match in matches:
-                # Find the start of this section
-                section_start = match.start()
-                
-                # Find the next section (look for other common section headers)
-                next_sections = re.search(
-                    r'\n\s*(skills?|experience|education|projects?|certifications?|achievements?)\s*:?\s*\n',
-                    text_lower[section_start + len(match.group()):],
-                    re.IGNORECASE
-                )
+            # Degree keywords, matched in a single scan of the section
+            for match in _DEGREE_PATTERN.finditer(education_section):
+                # Extract context around the match
+                start = max(0, match.start() - 100)
+                end = min(len(education_section), match.end() + 100)
+                context = education_section[start:end].strip()
                 
-                if next_sections:
-                    section_end = section_start + len(match.group()) + next_sections.start()
-                    return text[section_start:section_end]
-                else:
-                    # Return rest of the text
-                    return text[section_start:]
+                edu_data = {
+                    'degree': match.group(),
+                    'description': context,
+                    'institution': self._extract_institution_from_entry(context)
+                }
+                education.append(edu_data)
         
-        return ""
+        return education
     
     def _extract_company_from_entry(self, entry: str) -> str:
         """Extract company name from experience entry"""
@@ -231,8 +437,7 @@ class ResumeParser:
     def _extract_duration_from_entry(self, entry: str) -> str:
         """Extract duration from experience entry"""
         # Look for year patterns
-        year_pattern = r'\d{4}\s*-?\s*(\d{4}|present|current)'
-        matches = re.findall(year_pattern, entry, re.IGNORECASE)
+        matches = _YEAR_RANGE_PATTERN.findall(entry)
         return matches[0] if matches else ""
     
     def _extract_institution_from_entry(self, entry: str) -> str:
@@ -0,0 +1,110 @@
+"""
+Single-pass skill matching over a loadable taxonomy.
+
+The taxonomy maps canonical skill names to aliases (``"k8s"`` -> Kubernetes).
+Aliases are tokenized the same way as resume text and stored in a dict keyed
+by token tuples, so matching is one left-to-right scan that tries only the
+alias lengths known to start with the current token. The cost depends on the
+text length and the longest alias, not on the number of skills, so a 10k+
+entry taxonomy matches as fast as a 50 entry one.
+
+Taxonomy file format (JSON)::
+
+    {"skills": [{"name": "Kubernetes", "aliases": ["kubernetes", "k8s"]}, ...]}
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+from decouple import config
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skills.json")
+RESUME_SKILLS_TAXONOMY_PATH = config("RESUME_SKILLS_TAXONOMY_PATH", default=DEFAULT_TAXONOMY_PATH)
+
+# Words keep trailing + and # (c++, c#); . / - are tokens only when glued to a
+# following word, so "node.js", "ci/cd", "scikit-learn" and ".net" survive
+# while sentence punctuation is dropped
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+[+#]*|[./-](?=[a-z0-9])")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class SkillMatcher:
+    """Longest-alias-first matcher returning canonical skills with counts"""
+
+    def __init__(self, skills: Iterable[Tuple[str, Iterable[str]]]):
+        self._aliases: Dict[Tuple[str, ...], str] = {}
+        lengths: Dict[str, set] = {}
+        self.skill_count = 0
+        for name, aliases in skills:
+            self.skill_count += 1
+            for alias in [name, *aliases]:
+                tokens = tuple(tokenize(alias))
+                if not tokens:
+                    continue
+                if tokens in self._aliases and self._aliases[tokens] != name:
+                    logger.warning(f"Skill alias '{alias}' of {name} already maps to {self._aliases[tokens]}")
+                    continue
+                self._aliases[tokens] = name
+                lengths.setdefault(tokens[0], set()).add(len(tokens))
+        # Longest first so "machine learning" wins over a shorter overlapping alias
+        self._lengths_by_first: Dict[str, Tuple[int, ...]] = {
+            first: tuple(sorted(sizes, reverse=True)) for first, sizes in lengths.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "SkillMatcher":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls((entry["name"], entry.get("aliases", [])) for entry in data.get("skills", []))
+
+    @property
+    def alias_count(self) -> int:
+        return len(self._aliases)
+
+    def count(self, text: str) -> Counter:
+        """Occurrences of each canonical skill, in order of first appearance"""
+        counts: Counter = Counter()
+        tokens = tokenize(text)
+        aliases = self._aliases
+        lengths_by_first = self._lengths_by_first
+        index = 0
+        total = len(tokens)
+        while index < total:
+            lengths = lengths_by_first.get(tokens[index])
+            matched = 0
+            if lengths:
+                for length in lengths:
+                    if index + length > total:
+                        continue
+                    name = aliases.get(tuple(tokens[index:index + length]))
+                    if name is not None:
+                        counts[name] += 1
+                        matched = length
+                        break
+            index += matched or 1
+        return counts
+
+    def match(self, text: str) -> Tuple[List[str], Dict[str, int]]:
+        """Canonical skills (most mentioned first) and their counts"""
+        counts = self.count(text)
+        # Counter keeps first-appearance order, and sorted() is stable
+        skills = sorted(counts, key=lambda name: -counts[name])
+        return skills, dict(counts)
+
+_matcher: Optional[SkillMatcher] = None
+
+def get_skill_matcher() -> SkillMatcher:
+    """The taxonomy matcher for this process, loaded on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = SkillMatcher.from_file(RESUME_SKILLS_TAXONOMY_PATH)
+        logger.info(
+            f"Loaded skill taxonomy: {_matcher.skill_count} skills, "
+            f"{_matcher.alias_count} aliases from {RESUME_SKILLS_TAXONOMY_PATH}"
+        )
+    return _matcher
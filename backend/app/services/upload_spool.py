@@ -0,0 +1,228 @@
+"""
+Streaming, size-capped file uploads.
+
+Multipart request bodies are parsed as they arrive instead of being buffered
+first. Each file part goes into a ``SpooledUpload`` that stays in memory up to
+UPLOAD_SPOOL_MEMORY_BYTES and then moves to a named temporary file, so worker
+processes can open (and memory-map) large uploads by path instead of receiving
+a pickled copy. All files of one request share UPLOAD_SPOOL_REQUEST_MEMORY_BYTES
+of memory; once that is used up, further files go straight to disk. Byte caps are checked against the declared Content-Length and
+again on every received chunk, so an oversized upload is rejected early.
+"""
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from starlette.requests import Request
+from decouple import config
+from multipart.multipart import MultipartParser, parse_options_header
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are spooled to disk
+UPLOAD_SPOOL_MEMORY_BYTES = int(config("UPLOAD_SPOOL_MEMORY_BYTES", default=str(1024 * 1024)))
+# In-memory bytes shared by all the uploads of one request
+UPLOAD_SPOOL_REQUEST_MEMORY_BYTES = int(config("UPLOAD_SPOOL_REQUEST_MEMORY_BYTES", default=str(4 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = config("UPLOAD_SPOOL_DIR", default=tempfile.gettempdir())
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds its byte cap"""
+
+class UploadFormatError(Exception):
+    """Raised when a request body is not valid multipart form data"""
+
+class SpoolBudget:
+    """In-memory bytes left for the uploads of one request"""
+
+    def __init__(self, limit: int = UPLOAD_SPOOL_REQUEST_MEMORY_BYTES):
+        self.remaining = limit
+
+    def take(self, size: int) -> bool:
+        if size > self.remaining:
+            return False
+        self.remaining -= size
+        return True
+
+    def give_back(self, size: int):
+        self.remaining += size
+
+class SpooledUpload:
+    """One uploaded file, in memory while small and in a named temp file once large"""
+
+    def __init__(self, field_name: str, filename: str, max_bytes: int,
+                 memory_bytes: int = UPLOAD_SPOOL_MEMORY_BYTES, budget: Optional[SpoolBudget] = None):
+        self.field_name = field_name
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.budget = budget
+        self.size = 0
+        self.path: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the content, computed while it streamed in"""
+        return self._hash.hexdigest()
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"{self.filename} exceeds {self.max_bytes} bytes")
+        self._hash.update(data)
+        if self._buffer is not None and self.size <= self.memory_bytes and self._take(len(data)):
+            self._buffer.write(data)
+            return
+        if self._buffer is not None:
+            await asyncio.to_thread(self._rollover)
+        await asyncio.to_thread(self._file.write, data)
+
+    def _take(self, size: int) -> bool:
+        return self.budget is None or self.budget.take(size)
+
+    def _rollover(self):
+        fd, self.path = tempfile.mkstemp(prefix="upload-", dir=UPLOAD_SPOOL_DIR)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        if self.budget is not None:
+            self.budget.give_back(self._buffer.getbuffer().nbytes)
+        self._buffer = None
+
+    async def finish(self):
+        """Flush a spooled file so it can be reopened by path"""
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self._buffer is not None
+
+    def source(self) -> Union[bytes, str]:
+        """The content for a parser: bytes while small, otherwise the file path"""
+        return self._buffer.getvalue() if self._buffer is not None else self.path
+
+    def open(self):
+        """A readable, seekable file object over the content"""
+        if self._buffer is not None:
+            return io.BytesIO(self._buffer.getbuffer())
+        return open(self.path, "rb")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._buffer = None
+
+def check_content_length(request: Request, limit: int):
+    """Reject a request whose declared body size is already over the cap"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise UploadTooLargeError(f"Upload exceeds maximum size of {limit} bytes")
+
+async def limited_stream(request: Request, limit: int) -> AsyncIterator[bytes]:
+    """Yield request body chunks, failing as soon as the byte cap is exceeded"""
+    received = 0
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLargeError(f"Upload exceeds maximum size of {limit} bytes")
+        yield chunk
+
+async def read_multipart_uploads(request: Request, max_body_bytes: int, max_file_bytes: int,
+                                 max_files: int = 1) -> Tuple[List[SpooledUpload], Dict[str, str]]:
+    """Stream a multipart body into spooled uploads; returns (files, plain fields)
+
+    The caller owns the returned uploads and must close them.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadFormatError("Expected multipart/form-data")
+    check_content_length(request, max_body_bytes)
+
+    uploads: List[SpooledUpload] = []
+    fields: Dict[str, str] = {}
+    budget = SpoolBudget()
+    # Parser callbacks are synchronous, so file data is queued and written after each chunk
+    pending: List[Tuple[SpooledUpload, bytes]] = []
+    part: Dict[str, object] = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update({"headers": {}, "field": b"", "value": b"", "upload": None})
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = b""
+        part["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        part["name"] = name
+        part["data"] = b""
+        if b"filename" in options:
+            if len(uploads) >= max_files:
+                raise UploadFormatError(f"Too many files (maximum {max_files})")
+            upload = SpooledUpload(
+                name, options[b"filename"].decode("utf-8", "replace"), max_file_bytes, budget=budget
+            )
+            uploads.append(upload)
+            part["upload"] = upload
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["upload"] is not None:
+            pending.append((part["upload"], data[start:end]))
+        else:
+            part["data"] += data[start:end]
+            if len(part["data"]) > UPLOAD_SPOOL_MEMORY_BYTES:
+                raise UploadFormatError(f"Form field '{part['name']}' is too large")
+
+    def on_part_end():
+        if part["upload"] is None:
+            fields[part["name"]] = part["data"].decode("utf-8", "replace")
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished
+    })
+    try:
+        async for chunk in limited_stream(request, max_body_bytes):
+            parser.write(chunk)
+            for upload, data in pending:
+                await upload.write(data)
+            pending.clear()
+        parser.finalize()
+        for upload in uploads:
+            await upload.finish()
+    except BaseException as e:
+        for upload in uploads:
+            upload.close()
+        if isinstance(e, (UploadTooLargeError, UploadFormatError)) or not isinstance(e, Exception):
+            raise
+        raise UploadFormatError(f"Invalid multipart body: {str(e)}")
+    return uploads, fields
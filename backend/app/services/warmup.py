@@ -0,0 +1,197 @@
+"""
+Warm-up stage run in the application lifespan.
+
+On a scale-to-zero host the first request after idle would otherwise pay for
+opening the MongoDB pool, the Gemini TLS handshake, starting the resume
+worker processes, Pydantic serializer and OpenAPI schema construction and
+Starlette's lazily built middleware stack all at once. The steps listed in
+WARMUP_STEPS run in the background right after startup, each bounded by
+WARMUP_STEP_TIMEOUT_SECONDS; a failed step is logged and skipped. Progress is
+reported by ``/ready``, which returns 503 until warm-up has finished when
+WARMUP_GATES_READINESS is set.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
+from decouple import config
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = config("WARMUP_ENABLED", default=True, cast=bool)
+# Resume workers are forked before the Gemini client opens its gRPC channel
+WARMUP_STEPS = [step.strip() for step in config(
+    "WARMUP_STEPS", default="storage,resume_parser,models,gemini,routes"
+).split(",") if step.strip()]
+WARMUP_ROUTES = [route.strip() for route in config(
+    "WARMUP_ROUTES", default="/health,/api/agents/types,/api/agents/difficulty-levels"
+).split(",") if route.strip()]
+WARMUP_STEP_TIMEOUT_SECONDS = float(config("WARMUP_STEP_TIMEOUT_SECONDS", default="15"))
+WARMUP_STORAGE_CONNECTIONS = int(config("WARMUP_STORAGE_CONNECTIONS", default="4"))
+WARMUP_GATES_READINESS = config("WARMUP_GATES_READINESS", default=True, cast=bool)
+
+Step = Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]
+
+class WarmUp:
+    """Runs the configured warm-up steps once and tracks their progress"""
+
+    def __init__(self, steps: List[str] = WARMUP_STEPS, enabled: bool = WARMUP_ENABLED):
+        self.enabled = enabled
+        self.step_names = steps
+        self._steps: Dict[str, Step] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.state = "pending"
+        self.progress: List[Dict[str, Any]] = []
+        self.started_at: Optional[datetime] = None
+        self.duration_ms: Optional[float] = None
+
+    def step(self, name: str) -> Callable[[Step], Step]:
+        """Register a warm-up step; it receives the application and may return details"""
+        def register(fn: Step) -> Step:
+            self._steps[name] = fn
+            return fn
+        return register
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "disabled")
+
+    def start(self, app):
+        """Run the warm-up in the background"""
+        if not self.enabled or not self.step_names:
+            self.state = "disabled"
+            return
+        unknown = [name for name in self.step_names if name not in self._steps]
+        if unknown:
+            logger.warning(f"Unknown warm-up steps ignored: {unknown}")
+        self.progress = [
+            {"step": name, "status": "pending", "ms": None}
+            for name in self.step_names if name in self._steps
+        ]
+        self.state = "running"
+        self._task = asyncio.create_task(self._run(app))
+
+    async def _run(self, app):
+        self.started_at = datetime.utcnow()
+        started = time.perf_counter()
+        for entry in self.progress:
+            entry["status"] = "running"
+            step_started = time.perf_counter()
+            try:
+                details = await asyncio.wait_for(self._steps[entry["step"]](app), timeout=WARMUP_STEP_TIMEOUT_SECONDS)
+                entry["status"] = "ok"
+                if details:
+                    entry["details"] = details
+            except asyncio.TimeoutError:
+                entry["status"] = "timeout"
+                logger.warning(f"Warm-up step {entry['step']} timed out after {WARMUP_STEP_TIMEOUT_SECONDS}s")
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e) or type(e).__name__
+                logger.warning(f"Warm-up step {entry['step']} failed: {entry['error']}")
+            entry["ms"] = round((time.perf_counter() - step_started) * 1000, 3)
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.state = "done"
+        logger.info(f"Warm-up finished in {self.duration_ms}ms: " + ", ".join(
+            f"{entry['step']}={entry['status']}" for entry in self.progress
+        ))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        completed = sum(entry["status"] not in ("pending", "running") for entry in self.progress)
+        return {
+            "state": self.state,
+            "completed": completed,
+            "total": len(self.progress),
+            "duration_ms": self.duration_ms,
+            "steps": [dict(entry) for entry in self.progress]
+        }
+
+warmup = WarmUp()
+
+@warmup.step("storage")
+async def _warm_storage(app) -> Dict[str, Any]:
+    """Open pooled storage connections and run one indexed read"""
+    from ..database.repository import repository
+    await repository.primary.warm_up(WARMUP_STORAGE_CONNECTIONS)
+    await repository.find_user_by_email("warmup@localhost")
+    return {"backend": repository.primary.name}
+
+@warmup.step("resume_parser")
+async def _warm_resume_parser(app) -> Dict[str, Any]:
+    """Start the resume worker processes and parse a sample in each"""
+    from .resume_parser import resume_pool, warm_up_worker
+    pids = await resume_pool.warm_up(warm_up_worker)
+    return {"workers": len(set(pids))}
+
+@warmup.step("models")
+async def _warm_models(app) -> Dict[str, Any]:
+    """Exercise validation and serialization of the hot models and build the OpenAPI schema"""
+    from ..models.interview_models import InterviewSession
+    from ..models.user_models import User
+    session = InterviewSession.model_validate({
+        "session_id": "warmup", "user_id": "warmup", "interviewer_type": "hr",
+        "difficulty": "medium", "job_description": "", "questions": ["?"]
+    })
+    session.model_dump(mode="json")
+    user = User.model_validate({
+        "email": "warmup@example.com", "username": "warmup",
+        "full_name": "Warm Up", "hashed_password": "x"
+    })
+    user.model_dump(by_alias=True)
+    return {"openapi_paths": len(app.openapi().get("paths", {}))}
+
+@warmup.step("gemini")
+async def _warm_gemini(app) -> None:
+    """Open the Gemini API channel"""
+    from .container import services
+    gemini = services.gemini
+    if gemini is None:
+        raise RuntimeError("Gemini service is unavailable")
+    await gemini.warm_up(timeout=WARMUP_STEP_TIMEOUT_SECONDS)
+
+async def _internal_get(app, path: str) -> int:
+    """Send a GET through the full ASGI stack (middleware included) and return its status"""
+    status = 0
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0), "server": ("warmup", 80),
+        "headers": [(b"host", b"warmup"), (b"user-agent", b"interviewpilot-warmup")]
+    }
+
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        # Middleware keeps listening for a disconnect after the body, so later calls must block
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status
+
+@warmup.step("routes")
+async def _warm_routes(app) -> Dict[str, int]:
+    """Touch the hottest routes so routing, dependencies and response models are warm"""
+    return {path: await _internal_get(app, path) for path in WARMUP_ROUTES}
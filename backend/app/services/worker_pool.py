@@ -0,0 +1,152 @@
+"""
+Bounded executor pools for CPU-heavy work that must stay off the event loop.
+
+Each ``WorkerPool`` caps how many jobs run at once and how many may wait for
+a slot, so a burst (e.g. a login storm) queues up behind the pool instead of
+blocking every other request, and reports queue and latency metrics.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+import asyncio
+import functools
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class WorkerPoolBusyError(Exception):
+    """Raised when a pool's wait queue is full"""
+
+class WorkerPoolTimeoutError(Exception):
+    """Raised when a job does not finish within the pool timeout"""
+
+class WorkerPool:
+    """Thread or process pool with a concurrency cap, a bounded wait queue and metrics"""
+
+    def __init__(self, name: str, max_workers: int, queue_limit: int = 0,
+                 timeout: Optional[float] = None, kind: str = "thread"):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = queue_limit  # 0 means unbounded
+        self.timeout = timeout
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._wait_ms = deque(maxlen=500)
+        self._run_ms = deque(maxlen=500)
+        _pools.append(self)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` in the pool once a slot is free"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        if self.queue_limit and self.queued >= self.queue_limit and self._semaphore.locked():
+            self.rejected += 1
+            raise WorkerPoolBusyError(f"{self.name} pool is busy ({self.queued} jobs waiting)")
+
+        self.submitted += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        enqueued = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self._wait_ms.append((started - enqueued) * 1000)
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+            result = await asyncio.wait_for(future, timeout=self.timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            # The job itself keeps its worker until it finishes; callers bound the work (e.g. max pages)
+            self.timeouts += 1
+            raise WorkerPoolTimeoutError(f"{self.name} job exceeded {self.timeout}s")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._run_ms.append((time.perf_counter() - started) * 1000)
+            self.active -= 1
+            self._semaphore.release()
+
+    def start(self):
+        """Create the executor ahead of the first job"""
+        self._get_executor()
+
+    async def warm_up(self, fn: Callable[[], Any]) -> List[Any]:
+        """Run ``fn`` once per worker slot so processes are started before the first job"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(executor, fn) for _ in range(self.max_workers)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, Optional[float]]:
+        values = sorted(samples)
+        if not values:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": round(values[len(values) // 2], 3),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            "max": round(values[-1], 3)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "active": self.active,
+            "utilisation": round(self.active / self.max_workers, 3),
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "wait_ms": self._percentiles(self._wait_ms),
+            "run_ms": self._percentiles(self._run_ms)
+        }
+
+_pools: List[WorkerPool] = []
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Statistics of every worker pool"""
+    return [pool.stats() for pool in _pools]
+
+def all_pools() -> List[WorkerPool]:
+    """Every worker pool created in this process"""
+    return list(_pools)
+
+def shutdown_pools():
+    """Shut down every worker pool's executor"""
+    for pool in _pools:
+        pool.shutdown()
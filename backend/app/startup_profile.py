@@ -0,0 +1,83 @@
+"""
+Startup-time profile: ``python main.py --profile-startup [--top N]``.
+
+Imports the application in a fresh interpreter with ``-X importtime`` to get
+per-module import cost, then times importing it and constructing each shared
+service in this process, and the heavy libraries that are now deferred to
+first use.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that are imported on first use instead of at startup
+DEFERRED_IMPORTS = ["google.generativeai", "PyPDF2", "docx"]
+
+def _import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module imported by ``import module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def _timed_ms(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+def run_profile(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py --profile-startup")
+    parser.add_argument("--profile-startup", action="store_true")
+    parser.add_argument("--top", type=int, default=15, help="Packages and modules to list")
+    args, _ = parser.parse_known_args(argv)
+
+    rows = _import_times("main")
+    if not rows:
+        print("Could not import main in a subprocess")
+        return 1
+    total_ms = max(cumulative for _, _, cumulative in rows) / 1000
+
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0] if not name.startswith("app.") else ".".join(name.split(".")[:3])
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    print(f"Import of main: {total_ms:.1f} ms across {len(rows)} modules\n")
+    print(f"{'package / app module':<45} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<45} {self_us / 1000:>9.1f}")
+
+    print(f"\n{'app module (cumulative)':<45} {'ms':>9}")
+    app_rows: Dict[str, int] = {}
+    for name, _, cumulative in rows:
+        if name == "main" or name.startswith("app."):
+            app_rows[name] = max(app_rows.get(name, 0), cumulative)
+    for name, cumulative in sorted(app_rows.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<45} {cumulative / 1000:>9.1f}")
+
+    # In-process: application import, then lazily constructed services and deferred libraries
+    sys.path.insert(0, BACKEND_DIR)
+    import_ms = _timed_ms(lambda: importlib.import_module("main"))
+    from app.services.container import services
+    print(f"\n{'initialization (this process)':<45} {'ms':>9}")
+    print(f"{'import main':<45} {import_ms:>9.1f}")
+    for name in ("gemini", "interview"):
+        _timed_ms(lambda: getattr(services, name))
+        status = "" if name in services.stats()["initialized"] else " (failed)"
+        print(f"{'service: ' + name + status:<45} {services.init_ms[name]:>9.1f}")
+    for module in DEFERRED_IMPORTS:
+        print(f"{'deferred import: ' + module:<45} {_timed_ms(lambda: importlib.import_module(module)):>9.1f}")
+    return 0
@@ -0,0 +1,120 @@
+"""
+Benchmark JSON response rendering on realistic API payloads.
+
+Compares, per payload, the time to turn a route's return value into response
+bytes along three paths:
+
+- default: FastAPI's ``jsonable_encoder`` then stdlib ``json`` (JSONResponse)
+- encoder+fast: ``jsonable_encoder`` then ``FastJSONResponse`` (app-wide class)
+- trusted: ``trusted_json`` (the dict goes straight to the encoder)
+
+Usage (from the backend directory):
+
+    python -m benchmarks.json_responses
+    python -m benchmarks.json_responses --questions 20 --audio-kb 2048 --repeat 20
+"""
+from typing import Any, Callable, Dict, List
+from datetime import datetime, timedelta
+import argparse
+import base64
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from app.responses import FastJSONResponse, trusted_json, orjson  # noqa: E402
+
+def _feedback(index: int) -> Dict[str, Any]:
+    return {
+        "score": round(random.uniform(4, 9), 1),
+        "strengths": [f"Clear structure in answer {index}", "Concrete metrics", "Good ownership"],
+        "improvements": ["Quantify the impact earlier", "Mention trade-offs considered"],
+        "detailed_feedback": "The candidate described the situation and actions well. " * 8,
+        "suggested_answer": "A strong answer would follow the STAR format and close with results. " * 4
+    }
+
+def summary_payload(questions: int) -> Dict[str, Any]:
+    """/api/interview/summary/{id}"""
+    qa = [(f"Question {i}: tell me about a time when... " * 3, "My answer was... " * 60, _feedback(i))
+          for i in range(questions)]
+    return {
+        "session_id": "0f6c1a2e-8a9b-4c1d-9e2f-123456789abc",
+        "interviewer_type": "behavioral",
+        "difficulty": "medium",
+        "total_questions": questions,
+        "answered_questions": questions,
+        "average_score": 7.2,
+        "individual_feedback": [f for _, _, f in qa],
+        "overall_summary": {"summary": "Solid interview. " * 40, "recommendation": "Hire"},
+        "qa_pairs": [{"question": q, "answer": a, "feedback": f} for q, a, f in qa]
+    }
+
+def sessions_payload(count: int) -> Dict[str, Any]:
+    """/api/interview/sessions"""
+    now = datetime.utcnow()
+    sessions: List[Dict[str, Any]] = [{
+        "session_id": f"session-{i}",
+        "interviewer_type": "hr",
+        "difficulty": "easy",
+        "created_at": now - timedelta(hours=i),
+        "total_questions": 5,
+        "answered_questions": 5,
+        "completed": True
+    } for i in range(count)]
+    return {"sessions": sessions, "total_sessions": count}
+
+def recording_payload(audio_kb: int) -> Dict[str, Any]:
+    """/api/interview/recording/{id} with inline base64 audio"""
+    audio = base64.b64encode(os.urandom(audio_kb * 1024)).decode("ascii")
+    return {"success": True, "recording": {
+        "_id": "665f1c2b9d1e8a0012345678",
+        "session_id": "session-1",
+        "question_index": 0,
+        "audio_data": audio,
+        "duration": 93.4,
+        "created_at": datetime.utcnow()
+    }}
+
+def _time(fn: Callable[[], bytes], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--questions", type=int, default=15, help="Questions in the summary payload")
+    arg_parser.add_argument("--sessions", type=int, default=500, help="Sessions in the list payload")
+    arg_parser.add_argument("--audio-kb", type=int, default=1024, help="Raw audio size of the recording payload")
+    arg_parser.add_argument("--repeat", type=int, default=15, help="Runs per path (median is reported)")
+    args = arg_parser.parse_args()
+
+    random.seed(7)
+    payloads = {
+        "summary": summary_payload(args.questions),
+        "sessions": sessions_payload(args.sessions),
+        "recording": recording_payload(args.audio_kb)
+    }
+    paths = {
+        "default": lambda content: JSONResponse(jsonable_encoder(content)).body,
+        "encoder+fast": lambda content: FastJSONResponse(jsonable_encoder(content)).body,
+        "trusted": lambda content: trusted_json(content).body
+    }
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'payload':<10} {'KB':>8} " + " ".join(f"{name + ' ms':>16}" for name in paths) + f" {'speedup':>8}")
+    for name, content in payloads.items():
+        size_kb = len(paths["trusted"](content)) / 1024
+        timings = [_time(lambda: path(content), args.repeat) for path in paths.values()]
+        speedup = timings[0] / timings[-1] if timings[-1] else float("inf")
+        print(f"{name:<10} {size_kb:>8.1f} " + " ".join(f"{ms:>16.2f}" for ms in timings) + f" {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark resume text extraction.
+
+Compares the original serial string-concatenation extraction with the
+current serial extraction and the page-parallel worker pool path, over a
+corpus of resumes sized 1-50 pages.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.resume_extraction --corpus ./resumes   # real PDF/DOCX resumes
+    python -m benchmarks.resume_extraction                      # synthetic 1-50 page PDFs
+
+Without --corpus, text PDFs of 1, 2, 5, 10, 20, 35 and 50 pages are generated
+so the benchmark runs anywhere; real-world resumes are better because their
+fonts and layouts make extract_text much more expensive.
+"""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+from app.services.resume_parser import ResumeParser, resume_pool  # noqa: E402
+
+SYNTHETIC_PAGE_COUNTS = [1, 2, 5, 10, 20, 35, 50]
+
+def _synthetic_pdf(pages: int, lines_per_page: int = 55) -> bytes:
+    """A minimal text PDF with resume-like lines on every page"""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # Pages, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            f"({'Senior Software Engineer' if i % 7 == 0 else 'Built Python, Docker and React services'} "
+            f"- page {page + 1} line {i + 1}) Tj T*"
+            for i in range(lines_per_page)
+        ]
+        stream = ("BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(lines) + " ET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def _legacy_extract_pdf(file_content: bytes) -> str:
+    """The original implementation: serial, quadratic string building"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text
+
+def _load_corpus(path: str) -> List[Tuple[str, bytes]]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith((".pdf", ".docx")):
+            with open(os.path.join(path, name), "rb") as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def run(corpus: List[Tuple[str, bytes]], repeat: int) -> List[Dict[str, object]]:
+    parser = ResumeParser()
+    loop = asyncio.new_event_loop()
+    rows = []
+    try:
+        # Start the worker processes before measuring
+        loop.run_until_complete(resume_pool.run(len, b""))
+        for name, content in corpus:
+            pages = len(PyPDF2.PdfReader(io.BytesIO(content)).pages) if name.endswith(".pdf") else None
+            if name.endswith(".pdf"):
+                legacy_ms = _time(lambda: _legacy_extract_pdf(content), repeat)
+            else:
+                legacy_ms = None
+            serial_ms = _time(lambda: parser.parse_resume_sync(content, name), repeat)
+            pooled_ms = _time(lambda: loop.run_until_complete(parser.parse_resume(content, name)), repeat)
+            rows.append({
+                "file": name,
+                "pages": pages,
+                "legacy_extract_ms": legacy_ms,
+                "serial_parse_ms": serial_ms,
+                "pool_parse_ms": pooled_ms
+            })
+    finally:
+        resume_pool.shutdown()
+        loop.close()
+    return rows
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", help="Directory of PDF/DOCX resumes")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per file (median is reported)")
+    args = arg_parser.parse_args()
+
+    if args.corpus:
+        corpus = _load_corpus(args.corpus)
+    else:
+        corpus = [(f"synthetic-{pages:02d}p.pdf", _synthetic_pdf(pages)) for pages in SYNTHETIC_PAGE_COUNTS]
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"{'file':<28} {'pages':>5} {'legacy ms':>10} {'serial ms':>10} {'pool ms':>10}")
+    for row in run(corpus, args.repeat):
+        print(
+            f"{row['file']:<28} {fmt(row['pages']) if row['pages'] is None else row['pages']:>5} "
+            f"{fmt(row['legacy_extract_ms']):>10} {fmt(row['serial_parse_ms']):>10} {fmt(row['pool_parse_ms']):>10}"
+        )
+
+if __name__ == "__main__":
+    main()
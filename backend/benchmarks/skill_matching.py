@@ -0,0 +1,89 @@
+"""
+Benchmark skill matching as the taxonomy grows.
+
+Times the original per-keyword scan (substring check plus ``re.findall`` for
+every keyword) against the single-pass ``SkillMatcher`` over the shipped
+taxonomy padded with synthetic skills, up to 50k entries.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.skill_matching
+    python -m benchmarks.skill_matching --text resume.txt --repeat 5
+"""
+from typing import Callable, List, Tuple
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.skill_matcher import RESUME_SKILLS_TAXONOMY_PATH, SkillMatcher  # noqa: E402
+
+TAXONOMY_SIZES = [50, 500, 2000, 10000, 50000]
+LEGACY_MAX_SIZE = 2000  # The keyword loop gets too slow to be worth timing beyond this
+
+SAMPLE_LINE = (
+    "Senior engineer building Python and FastAPI microservices on AWS with Docker, k8s "
+    "and CI/CD; React.js and TypeScript frontends; machine learning with PyTorch and scikit-learn."
+)
+
+def _legacy_extract(skill_keywords: List[str], text: str) -> List[str]:
+    """The original implementation"""
+    text_lower = text.lower()
+    found_skills = []
+    for skill in skill_keywords:
+        if skill.lower() in text_lower:
+            matches = re.findall(rf'\b{re.escape(skill)}\b', text, re.IGNORECASE)
+            if matches:
+                found_skills.append(matches[0])
+    return list(set(found_skills))
+
+def _taxonomy(size: int) -> List[Tuple[str, List[str]]]:
+    with open(RESUME_SKILLS_TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        skills = [(entry["name"], entry["aliases"]) for entry in json.load(f)["skills"]][:size]
+    for index in range(len(skills), size):
+        skills.append((f"Skill {index}", [f"skill{index}", f"tool {index} suite"]))
+    return skills
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--text", help="Resume text file to match against")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Runs per size (median is reported)")
+    args = arg_parser.parse_args()
+
+    if args.text:
+        with open(args.text, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = "\n".join([SAMPLE_LINE] * 200)
+
+    print(f"text: {len(text)} chars")
+    print(f"{'skills':>7} {'aliases':>8} {'build ms':>9} {'legacy ms':>10} {'matcher ms':>11} {'found':>6}")
+    for size in TAXONOMY_SIZES:
+        skills = _taxonomy(size)
+        started = time.perf_counter()
+        matcher = SkillMatcher(skills)
+        build_ms = (time.perf_counter() - started) * 1000
+        if size <= LEGACY_MAX_SIZE:
+            keywords = [alias for _, aliases in skills for alias in aliases]
+            legacy_ms = f"{_time(lambda: _legacy_extract(keywords, text), args.repeat):.2f}"
+        else:
+            legacy_ms = "-"
+        matcher_ms = _time(lambda: matcher.match(text), args.repeat)
+        found = len(matcher.match(text)[0])
+        print(f"{size:>7} {matcher.alias_count:>8} {build_ms:>9.1f} {legacy_ms:>10} {matcher_ms:>11.2f} {found:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import sys
+
+# Startup profile runs before the application is imported so it can measure that import
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    from app.startup_profile import run_profile
+    sys.exit(run_profile(sys.argv))
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
@@ -7,24 +15,47 @@ from app.routes.agents import router as agents_router
 from app.routes.resume import router as resume_router
 from app.routes.auth import router as auth_router
 from app.routes.debug import router as debug_router
-from app.services.gemini_service import GeminiService
+from app.routes.admin import router as admin_router
+from app.database.memory_db import memory_db
 from decouple import config
+from contextlib import asynccontextmanager
 import os
 
-# Import MongoDB connection based on environment
-is_render = os.getenv('RENDER') or config('PORT', default='8000') == '10000'
-if is_render:
-    print("DEBUG: Using Render-optimized MongoDB connection...")
-    from app.database.mongodb_render import connect_to_mongo, close_mongo_connection
-else:
-    print("DEBUG: Using standard MongoDB connection...")
-    from app.database.mongodb import connect_to_mongo, close_mongo_connection
+# Storage backend (MongoDB by default, see STORAGE_BACKEND)
+from app.database.storage import connect_storage, close_storage
+from app.database.repository import repository
+from app.services.cache import request_scope
+from app.services.container import services
+from app.services.recording_storage import upload_manager
+from app.services.warmup import warmup, WARMUP_GATES_READINESS
+from app.responses import default_response_class
+from app.compression import CompressionMiddleware
+
+# Application lifespan: storage first, then the service container; shutdown in reverse
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_storage()
+    repository.start()
+    await services.start()
+    upload_manager.start()
+    warmup.start(app)
+    try:
+        yield
+    finally:
+        await warmup.stop()
+        await upload_manager.stop()
+        await services.close()
+        await repository.stop()
+        await close_storage()
+        memory_db.close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="InterviewPilot API",
     description="AI-powered interview preparation platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=default_response_class
 )
 
 # Get environment-specific CORS origins (simplified for personal use)
@@ -45,21 +76,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request memoization scope (see app.services.cache)
+@app.middleware("http")
+async def request_memo_middleware(request: Request, call_next):
+    with request_scope():
+        return await call_next(request)
+
+# Response compression (outermost, so it sees every response as it streams)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["authentication"])
 app.include_router(interview_router, prefix="/api/interview", tags=["interview"])
 app.include_router(agents_router, prefix="/api/agents", tags=["agents"])
 app.include_router(resume_router, prefix="/api/resume", tags=["resume"])
 app.include_router(debug_router, prefix="/api/debug", tags=["debug"])
-
-# Database event handlers
-@app.on_event("startup")
-async def startup_event():
-    await connect_to_mongo()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await close_mongo_connection()
+app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -69,6 +101,24 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the primary storage backend is reachable and warm-up has finished"""
+    primary = repository.primary
+    storage_ready = primary.is_available()
+    warmed_up = warmup.finished or not WARMUP_GATES_READINESS
+    ready = storage_ready and warmed_up
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else ("warming_up" if storage_ready else "not_ready"),
+            "storage_backend": primary.name,
+            "serving_from_fallback": not storage_ready and repository.fallback is not None,
+            "journal_pending": len(repository.journal),
+            "warmup": warmup.stats()
+        }
+    )
+
 if __name__ == "__main__":
     # Get port from environment variable (Render uses PORT=10000)
     port = int(config('PORT', default='8000'))
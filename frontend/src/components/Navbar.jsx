@@ -21,6 +21,7 @@ const Navbar = () => {
         } catch (error) {
           console.error('Error parsing user data:', error);
           localStorage.removeItem('token');
+          localStorage.removeItem('refreshToken');
           localStorage.removeItem('user');
           setUser(null);
         }
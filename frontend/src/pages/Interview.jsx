@@ -13,6 +13,7 @@ const Interview = () => {
   // Form data
   const [formData, setFormData] = useState({
     resume_text: '',
+    resume_id: null,
     job_description: '',
     interviewer_type: '',
     difficulty: 'medium',
@@ -55,7 +56,8 @@ const Interview = () => {
       const resumeData = await resumeAPI.uploadResume(file);
       setFormData(prev => ({
         ...prev,
-        resume_text: resumeData.raw_text
+        resume_text: resumeData.raw_text,
+        resume_id: resumeData.resume_id
       }));
       setUploadedFile(file);
       toast.success('Resume uploaded successfully!');
@@ -70,7 +72,9 @@ const Interview = () => {
   const handleTextareaChange = (field) => (event) => {
     setFormData(prev => ({
       ...prev,
-      [field]: event.target.value
+      [field]: event.target.value,
+      // Edited resume text no longer matches the uploaded resume
+      ...(field === 'resume_text' ? { resume_id: null } : {})
     }));
   };
 
@@ -31,6 +31,7 @@ const Login = () => {
         if (response.access_token) {
         // Store token in localStorage
         localStorage.setItem('token', response.access_token);
+        localStorage.setItem('refreshToken', response.refresh_token);
         localStorage.setItem('user', JSON.stringify(response.user));
         
         // Trigger auth state change event for Navbar
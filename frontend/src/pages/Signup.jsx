@@ -54,6 +54,7 @@ const Signup = () => {
         if (response.access_token) {
         // Store token in localStorage
         localStorage.setItem('token', response.access_token);
+        localStorage.setItem('refreshToken', response.refresh_token);
         localStorage.setItem('user', JSON.stringify(response.user));
         
         // Trigger auth state change event for Navbar
@@ -33,17 +33,57 @@ apiClient.interceptors.request.use(
   }
 );
 
+// Exchange the stored refresh token for a new token pair (shared by concurrent 401s)
+let refreshPromise = null;
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    refreshPromise = axios
+      .post(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refreshToken', response.data.refresh_token);
+        return response.data.access_token;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Response interceptor
 apiClient.interceptors.response.use(
   (response) => {
     return response;
   },
-  (error) => {
+  async (error) => {
     console.error('Response error:', error);
+    const originalRequest = error.config;
+
+    // Renew an expired access token once instead of logging the user out mid-interview
+    if (
+      error.response?.status === 401 &&
+      originalRequest &&
+      !originalRequest._retried &&
+      localStorage.getItem('refreshToken') &&
+      !originalRequest.url?.startsWith('/auth/')
+    ) {
+      originalRequest._retried = true;
+      try {
+        const token = await refreshAccessToken();
+        originalRequest.headers.Authorization = `Bearer ${token}`;
+        return apiClient(originalRequest);
+      } catch (refreshError) {
+        console.error('Token refresh failed:', refreshError);
+      }
+    }
+
       // Handle authentication errors
     if (error.response?.status === 401) {
       // Clear stored auth data
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       localStorage.removeItem('user');
       
       // Trigger auth state change event for Navbar
@@ -91,12 +131,19 @@ export const authAPI = {
 
   // Refresh token
   refreshToken: async () => {
-    const response = await apiClient.post('/auth/refresh-token');
+    const response = await apiClient.post('/auth/refresh', {
+      refresh_token: localStorage.getItem('refreshToken'),
+    });
     return response.data;
   },
-  // Logout (clear local storage)
+  // Logout (revoke the refresh token and clear local storage)
   logout: () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      apiClient.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
     
     // Trigger auth state change event for Navbar
@@ -129,11 +176,12 @@ export const resumeAPI = {
 // Interview API
 export const interviewAPI = {
   // Start new interview session
-  startInterview: async ({ interviewer_type, job_description, resume_text, num_questions = 5 }) => {
+  startInterview: async ({ interviewer_type, job_description, resume_text, resume_id, num_questions = 5 }) => {
     const response = await apiClient.post('/interview/start', {
       interviewer_type,
       job_description,
       resume_text,
+      resume_id,
       num_questions,
     });
     return response.data;